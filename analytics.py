@@ -0,0 +1,346 @@
+import collections
+import queue
+import sqlite3
+import threading
+import time
+
+import posture_engine
+
+# --- Posture analytics store ---
+# Every analysed frame produces a status (posture_engine.STATUS_*). record() only puts
+# (timestamp, status) on a queue; a writer thread turns the stream into
+#   - segments: runs of the same status (start, end, status), the compact raw history
+#   - per-minute and per-day seconds in each status
+#   - per-day slouch episodes and longest continuous sitting
+# and writes them to SQLite (WAL mode, one transaction per batch). The rollups are updated
+# incrementally with upserts, so dashboard queries read a few hundred rows instead of
+# scanning months of raw data (see bench_analytics.py).
+#
+# A status holds from its frame until the next one, at most max_gap_s (detection stopped
+# or paused = not observed). Sitting = someone in front of the camera; a sitting stretch
+# only ends after break_s without anyone. A slouch episode is bad posture lasting at
+# least min_episode_s, ending after episode_gap_s of anything else.
+
+BAD_STATUSES = posture_engine.BAD_STATUSES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (start REAL NOT NULL, end REAL NOT NULL, status INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS segments_start ON segments (start);
+CREATE TABLE IF NOT EXISTS minute_status (
+    minute INTEGER NOT NULL, status INTEGER NOT NULL, seconds REAL NOT NULL,
+    PRIMARY KEY (minute, status)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS day_status (
+    day TEXT NOT NULL, status INTEGER NOT NULL, seconds REAL NOT NULL,
+    PRIMARY KEY (day, status)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS day_stats (
+    day TEXT PRIMARY KEY, slouch_episodes INTEGER NOT NULL DEFAULT 0,
+    longest_sitting_s REAL NOT NULL DEFAULT 0) WITHOUT ROWID;
+"""
+
+
+def day_of(timestamp):
+    """Local calendar day of a time.time() timestamp, as 'YYYY-MM-DD'."""
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+class Rollup:
+    """Turns (timestamp, status) events into rollup increments. Pure Python, no database.
+
+    take() returns and resets everything accumulated since the last call.
+    """
+    def __init__(self, max_gap_s=2.0, break_s=120.0, min_episode_s=5.0, episode_gap_s=3.0):
+        self.max_gap_s = max_gap_s
+        self.break_s = break_s
+        self.min_episode_s = min_episode_s
+        self.episode_gap_s = episode_gap_s
+        self.last_ts = None
+        self.last_status = None
+        self.segment_start = None
+        self.sitting_start = None      # start of the current sitting stretch
+        self.sitting_end = None        # last moment someone was seen in it
+        self.bad_start = None          # start of the current bad posture run
+        self.bad_end = None
+        self.bad_counted = False
+        self._day_minute = None
+        self._day = None
+        self._reset()
+
+    def _reset(self):
+        self.minute_seconds = collections.defaultdict(float)  # (minute, status) -> seconds
+        self.day_seconds = collections.defaultdict(float)     # (day, status) -> seconds
+        self.day_episodes = collections.defaultdict(int)      # day -> new episodes
+        self.day_longest = {}                                 # day -> longest sitting seen so far
+        self.segments = []                                    # closed (start, end, status)
+
+    def add(self, timestamp, status):
+        if self.last_ts is not None and timestamp < self.last_ts:
+            # Clock went backwards (e.g. adjusted): treat it like a restart
+            self.close()
+        last_ts, last_status = self.last_ts, self.last_status
+        if last_ts is not None:
+            end = min(timestamp, last_ts + self.max_gap_s)
+            self._interval(last_ts, end, last_status)
+            if end < timestamp or status != last_status:
+                self.segments.append((self.segment_start, end, last_status))
+                self.segment_start = timestamp
+            if end < timestamp:
+                self._unobserved(end, timestamp)
+        else:
+            self.segment_start = timestamp
+        self.last_ts, self.last_status = timestamp, status
+
+    def close(self):
+        """Detection stopped: end the open segment (the last status counts for no time)."""
+        if self.last_ts is not None:
+            if self.last_ts > self.segment_start:
+                self.segments.append((self.segment_start, self.last_ts, self.last_status))
+            self._unobserved(self.last_ts, self.last_ts + max(self.break_s, self.episode_gap_s))
+        self.last_ts = self.last_status = self.segment_start = None
+
+    def take(self):
+        result = (dict(self.minute_seconds), dict(self.day_seconds), dict(self.day_episodes),
+                  dict(self.day_longest), self.segments)
+        self._reset()
+        return result
+
+    def _interval(self, start, end, status):
+        # Time in each status, split at minute boundaries
+        t = start
+        while t < end:
+            minute = int(t // 60)
+            stop = min(end, (minute + 1) * 60.0)
+            seconds = stop - t
+            self.minute_seconds[(minute, status)] += seconds
+            self.day_seconds[(self._day_of_minute(minute), status)] += seconds
+            t = stop
+        if end <= start:
+            return
+
+        # Continuous sitting
+        if status == posture_engine.STATUS_NO_PERSON:
+            self._absent(end)
+        else:
+            if self.sitting_start is None or start - self.sitting_end >= self.break_s:
+                self.sitting_start = start
+            self.sitting_end = end
+            day = self._day_of_minute(int(end // 60))
+            length = end - self.sitting_start
+            if length > self.day_longest.get(day, 0.0):
+                self.day_longest[day] = length
+
+        # Slouch episodes
+        if status in BAD_STATUSES:
+            if self.bad_start is None or start - self.bad_end >= self.episode_gap_s:
+                self.bad_start, self.bad_counted = start, False
+            self.bad_end = end
+            if not self.bad_counted and end - self.bad_start >= self.min_episode_s:
+                self.bad_counted = True
+                self.day_episodes[self._day_of_minute(int(end // 60))] += 1
+        else:
+            self._not_bad(end)
+
+    def _day_of_minute(self, minute):
+        # Consecutive frames almost always fall in the same minute
+        if minute != self._day_minute:
+            self._day_minute, self._day = minute, day_of(minute * 60.0)
+        return self._day
+
+    def _unobserved(self, start, end):
+        self._absent(end)
+        self._not_bad(end)
+
+    def _absent(self, now):
+        if self.sitting_end is not None and now - self.sitting_end >= self.break_s:
+            self.sitting_start = self.sitting_end = None
+
+    def _not_bad(self, now):
+        if self.bad_end is not None and now - self.bad_end >= self.episode_gap_s:
+            self.bad_start = self.bad_end = None
+
+
+class AnalyticsStore:
+    """SQLite posture history. record() is safe from any thread and never blocks.
+
+    Parameters:
+      - path: database file (":memory:" is not supported, the reader needs its own connection)
+      - flush_s: the writer commits at least this often while events arrive
+      - batch_size: ... or as soon as this many events are waiting
+      - max_pending: events beyond this are dropped (counted in `dropped`)
+      - rollup_options: passed to Rollup (max_gap_s, break_s, min_episode_s, episode_gap_s)
+    """
+    def __init__(self, path="posture_analytics.db", flush_s=1.0, batch_size=512, max_pending=100000,
+                 clock=time.time, **rollup_options):
+        self.path = path
+        self.flush_s = flush_s
+        self.batch_size = batch_size
+        self.clock = clock
+        self.rollup = Rollup(**rollup_options)
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.commits = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+        self._thread = threading.Thread(target=self._run, name="analytics", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # --- Ingest (any thread) ---
+    def record(self, status, timestamp=None):
+        """Queue one analysed frame. Returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait((self.clock() if timestamp is None else timestamp, status))
+            self.recorded += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def pause(self):
+        """Detection stopped or paused: the next frame starts a new observation."""
+        self._put_control("pause")
+
+    def flush(self, timeout=5.0):
+        """Wait until everything recorded so far is in the database."""
+        done = threading.Event()
+        self._put_control(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        self._put_control(None)
+        self._thread.join(timeout)
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def _put_control(self, item):
+        # Control messages must not be lost to a full queue; they may wait briefly
+        self._queue.put((None, item))
+
+    # --- Writer thread ---
+    def _run(self):
+        connection = self._connect()
+        pending = 0
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    timestamp, item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    timestamp, item = None, "flush"
+                if timestamp is not None:
+                    self.rollup.add(timestamp, item)
+                    pending += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_s
+                    if pending < self.batch_size:
+                        continue
+                elif item == "pause":
+                    self.rollup.close()
+                elif item is None:
+                    self.rollup.close()
+                    self._write(connection)
+                    return
+                # batch full, flush deadline, flush() request or pause: commit
+                self._write(connection)
+                pending, deadline = 0, None
+                if isinstance(item, threading.Event):
+                    item.set()
+        finally:
+            connection.close()
+
+    def _write(self, connection):
+        minute_seconds, day_seconds, day_episodes, day_longest, segments = self.rollup.take()
+        if not (minute_seconds or day_seconds or day_episodes or day_longest or segments):
+            return
+        with connection:
+            connection.executemany("INSERT INTO segments (start, end, status) VALUES (?, ?, ?)", segments)
+            connection.executemany(
+                "INSERT INTO minute_status (minute, status, seconds) VALUES (?, ?, ?) "
+                "ON CONFLICT (minute, status) DO UPDATE SET seconds = seconds + excluded.seconds",
+                [(minute, status, seconds) for (minute, status), seconds in minute_seconds.items()])
+            connection.executemany(
+                "INSERT INTO day_status (day, status, seconds) VALUES (?, ?, ?) "
+                "ON CONFLICT (day, status) DO UPDATE SET seconds = seconds + excluded.seconds",
+                [(day, status, seconds) for (day, status), seconds in day_seconds.items()])
+            connection.executemany(
+                "INSERT INTO day_stats (day, slouch_episodes) VALUES (?, ?) "
+                "ON CONFLICT (day) DO UPDATE SET slouch_episodes = slouch_episodes + excluded.slouch_episodes",
+                list(day_episodes.items()))
+            connection.executemany(
+                "INSERT INTO day_stats (day, longest_sitting_s) VALUES (?, ?) "
+                "ON CONFLICT (day) DO UPDATE SET longest_sitting_s = MAX(longest_sitting_s, excluded.longest_sitting_s)",
+                list(day_longest.items()))
+        self.written += len(segments)
+        self.commits += 1
+
+    # --- Queries (any thread, read from the rollups) ---
+    def _query(self, sql, args=()):
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = sqlite3.connect(self.path, check_same_thread=False)
+            return self._reader.execute(sql, args).fetchall()
+
+    def day_summary(self, day=None):
+        """Seconds in each status, slouch episodes and longest sitting for one day (default today)."""
+        day = day or day_of(self.clock())
+        seconds = dict(self._query("SELECT status, seconds FROM day_status WHERE day = ?", (day,)))
+        row = self._query("SELECT slouch_episodes, longest_sitting_s FROM day_stats WHERE day = ?", (day,))
+        episodes, longest = row[0] if row else (0, 0.0)
+        return {"day": day, "seconds": seconds, "slouch_episodes": episodes, "longest_sitting_s": longest}
+
+    def daily(self, days=7):
+        """day_summary() for the last `days` days that have data, newest first."""
+        rows = self._query(
+            "SELECT d.day, d.status, d.seconds, s.slouch_episodes, s.longest_sitting_s FROM day_status d "
+            "LEFT JOIN day_stats s ON s.day = d.day "
+            "WHERE d.day IN (SELECT DISTINCT day FROM day_status ORDER BY day DESC LIMIT ?) ORDER BY d.day DESC",
+            (days,))
+        summaries = {}
+        for day, status, seconds, episodes, longest in rows:
+            summary = summaries.setdefault(day, {"day": day, "seconds": {}, "slouch_episodes": episodes or 0,
+                                                 "longest_sitting_s": longest or 0.0})
+            summary["seconds"][status] = seconds
+        return list(summaries.values())
+
+    def minutes(self, start, end):
+        """[(minute start timestamp, {status: seconds})] for minutes between two time.time() timestamps."""
+        rows = self._query("SELECT minute, status, seconds FROM minute_status WHERE minute >= ? AND minute < ? "
+                           "ORDER BY minute", (int(start // 60), int(end // 60) + 1))
+        result = collections.OrderedDict()
+        for minute, status, seconds in rows:
+            result.setdefault(minute * 60.0, {})[status] = seconds
+        return list(result.items())
+
+
+def format_summary(summary):
+    """Text lines for a day_summary() / daily() entry."""
+    seconds = summary["seconds"]
+    observed = sum(seconds.values())
+    if not observed:
+        return ["ยังไม่มีข้อมูล"]
+    sitting = observed - seconds.get(posture_engine.STATUS_NO_PERSON, 0.0)
+    bad = sum(seconds.get(status, 0.0) for status in BAD_STATUSES)
+    lines = [f"นั่งหน้ากล้อง {_hm(sitting)} (นานสุดต่อเนื่อง {_hm(summary['longest_sitting_s'])})",
+             f"ท่าทางไม่ถูกต้อง {_hm(bad)} ({bad / sitting:.0%}) · {summary['slouch_episodes']} ครั้ง" if sitting
+             else f"ท่าทางไม่ถูกต้อง {_hm(bad)} · {summary['slouch_episodes']} ครั้ง"]
+    for status in sorted(seconds):
+        if status != posture_engine.STATUS_NO_PERSON and seconds[status] >= 1.0:
+            lines.append(f"  {posture_engine.STATUS_LABELS_SHORT[status]}: {_hm(seconds[status])}")
+    return lines
+
+
+def _hm(seconds):
+    minutes = int(seconds // 60)
+    return f"{minutes // 60} ชม. {minutes % 60} นาที" if minutes >= 60 else f"{minutes} นาที"
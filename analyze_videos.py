@@ -0,0 +1,210 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+import posture_engine
+import posture_rules
+
+# --- Offline video analysis ---
+# Headless version of detect.py for recorded sessions. Each video is split into chunks of
+# frames, chunks run in a process pool (one MediaPipe Pose instance per worker), and the
+# per-frame landmarks are scored with posture_engine.analyze_batch and the rules in
+# posture_rules.json (or the built-in ones), like the live app.
+#
+# For every input video two files are written to the output directory:
+#   <name>.csv - one row per frame: time, status, angles, bounding box and all 33 landmarks
+#   <name>.npz - the same data as NumPy arrays (landmarks are (N, 33, 4) float32)
+#
+# Usage: python analyze_videos.py session1.mp4 recordings/ -o results/ --workers 4
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+DEFAULT_CHUNK_FRAMES = 900  # 30 seconds at 30 FPS
+
+# Same model settings as detect.py
+POSE_SETTINGS = dict(min_detection_confidence=0.5, min_tracking_confidence=0.5, model_complexity=1)
+
+
+# --- 1. Finding videos and splitting them into chunks ---
+def find_videos(paths):
+    """Expand files and directories into a sorted list of video files."""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(path, name))
+        else:
+            videos.append(path)
+    return videos
+
+
+def video_info(path):
+    """(frame_count, fps, width, height). frame_count is 0 if the container doesn't say."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    try:
+        frame_count = max(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+    return frame_count, fps, width, height
+
+
+def make_chunks(frame_count, chunk_frames):
+    """[(start, end), ...]. With an unknown frame count the whole video is one chunk."""
+    if frame_count <= 0:
+        return [(0, None)]
+    return [(start, min(start + chunk_frames, frame_count)) for start in range(0, frame_count, chunk_frames)]
+
+
+# --- 2. Worker process ---
+_worker_pose = None
+
+
+def _init_worker():
+    """Build one Pose instance per worker process, reused for every chunk it gets."""
+    global _worker_pose
+    import mediapipe as mp
+    cv2.setNumThreads(1)  # the pool already uses every core
+    _worker_pose = mp.solutions.pose.Pose(**POSE_SETTINGS)
+
+
+def process_chunk(path, start, end, mirror=False):
+    """Run Pose over frames [start, end) of a video.
+
+    Returns (start, landmarks, busy_seconds) where landmarks is (n, 33, 4) float32 with
+    all-NaN rows for frames where nobody was detected.
+    """
+    started = time.perf_counter()
+    # Tracking state from the previous chunk belongs to a different part of the video
+    _worker_pose.reset()
+
+    cap = cv2.VideoCapture(path)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    rows = []
+    index = start
+    try:
+        while end is None or index < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if mirror:
+                frame = cv2.flip(frame, 1)
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = _worker_pose.process(image)
+            rows.append(posture_engine.landmarks_to_array(results.pose_landmarks.landmark if results.pose_landmarks else None))
+            index += 1
+    finally:
+        cap.release()
+
+    landmarks = np.stack(rows) if rows else np.empty((0, posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS), dtype=np.float32)
+    return start, landmarks, time.perf_counter() - started
+
+
+# --- 3. Writing results ---
+def score_landmarks(landmarks, fps, width, height, rules=None):
+    """Per-frame analyze_posture results for a whole video as a dict of arrays."""
+    result = posture_engine.analyze_batch(landmarks, width, height, rules=rules)
+    result["time_s"] = np.arange(len(landmarks)) / fps
+    result["landmarks"] = landmarks
+    return result
+
+
+def write_csv(path, result):
+    fields = ("x", "y", "z", "visibility")
+    header = ["frame", "time_s", "status", "status_label", "angle_left_neck", "angle_right_neck",
+              "shoulder_y_diff", "bbox_min_x", "bbox_min_y", "bbox_max_x", "bbox_max_y"]
+    header += [f"lm{i}_{field}" for i in range(posture_engine.LANDMARK_COUNT) for field in fields]
+    flat = result["landmarks"].reshape(len(result["landmarks"]), -1).tolist()
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i, status in enumerate(result["status"].tolist()):
+            writer.writerow([i, f"{result['time_s'][i]:.3f}", status, posture_engine.STATUS_LABELS[status],
+                             f"{result['angle_left_neck'][i]:.2f}", f"{result['angle_right_neck'][i]:.2f}",
+                             f"{result['shoulder_y_diff'][i]:.2f}", *result["bbox"][i].tolist(),
+                             *(f"{v:.5f}" for v in flat[i])])
+
+
+def write_npz(path, result):
+    np.savez_compressed(path, **result)
+
+
+# --- 4. Main ---
+def analyze_videos(videos, output_dir, workers=None, chunk_frames=DEFAULT_CHUNK_FRAMES, mirror=False, rules=None):
+    """Analyze every video and write its CSV/NPZ files. Returns throughput stats."""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    infos = {path: video_info(path) for path in videos}
+
+    started = time.perf_counter()
+    busy_seconds = 0.0
+    total_frames = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {}
+        for path, (frame_count, _, _, _) in infos.items():
+            for start, end in make_chunks(frame_count, chunk_frames):
+                futures[pool.submit(process_chunk, path, start, end, mirror)] = path
+
+        chunks = {path: [] for path in videos}
+        remaining = {path: sum(1 for p in futures.values() if p == path) for path in videos}
+        for future in as_completed(futures):
+            path = futures[future]
+            start, landmarks, busy = future.result()
+            chunks[path].append((start, landmarks))
+            busy_seconds += busy
+            remaining[path] -= 1
+            if remaining[path] == 0:
+                # All chunks of this video are back: stitch them in order and write results
+                frame_count, fps, width, height = infos[path]
+                landmarks = np.concatenate([lm for _, lm in sorted(chunks.pop(path), key=lambda c: c[0])])
+                result = score_landmarks(landmarks, fps, width, height, rules)
+                name = os.path.splitext(os.path.basename(path))[0]
+                write_csv(os.path.join(output_dir, name + ".csv"), result)
+                write_npz(os.path.join(output_dir, name + ".npz"), result)
+                total_frames += len(landmarks)
+                print(f"{path}: {len(landmarks)} frames")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "videos": len(videos),
+        "frames": total_frames,
+        "workers": workers,
+        "seconds": elapsed,
+        "frames_per_sec": total_frames / elapsed if elapsed > 0 else 0.0,
+        "frames_per_sec_per_core": total_frames / busy_seconds if busy_seconds > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze posture in recorded videos without a webcam or window.")
+    parser.add_argument("inputs", nargs="+", help="video files or directories of videos")
+    parser.add_argument("-o", "--output", default="posture_results", help="output directory")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES, help="frames per chunk")
+    parser.add_argument("--mirror", action="store_true", help="flip frames horizontally like the live view")
+    parser.add_argument("--rules", default=posture_rules.RULES_PATH, help="posture rules file (built-in rules if it does not exist)")
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        parser.error("no video files found")
+    stats = analyze_videos(videos, args.output, args.workers, args.chunk_frames, args.mirror,
+                           posture_rules.load_rules_or_defaults(args.rules))
+    print(f"Processed {stats['frames']} frames from {stats['videos']} video(s) in {stats['seconds']:.1f}s "
+          f"with {stats['workers']} workers: {stats['frames_per_sec']:.1f} frames/sec total, "
+          f"{stats['frames_per_sec_per_core']:.1f} frames/sec per core")
+
+
+if __name__ == "__main__":
+    main()
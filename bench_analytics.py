@@ -0,0 +1,124 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+import analytics
+import posture_engine
+
+# --- Analytics store: ingest cost and dashboard query times over months of history ---
+# Generates a synthetic work history (8 h a day at `--hz` frames per second: sitting
+# stretches with breaks, bad posture now and then), feeds it through
+# AnalyticsStore.record() the way the detection loop does, then times the dashboard
+# queries on the rollups against computing the same day summary from the raw segments.
+# Exits with status 1 if the rollup totals don't match the generated history.
+# Usage: python bench_analytics.py [--days 90] [--hz 2]
+
+STATUSES = np.array([posture_engine.STATUS_CORRECT, posture_engine.STATUS_FORWARD_HEAD,
+                     posture_engine.STATUS_LEANING, posture_engine.STATUS_NO_PERSON])
+
+
+def generate_day(rng, day_start, hz):
+    """Timestamps and statuses for one 8 h working day starting at day_start."""
+    count = int(8 * 3600 * hz)
+    timestamps = day_start + np.arange(count) / hz
+    # Status changes every 5-120 s; mostly correct, some slouching, short breaks
+    statuses = np.empty(count, dtype=np.int64)
+    i = 0
+    while i < count:
+        run = int(rng.uniform(5, 120) * hz)
+        statuses[i:i + run] = rng.choice(STATUSES, p=[0.6, 0.2, 0.1, 0.1])
+        i += run
+    return timestamps, statuses
+
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1000.0, result
+
+
+def raw_day_summary(path, day):
+    """The same totals as day_summary(), from the raw segments (what we'd do without rollups)."""
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT start, end, status FROM segments").fetchall()
+    connection.close()
+    seconds = {}
+    for start, end, status in rows:
+        if analytics.day_of(start) == day:
+            seconds[status] = seconds.get(status, 0.0) + end - start
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the posture analytics store.")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--hz", type=float, default=2.0, help="analysed frames per second")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "analytics.db")
+    store = analytics.AnalyticsStore(path)
+    first_day = time.mktime(time.strptime("2024-01-01 09:00", "%Y-%m-%d %H:%M"))
+
+    expected = {}
+    record_times = []
+    events = 0
+    ingest_start = time.perf_counter()
+    for d in range(args.days):
+        timestamps, statuses = generate_day(rng, first_day + d * 86400, args.hz)
+        for timestamp, status in zip(timestamps.tolist(), statuses.tolist()):
+            start = time.perf_counter()
+            store.record(status, timestamp)
+            record_times.append(time.perf_counter() - start)
+        # The last frame of the day counts for no time (detection stops)
+        for status in statuses[:-1].tolist():
+            expected[status] = expected.get(status, 0.0) + 1.0 / args.hz
+        store.pause()
+        store.flush(timeout=600)
+        events += len(timestamps)
+    ingest_s = time.perf_counter() - ingest_start
+
+    p50, p99, worst = np.percentile(np.asarray(record_times) * 1e6, [50, 99, 100])
+    print(f"ingested {events} frames over {args.days} days in {ingest_s:.1f} s ({events / ingest_s:.0f} frames/s), "
+          f"dropped {store.dropped}, {store.commits} commits")
+    # record() runs in a tight loop here, so the worst case includes waiting for the GIL
+    print(f"record() p50 {p50:.1f} us, p99 {p99:.1f} us, worst {worst:.0f} us")
+    print(f"database {os.path.getsize(path) / 1e6:.1f} MB")
+
+    last_day = analytics.day_of(first_day + (args.days - 1) * 86400)
+    last_start = first_day + (args.days - 1) * 86400
+    for name, function in [
+        ("day_summary", lambda: store.day_summary(last_day)),
+        ("daily(30)", lambda: store.daily(30)),
+        ("minutes(8 h)", lambda: store.minutes(last_start, last_start + 8 * 3600)),
+    ]:
+        ms, _ = timed(function)
+        print(f"{name:<24}{ms:>9.2f} ms")
+    ms, raw = timed(lambda: raw_day_summary(path, last_day), repeat=1)
+    print(f"{'raw segment scan':<24}{ms:>9.2f} ms")
+
+    totals = {}
+    for summary in store.daily(args.days):
+        for status, seconds in summary["seconds"].items():
+            totals[status] = totals.get(status, 0.0) + seconds
+    rollup_day = store.day_summary(last_day)["seconds"]
+    ok = all(abs(totals.get(status, 0.0) - seconds) < 1.0 for status, seconds in expected.items())
+    ok = ok and all(abs(rollup_day.get(status, 0.0) - seconds) < 1.0 for status, seconds in raw.items())
+    print("\n".join(analytics.format_summary(store.day_summary(last_day))))
+    store.close()
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    print("ok" if ok else "FAIL: rollup totals don't match")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,32 @@
+import cadence
+import frame_sources
+
+# --- Adaptive cadence evaluation on a synthetic session ---
+# Takes a recorded-looking 30 FPS landmark stream with episodes of correct posture,
+# forward head and leaning (frame_sources.synthetic_fixture), then compares always-on
+# inference with fixed and adaptive keyframe rates. Usage: python bench_cadence.py [minutes]
+
+IMAGE_WIDTH, IMAGE_HEIGHT = 640, 480
+CAMERA_FPS = frame_sources.SESSION_FPS
+
+
+def main(minutes=10.0):
+    frames, timestamps = frame_sources.synthetic_fixture(minutes)
+    configs = [
+        ("always-on", dict(max_rate_hz=None)),
+        ("fixed 5 Hz", dict(min_rate_hz=5.0, max_rate_hz=5.0)),
+        ("fixed 2 Hz", dict(min_rate_hz=2.0, max_rate_hz=2.0)),
+        ("adaptive 2-15 Hz", dict(min_rate_hz=2.0, max_rate_hz=15.0)),
+        ("adaptive 1-10 Hz", dict(min_rate_hz=1.0, max_rate_hz=10.0)),
+    ]
+    print(f"Session: {minutes:g} min, {len(frames)} frames at {CAMERA_FPS:g} FPS")
+    print(f"{'mode':<18}{'infer Hz':>9}{'keyframes':>11}{'agree':>9}{'flips':>7}{'recall':>9}{'delay s':>9}")
+    for name, config in configs:
+        r = cadence.evaluate(frames, timestamps, IMAGE_WIDTH, IMAGE_HEIGHT, **config)
+        print(f"{name:<18}{r['inference_rate_hz']:>9.2f}{r['keyframe_ratio']:>10.1%}{r['frame_agreement']:>9.2%}"
+              f"{r['flips']:>7}{r['flip_recall']:>9.1%}{r['flip_delay_mean']:>9.2f}")
+
+
+if __name__ == "__main__":
+    import sys
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
@@ -0,0 +1,62 @@
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import violation_clips
+
+# --- Violation clip capture cost on the detection thread ---
+# Pushes synthetic 640x480 camera frames at 30 FPS (simulated timestamps, real time
+# measured) into a ClipRecorder with bad posture every few seconds, so clips are
+# triggered, handed off and encoded in the background while the loop keeps going.
+# Reports the push() cost per frame, what was encoded and what LRU eviction removed.
+# Exits with status 1 if push() p99 is 1 ms or more.
+# Usage: python bench_clips.py [--seconds 120] [--jpeg]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark violation clip capture.")
+    parser.add_argument("--seconds", type=float, default=120.0, help="simulated camera time")
+    parser.add_argument("--jpeg", action="store_true", help="write JPEG sequences instead of .mp4")
+    parser.add_argument("--max-mb", type=float, default=0.2, help="disk budget (small, to exercise eviction)")
+    args = parser.parse_args()
+
+    # A smooth background with a moving block: compresses like a webcam picture, unlike noise
+    gradient = np.linspace(40, 200, 640, dtype=np.uint8)[np.newaxis, :, np.newaxis]
+    frames = np.broadcast_to(gradient, (8, 480, 640, 3)).copy()
+    for i in range(len(frames)):
+        frames[i, 150:350, 200 + i * 10:350 + i * 10] = (60, 90, 160)
+    directory = tempfile.mkdtemp()
+    recorder = violation_clips.ClipRecorder(directory, sustain_s=2.0, cooldown_s=10.0, video=not args.jpeg,
+                                            max_bytes=int(args.max_mb * 1024 * 1024))
+    camera_fps = 30.0
+    times = []
+    for i in range(int(args.seconds * camera_fps)):
+        timestamp = i / camera_fps
+        # 6 s of bad posture every 15 s
+        violation = timestamp % 15.0 >= 9.0
+        start = time.perf_counter()
+        recorder.push(frames[i % len(frames)], timestamp, violation, reason="forward_head")
+        times.append(time.perf_counter() - start)
+        # Roughly the spacing of a real loop, so the encoder gets CPU time in between
+        time.sleep(0.001)
+    recorder.close()
+
+    times = np.asarray(times) * 1000.0
+    p50, p99, worst = np.percentile(times, [50, 99, 100])
+    clips = recorder.clips()
+    print(f"push() over {len(times)} frames: p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {worst:.3f} ms")
+    print(recorder.format_stats())
+    print(f"{len(clips)} clips kept, {sum(size for _, size, _ in clips) / 1024:.0f} KB "
+          f"(budget {args.max_mb * 1024:.0f} KB)")
+    shutil.rmtree(directory)
+    ok = p99 < 1.0 and recorder.saved > 0 and recorder.errors == 0
+    print("ok" if ok else "FAIL")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,238 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+import bench_posture
+import multi_person
+import posture_engine
+
+# --- Multi-person mode: cost against the number of people, and ID stability ---
+# Replays a multi-person landmark fixture (recorded with `multi_person.py record`, or
+# generated here: people seated side by side, swaying, plus someone walking across the
+# room halfway through) through MultiPersonMonitor. Everything but the two models is the
+# real code path: ROI crops (resize + color conversion), the Pose thread pool, mapping
+# back to full-frame coordinates, batched scoring, tracking and timers.
+# The models are stand-ins that return the fixture's landmarks:
+#   - the detector returns the boxes of the people in the fixture frame
+#   - each Pose instance returns the person in its ROI (staying on the same one, like Pose's
+#     own tracking)
+# after doing --detect-ms / --pose-ms worth of single-core CPU work (cv2 filtering,
+# calibrated at startup). Like MediaPipe's graph, cv2 releases the GIL, so the stand-ins
+# compete for cores the way real Pose runs do: CPU time per frame grows linearly with the
+# number of people, and the wall time only less so when there are idle cores.
+# Reports process() wall and CPU time per frame, CPU time per person, the part of it that
+# isn't the stand-ins (tracking, crops, mapping, scoring), ID switches and agreement with
+# scoring the fixture directly.
+# Exits with status 1 on ID switches among the seated people, a status disagreement, or if
+# the overhead is MAX_OVERHEAD_MS per person or more.
+# Usage: python bench_multi_person.py [--people 1 2 4 6 8] [--fixture people.npz]
+
+IMAGE_SIZE = (1280, 720)
+FPS = 30.0
+MAX_OVERHEAD_MS = 5.0
+
+
+def make_fixture(people, seconds, walker=True, seed=0):
+    """Seated people evenly spaced across the frame; optionally one walking past behind them."""
+    rng = np.random.default_rng(seed)
+    base = bench_posture.make_frames(1)[0]
+    base[:, :2] -= 0.5  # pose centered on (0, 0)
+    slots = people + (1 if walker else 0)
+    count = int(seconds * FPS)
+    times = np.arange(count) / FPS
+    landmarks = np.full((count, slots, posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS), np.nan,
+                        dtype=np.float32)
+    ids = np.full((count, slots), -1, dtype=np.int32)
+    scale = min(0.9 / people, 0.45)
+    for p in range(people):
+        center_x = (p + 0.5) / people
+        phase = rng.uniform(0, 2 * np.pi)
+        sway = 0.01 * np.sin(2 * np.pi * times / 7.0 + phase)
+        # Leaning forward now and then, so statuses change
+        lean = 0.03 * np.clip(np.sin(2 * np.pi * times / 11.0 + phase), 0, None)
+        landmarks[:, p] = base
+        landmarks[:, p, :, 0] = base[:, 0] * scale + center_x + sway[:, np.newaxis]
+        landmarks[:, p, :, 1] = base[:, 1] * scale * IMAGE_SIZE[0] / IMAGE_SIZE[1] * 0.6 + 0.55
+        landmarks[:, p, posture_engine.NOSE, 1] += lean
+        ids[:, p] = p
+    if walker:
+        # Smaller (further away), crossing from left to right during the middle third
+        start, end = count // 3, 2 * count // 3
+        x = np.linspace(-0.1, 1.1, end - start)
+        landmarks[start:end, people] = base
+        landmarks[start:end, people, :, 0] = base[:, 0] * scale * 0.6 + x[:, np.newaxis]
+        landmarks[start:end, people, :, 1] = base[:, 1] * scale * 0.6 * IMAGE_SIZE[0] / IMAGE_SIZE[1] * 0.6 + 0.35
+        ids[start:end, people] = people
+    return landmarks, ids, times, IMAGE_SIZE
+
+
+class CpuWork:
+    """About `ms` of single-core CPU time in cv2 calls (which release the GIL, like MediaPipe)."""
+    def __init__(self, ms, size=256):
+        self.image = np.random.default_rng(0).integers(0, 256, (size, size, 3), dtype=np.uint8)
+        self.iterations = 0
+        self.spent = []  # CPU seconds of every call (list.append is atomic across the Pose threads)
+        if ms > 0:
+            start = time.thread_time()
+            for _ in range(50):
+                self._step()
+            self.iterations = max(1, round(ms / ((time.thread_time() - start) * 1000.0 / 50)))
+
+    def _step(self):
+        cv2.GaussianBlur(self.image, (0, 0), 2.0)
+
+    def __call__(self):
+        start = time.thread_time()
+        for _ in range(self.iterations):
+            self._step()
+        self.spent.append(time.thread_time() - start)
+
+
+class FixtureDetector:
+    def __init__(self, landmarks, image_size, detect_ms):
+        self.landmarks = landmarks
+        self.image_size = image_size
+        self.work = CpuWork(detect_ms)
+        self.frame_index = 0
+
+    def __call__(self, frame_bgr):
+        self.work()
+        boxes = []
+        for person in self.landmarks[self.frame_index]:
+            if np.isfinite(person[:, 0]).any():
+                boxes.append(multi_person.upper_body_box(person[multi_person.UPPER_BODY, :2] * self.image_size))
+        return np.array(boxes).reshape(-1, 4)
+
+
+class FixturePose:
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FixtureMonitor(multi_person.MultiPersonMonitor):
+    """MultiPersonMonitor with Pose replaced by a fixture lookup (see the module comment)."""
+    def __init__(self, fixture, pose_ms, detect_ms, **options):
+        self.fixture_landmarks, self.fixture_ids, _, self.image_size = fixture
+        self.work = CpuWork(pose_ms)
+        self.frame_index = 0
+        self.assigned = {}  # track id -> fixture person id
+        super().__init__(FixturePose, FixtureDetector(self.fixture_landmarks, self.image_size, detect_ms), **options)
+
+    def run_pose(self, track, image_rgb):
+        self.work()
+        x0, y0, x1, y1 = track.roi
+        width, height = self.image_size
+        people = self.fixture_landmarks[self.frame_index]
+        noses = people[:, posture_engine.NOSE, :2] * (width, height)
+        inside = (noses[:, 0] >= x0) & (noses[:, 0] < x1) & (noses[:, 1] >= y0) & (noses[:, 1] < y1)
+        if not inside.any():
+            return None
+        ids = self.fixture_ids[self.frame_index]
+        previous = self.assigned.get(track.id)
+        matches = np.flatnonzero(inside & (ids == previous)) if previous is not None else []
+        if len(matches):
+            slot = matches[0]
+        else:
+            center = np.array([(x0 + x1) * 0.5, (y0 + y1) * 0.5])
+            candidates = np.flatnonzero(inside)
+            slot = candidates[np.argmin(np.hypot(*(noses[candidates] - center).T))]
+        self.assigned[track.id] = int(ids[slot])
+        frame = people[slot].copy()
+        frame[:, 0] = (frame[:, 0] * width - x0) / (x1 - x0)
+        frame[:, 1] = (frame[:, 1] * height - y0) / (y1 - y0)
+        frame[:, 2] *= width / (x1 - x0)
+        return frame
+
+
+def run(fixture, pose_ms, detect_ms, max_people):
+    landmarks, ids, times, image_size = fixture
+    monitor = FixtureMonitor(fixture, pose_ms, detect_ms, max_people=max_people)
+    gradient = np.linspace(40, 200, image_size[0], dtype=np.uint8)[np.newaxis, :, np.newaxis]
+    image = np.ascontiguousarray(np.broadcast_to(gradient, (image_size[1], image_size[0], 3)))
+    samples = []
+    cpu_samples = []
+    person_frames = 0
+    track_of = {}      # fixture person -> last track id
+    switches = {}      # fixture person -> ID switches
+    agree = total = 0
+    for i, timestamp in enumerate(times):
+        monitor.frame_index = monitor.detector.frame_index = i
+        start, cpu_start = time.perf_counter(), time.process_time()
+        tracks = monitor.process(image, timestamp)
+        samples.append(time.perf_counter() - start)
+        cpu_samples.append(time.process_time() - cpu_start)
+        person_frames += len(tracks)
+        expected = posture_engine.analyze_batch(landmarks[i], *image_size)["status"]
+        for track in tracks:
+            person = monitor.assigned.get(track.id)
+            if not track.found or person is None:
+                continue
+            if person in track_of and track_of[person] != track.id:
+                switches[person] = switches.get(person, 0) + 1
+            track_of[person] = track.id
+            slot = int(np.flatnonzero(ids[i] == person)[0])
+            agree += track.status == expected[slot]
+            total += 1
+    monitor.close()
+    samples = np.asarray(samples) * 1000.0
+    cpu_ms = float(np.sum(cpu_samples)) * 1000.0
+    stand_in_ms = (sum(monitor.work.spent) + sum(monitor.detector.work.spent)) * 1000.0
+    return {
+        "p50": float(np.percentile(samples, 50)),
+        "p99": float(np.percentile(samples, 99)),
+        "cpu": cpu_ms / len(samples),
+        "cpu_per_person": cpu_ms / max(person_frames, 1),
+        "overhead_per_person": (cpu_ms - stand_in_ms) / max(person_frames, 1),
+        "switches": switches,
+        "agreement": agree / total if total else 0.0,
+        "tracks": monitor.pool.built,
+        "stats": monitor.format_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-person mode.")
+    parser.add_argument("--people", type=int, nargs="+", default=[1, 2, 4, 6, 8])
+    parser.add_argument("--fixture", help="recorded fixture (multi_person.py record) instead of generated ones")
+    parser.add_argument("--seconds", type=float, default=6.0, help="length of the generated fixtures")
+    parser.add_argument("--pose-ms", type=float, default=12.0, help="stand-in Pose CPU time per ROI")
+    parser.add_argument("--detect-ms", type=float, default=4.0, help="stand-in detector CPU time per run")
+    args = parser.parse_args()
+    cv2.setNumThreads(1)  # one core per stand-in call; parallelism only comes from the Pose threads
+
+    if args.fixture:
+        fixtures = [(args.fixture, multi_person.load_fixture(args.fixture))]
+    else:
+        fixtures = [(f"{people} seated + walker", make_fixture(people, args.seconds)) for people in args.people]
+    print(f"{os.cpu_count()} cores; stand-in CPU work: Pose {args.pose_ms:.0f} ms per person, "
+          f"detector {args.detect_ms:.0f} ms per run")
+    print(f"{'fixture':<20} {'wall p50':>9} {'p99':>8} {'vs 1 person':>11} {'CPU/frame':>10} {'CPU/person':>10}"
+          f" {'overhead':>9}  ID switches  status agreement")
+    baseline = None
+    ok = True
+    for name, fixture in fixtures:
+        people = fixture[1].shape[1]
+        result = run(fixture, args.pose_ms, args.detect_ms, max_people=people)
+        baseline = baseline or result["p50"]
+        print(f"{name:<20} {result['p50']:>6.1f} ms {result['p99']:>5.1f} ms {result['p50'] / baseline:>10.2f}x "
+              f"{result['cpu']:>7.1f} ms {result['cpu_per_person']:>7.1f} ms {result['overhead_per_person']:>6.1f} ms"
+              f"  {sum(result['switches'].values()):>11}"
+              f"  {result['agreement']:>16.1%}")
+        print(f"  {result['stats']}")
+        ok &= result["agreement"] == 1.0 and result["overhead_per_person"] < MAX_OVERHEAD_MS
+        if not args.fixture:
+            seated = people - 1  # the last slot is the walker
+            ok &= not any(result["switches"].get(person) for person in range(seated))
+    print("ok" if ok else "FAIL")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if main() else 1)
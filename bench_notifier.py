@@ -0,0 +1,55 @@
+import time
+
+import notifier
+
+# --- Notification dispatcher check with a local stand-in backend ---
+# Runs a few scenarios against notifier.RecordingBackend (optionally slow or failing) and
+# prints what was delivered, how long notify() blocked the caller and the dispatcher
+# counters. Exits with status 1 if a scenario doesn't behave as expected.
+# Usage: python bench_notifier.py
+
+
+def run(name, requests, backend, expect_delivered, rate_limits=None, coalesce_s=0.2, gap_s=0.0):
+    dispatcher = notifier.NotificationDispatcher([backend], rate_limits=rate_limits, coalesce_s=coalesce_s)
+    worst_call = 0.0
+    for title, message, category in requests:
+        start = time.perf_counter()
+        dispatcher.notify(title, message, category)
+        worst_call = max(worst_call, time.perf_counter() - start)
+        if gap_s:
+            time.sleep(gap_s)
+    # Let the worker finish the last burst
+    time.sleep(coalesce_s + 0.1 + backend.delay * len(requests))
+    dispatcher.close()
+    s = dispatcher.stats()
+    ok = len(backend.delivered) == expect_delivered
+    print(f"{name:<24}{len(requests):>9}{len(backend.delivered):>11}{s['coalesced']:>11}{s['rate_limited']:>9}"
+          f"{s['failed']:>8}{worst_call * 1000.0:>11.3f}{s['latency_ms_p95']:>11.0f}  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    reminder = ("พักสายตา", "พักสายตาสักครู่", "reminder")
+    posture = ("ปรับท่านั่ง", "ท่าทางไม่ถูกต้อง", "posture")
+    print(f"{'scenario':<24}{'requests':>9}{'delivered':>11}{'coalesced':>11}{'limited':>9}"
+          f"{'failed':>8}{'notify ms':>11}{'p95 ms':>11}")
+    results = [
+        run("single", [reminder], notifier.RecordingBackend(), 1),
+        # 10 identical requests in a burst -> 1 delivery
+        run("duplicate burst", [reminder] * 10, notifier.RecordingBackend(), 1),
+        # different notifications at the same moment -> merged into 1
+        run("mixed burst", [reminder, posture, ("ได้เวลาขยับ", "ลุกเดิน", "reminder")],
+            notifier.RecordingBackend(), 1),
+        # posture alerts 0.3 s apart with a 1 s limit -> 2 of 5 get through
+        run("rate limited", [posture] * 5, notifier.RecordingBackend(), 2,
+            rate_limits={"posture": 1.0}, coalesce_s=0.05, gap_s=0.3),
+        # a backend that takes 0.5 s must not block notify()
+        run("slow backend", [reminder], notifier.RecordingBackend(delay=0.5), 1),
+        run("failing backend", [reminder], notifier.RecordingBackend(fail=True), 0),
+    ]
+    return all(results)
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,114 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import posture_engine as pe
+
+# --- Microbenchmark: old per-frame analyze_posture vs. posture_engine ---
+# Runs without a webcam or MediaPipe. Landmarks are synthetic: a seated upper body
+# with random jitter, so the mix of statuses is similar to a real session.
+# Usage: python bench_posture.py [n_frames]
+
+IMAGE_WIDTH, IMAGE_HEIGHT = 640, 480
+
+
+# --- 1. The original per-frame path (copied from detect.py before the engine) ---
+def legacy_calculate_angle(a, b, c):
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+    ba = a - b
+    bc = c - b
+    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
+    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
+    return np.degrees(np.arccos(cosine_angle))
+
+
+def legacy_analyze_posture(landmarks, image_width, image_height):
+    left_shoulder = [landmarks[pe.LEFT_SHOULDER].x * image_width, landmarks[pe.LEFT_SHOULDER].y * image_height]
+    right_shoulder = [landmarks[pe.RIGHT_SHOULDER].x * image_width, landmarks[pe.RIGHT_SHOULDER].y * image_height]
+    left_ear = [landmarks[pe.LEFT_EAR].x * image_width, landmarks[pe.LEFT_EAR].y * image_height]
+    right_ear = [landmarks[pe.RIGHT_EAR].x * image_width, landmarks[pe.RIGHT_EAR].y * image_height]
+    nose = [landmarks[pe.NOSE].x * image_width, landmarks[pe.NOSE].y * image_height]
+
+    angle_left_neck = legacy_calculate_angle(left_shoulder, left_ear, nose)
+    angle_right_neck = legacy_calculate_angle(right_shoulder, right_ear, nose)
+    if angle_left_neck < pe.THRESHOLD_NECK_FORWARD or angle_right_neck < pe.THRESHOLD_NECK_FORWARD:
+        status = pe.STATUS_FORWARD_HEAD
+    elif abs(left_shoulder[1] - right_shoulder[1]) > pe.THRESHOLD_SHOULDER_ASYMMETRY:
+        status = pe.STATUS_LEANING
+    else:
+        status = pe.STATUS_CORRECT
+
+    # Bounding box exactly as the old detect.py loop built it
+    x_coords = [landmark.x * image_width for landmark in landmarks]
+    y_coords = [landmark.y * image_height for landmark in landmarks]
+    bbox = (int(min(x_coords)) - 10, int(min(y_coords)) - 10, int(max(x_coords)) + 10, int(max(y_coords)) + 10)
+    return status, bbox
+
+
+# --- 2. Synthetic landmarks ---
+def make_frames(n_frames, seed=0):
+    """(n_frames, 33, 4) float32 array of jittered seated poses."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.3, 0.7, size=(pe.LANDMARK_COUNT, pe.LANDMARK_FIELDS)).astype(np.float32)
+    base[pe.NOSE, :2] = (0.50, 0.30)
+    base[pe.LEFT_EAR, :2] = (0.56, 0.30)
+    base[pe.RIGHT_EAR, :2] = (0.44, 0.30)
+    base[pe.LEFT_SHOULDER, :2] = (0.68, 0.55)
+    base[pe.RIGHT_SHOULDER, :2] = (0.32, 0.55)
+    base[:, 3] = 0.99
+    frames = base + rng.normal(0, 0.02, size=(n_frames,) + base.shape).astype(np.float32)
+    return frames
+
+
+def to_landmark_objects(frame):
+    return [SimpleNamespace(x=float(r[0]), y=float(r[1]), z=float(r[2]), visibility=float(r[3])) for r in frame]
+
+
+def fps(n_frames, seconds):
+    return n_frames / seconds if seconds > 0 else float("inf")
+
+
+def main(n_frames=20000):
+    frames = make_frames(n_frames)
+    objects = [to_landmark_objects(f) for f in frames]
+    engine = pe.PostureEngine()
+
+    start = time.perf_counter()
+    legacy = [legacy_analyze_posture(lms, IMAGE_WIDTH, IMAGE_HEIGHT) for lms in objects]
+    legacy_time = time.perf_counter() - start
+
+    # Fast path fed straight from MediaPipe-style landmark objects (includes the copy)
+    start = time.perf_counter()
+    for lms in objects:
+        engine.analyze_landmarks(lms, IMAGE_WIDTH, IMAGE_HEIGHT)
+    objects_time = time.perf_counter() - start
+
+    # Fast path on landmarks that are already in an array
+    start = time.perf_counter()
+    single = np.empty(n_frames, dtype=np.int8)
+    for i in range(n_frames):
+        single[i] = engine.analyze(frames[i], IMAGE_WIDTH, IMAGE_HEIGHT)
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = pe.analyze_batch(frames, IMAGE_WIDTH, IMAGE_HEIGHT)
+    batch_time = time.perf_counter() - start
+
+    legacy_status = np.array([s for s, _ in legacy], dtype=np.int8)
+    legacy_bbox = np.array([b for _, b in legacy], dtype=np.int32)
+    print(f"Frames: {n_frames}")
+    print(f"Legacy analyze_posture:      {fps(n_frames, legacy_time):>14,.0f} frames/sec")
+    print(f"Engine (landmark objects):   {fps(n_frames, objects_time):>14,.0f} frames/sec")
+    print(f"Engine single-frame (array): {fps(n_frames, single_time):>14,.0f} frames/sec")
+    print(f"Engine batch:                {fps(n_frames, batch_time):>14,.0f} frames/sec")
+    print(f"Status agreement with legacy: single {np.mean(single == legacy_status):.2%}, "
+          f"batch {np.mean(batch['status'] == legacy_status):.2%}")
+    print(f"BBox agreement with legacy: {np.mean((batch['bbox'] == legacy_bbox).all(axis=1)):.2%}")
+
+
+if __name__ == "__main__":
+    import sys
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,108 @@
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# --- ui.py startup benchmark ---
+# Each run is a fresh interpreter (imports are what we're measuring) that:
+#   1. imports ui and creates App                -> "import_s", "window_s"
+#   2. pumps the Tk loop until the window is drawn -> "first_paint_s"
+#   3. waits for the background model warm-up     -> "model_ready_s"
+#   4. clicks Start Detection on a synthetic camera and waits for the first
+#      displayed frame                             -> "first_detection_s" (from the click)
+#   5. switches to Home and back to Detect, and waits for the next displayed frame
+#                                                  -> "resume_s" (from switching back)
+# All times are seconds since the interpreter started running this script.
+# Needs a display (use xvfb-run on a headless machine).
+# Usage: python bench_startup.py --runs 5 [--no-dummy-frame] [-o startup.json]
+
+
+def measure(dummy_frame=True, timeout=120.0):
+    """One startup in this process. Returns a dict of timings."""
+    times = {}
+    import ui
+    ui.WARM_UP_WITH_DUMMY_FRAME = dummy_frame
+    times["import_s"] = time.perf_counter() - STARTED
+    app = ui.App()
+    times["window_s"] = time.perf_counter() - STARTED
+
+    deadline = time.monotonic() + timeout
+    while "first_paint" not in app.startup_times and time.monotonic() < deadline:
+        app.update()
+    times["first_paint_s"] = app.startup_times["first_paint"] - STARTED
+
+    while not app.model_ready.is_set() and app.model_error is None and time.monotonic() < deadline:
+        app.update()
+        time.sleep(0.005)
+    if app.model_error is not None:
+        raise RuntimeError(f"model failed to load: {app.model_error}")
+    times["model_ready_s"] = app.startup_times["model_ready"] - STARTED
+
+    import frame_sources
+    source = frame_sources.SyntheticSource(640, 480, frames=None, realtime=True)
+    app.open_capture = lambda: source
+    app.select_frame_by_name("detect")
+    clicked = time.perf_counter()
+    app.start_detection_thread()
+    while time.monotonic() < deadline:
+        app.update()
+        frame_pipeline = app.detection_pipeline
+        if frame_pipeline is not None and frame_pipeline.latency_samples:
+            break
+        time.sleep(0.001)
+    times["first_detection_s"] = time.perf_counter() - clicked
+
+    app.select_frame_by_name("home")
+    paused_until = time.monotonic() + 0.5
+    while time.monotonic() < paused_until:
+        app.update()
+        time.sleep(0.005)
+    shown = len(frame_pipeline.latency_samples)
+    switched = time.perf_counter()
+    app.select_frame_by_name("detect")
+    while len(frame_pipeline.latency_samples) == shown and time.monotonic() < deadline:
+        app.update()
+        time.sleep(0.001)
+    times["resume_s"] = time.perf_counter() - switched
+    app.on_closing()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ui.py cold start (JSON output).")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--no-dummy-frame", action="store_true", help="skip the warm-up inference")
+    parser.add_argument("-o", "--output", help="write the JSON here as well as to stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(dummy_frame=not args.no_dummy_frame)))
+        return
+
+    command = [sys.executable, __file__, "--child"] + (["--no-dummy-frame"] if args.no_dummy_frame else [])
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        # ui.py may print to stdout as well; the timings are the last line
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    result = {
+        "runs": args.runs,
+        "dummy_frame": not args.no_dummy_frame,
+        "median": {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]},
+        "all": runs,
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import contextlib
+import json
+import math
+import platform
+import sys
+import time
+
+import numpy as np
+
+import exercise
+import frame_sources
+import posture_engine
+
+# --- Reproducible benchmark suite ---
+# Runs without a webcam and prints one JSON object for regression tracking.
+# Targets:
+#   analyze - posture_engine on landmark fixtures (no MediaPipe needed)
+#   detect  - detect.main() headless
+#   ui      - App.detection_loop with the window hidden (needs a display, e.g. xvfb-run)
+#   exercise - exercise.ExerciseSession on a generated 30 FPS neck stretch session; reports
+#             the per-frame cost at the start and the end (it should not grow) and the reps
+# Frame source: --video replays a file (at its real FPS with --realtime, otherwise max speed);
+# without it a synthetic 640x480 source is used. --fixture replays recorded landmarks instead
+# of running MediaPipe Pose (.npz written by analyze_videos.py); --synthetic-fixture generates some.
+#
+# Usage: python bench_suite.py detect --video session.mp4 --realtime --frames 600 -o detect.json
+
+IMAGE_WIDTH, IMAGE_HEIGHT = 640, 480
+
+
+def percentiles_ms(samples):
+    if not len(samples):
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+            "mean": round(float(values.mean()), 3)}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where the platform can't tell)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def make_source(args):
+    if args.video:
+        return frame_sources.VideoFileSource(args.video, realtime=args.realtime, max_frames=args.frames)
+    return frame_sources.SyntheticSource(IMAGE_WIDTH, IMAGE_HEIGHT, frames=args.frames, realtime=args.realtime)
+
+
+def load_fixture(args):
+    if args.fixture:
+        return frame_sources.load_landmark_fixture(args.fixture)
+    if args.synthetic_fixture or args.target == "analyze":
+        return frame_sources.synthetic_fixture(max(args.frames / 1800.0, 0.1))
+    return None
+
+
+# --- Targets ---
+def bench_analyze(args, fixture):
+    landmarks, _ = fixture
+    landmarks = landmarks[:args.frames]
+    engine = posture_engine.PostureEngine()
+    samples = np.empty(len(landmarks))
+    start = time.perf_counter()
+    for i, frame in enumerate(landmarks):
+        t = time.perf_counter()
+        engine.analyze(frame, IMAGE_WIDTH, IMAGE_HEIGHT)
+        samples[i] = time.perf_counter() - t
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    posture_engine.analyze_batch(landmarks, IMAGE_WIDTH, IMAGE_HEIGHT)
+    batch_seconds = time.perf_counter() - start
+    return {
+        "frames": len(landmarks),
+        "seconds": single_seconds,
+        "fps": len(landmarks) / single_seconds if single_seconds > 0 else None,
+        "batch_fps": len(landmarks) / batch_seconds if batch_seconds > 0 else None,
+        "latency_ms": percentiles_ms(samples),
+    }
+
+
+def bench_exercise(args, fixture):
+    # Neck stretch: 6 s upright, then ears tilted 25 degrees for 12 s, with a little jitter
+    fps, hold_s, rest_s, tilt = 30.0, 12.0, 6.0, math.radians(25.0)
+    rng = np.random.default_rng(0)
+    base = frame_sources.synthetic_fixture(0.1)[0][0].copy()
+    middle = (base[posture_engine.LEFT_EAR, :2] + base[posture_engine.RIGHT_EAR, :2]) * 0.5
+    half_width = abs(base[posture_engine.LEFT_EAR, 0] - base[posture_engine.RIGHT_EAR, 0]) * 0.5
+    frame = base.copy()
+    session = exercise.ExerciseSession("neck_stretch", reps=10 ** 9)
+    samples = np.empty(args.frames)
+    start = time.perf_counter()
+    for i in range(args.frames):
+        t = i / fps
+        angle = tilt if t % (hold_s + rest_s) >= rest_s else 0.0
+        angle += rng.normal(0.0, 0.01)
+        offset = half_width * np.array([math.cos(angle), math.sin(angle) * IMAGE_WIDTH / IMAGE_HEIGHT])
+        frame[posture_engine.LEFT_EAR, :2] = middle + offset
+        frame[posture_engine.RIGHT_EAR, :2] = middle - offset
+        s = time.perf_counter()
+        session.update(frame, t, IMAGE_WIDTH, IMAGE_HEIGHT)
+        samples[i] = time.perf_counter() - s
+    seconds = time.perf_counter() - start
+    quarter = max(len(samples) // 4, 1)
+    duration = args.frames / fps
+    # A rep counts when the head comes back up, at the end of each cycle
+    expected = int(duration // (hold_s + rest_s))
+    return {
+        "frames": args.frames,
+        "seconds": seconds,
+        "session_s": duration,
+        "reps": session.reps,
+        "expected_reps": expected,
+        "latency_ms": percentiles_ms(samples),
+        "first_quarter_latency_ms": percentiles_ms(samples[:quarter]),
+        "last_quarter_latency_ms": percentiles_ms(samples[-quarter:]),
+    }
+
+
+def bench_detect(args, fixture):
+    import detect
+    pose_builder = detect.build_pose
+    if fixture is not None:
+        fixture_pose = frame_sources.FixturePose(fixture[0])
+        pose_builder = lambda model_complexity: fixture_pose
+        detect.roi_tracker.enabled = False
+
+    start = time.perf_counter()
+    frame_pipeline = detect.main(cap=make_source(args), show=False, pose_builder=pose_builder, max_frames=args.frames)
+    seconds = time.perf_counter() - start
+    return pipeline_result(frame_pipeline, seconds)
+
+
+def bench_ui(args, fixture):
+    import ui
+    app = ui.App()
+    app.withdraw()
+    if fixture is not None:
+        # The model is built by the warm-up thread, which starts on the first update()
+        fixture_pose = frame_sources.FixturePose(fixture[0])
+        app.build_pose = lambda model_complexity=1: fixture_pose
+        app.roi_tracker.enabled = False
+    source = make_source(args)
+    app.open_capture = lambda: source
+    while not app.model_ready.is_set():
+        if app.model_error is not None:
+            raise RuntimeError(f"model failed to load: {app.model_error}")
+        app.update()
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    app.start_detection_thread()
+    # Pump the Tk event loop here instead of mainloop() so we can stop after N frames
+    while app.detection_thread.is_alive():
+        app.update()
+        frame_pipeline = app.detection_pipeline
+        if frame_pipeline is not None and len(frame_pipeline.latency_samples) >= args.frames:
+            break
+        time.sleep(0.001)
+    app.update()
+    seconds = time.perf_counter() - start
+    frame_pipeline = app.detection_pipeline
+    app.on_closing()
+    return pipeline_result(frame_pipeline, seconds)
+
+
+def pipeline_result(frame_pipeline, seconds):
+    if frame_pipeline is None:
+        raise RuntimeError("frame source could not be opened")
+    frames = len(frame_pipeline.latency_samples)
+    return {
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds > 0 else None,
+        "latency_ms": percentiles_ms(frame_pipeline.latency_samples),
+        "pipeline": frame_pipeline.stats(),
+    }
+
+
+TARGETS = {"analyze": bench_analyze, "detect": bench_detect, "ui": bench_ui, "exercise": bench_exercise}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless posture monitor benchmarks (JSON output).")
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--video", help="video file to replay instead of the synthetic source")
+    parser.add_argument("--realtime", action="store_true", help="pace frames at the source FPS")
+    parser.add_argument("--fixture", help="landmark fixture (.npz) to replay instead of running Pose")
+    parser.add_argument("--synthetic-fixture", action="store_true", help="generate a landmark fixture")
+    parser.add_argument("--frames", type=int, default=300, help="frames to measure")
+    parser.add_argument("-o", "--output", help="write the JSON here as well as to stdout")
+    args = parser.parse_args()
+
+    fixture = load_fixture(args)
+    result = {
+        "target": args.target,
+        "source": args.video or "synthetic",
+        "realtime": args.realtime,
+        "fixture": args.fixture or ("synthetic" if fixture is not None else None),
+    }
+    # Keep stdout clean for the JSON: progress prints from detect.py / ui.py go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        result.update(TARGETS[args.target](args, fixture))
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["python"] = platform.python_version()
+    result["platform"] = platform.platform()
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
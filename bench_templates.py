@@ -0,0 +1,110 @@
+import argparse
+import time
+
+import numpy as np
+
+import bench_posture
+import exercise_templates as et
+
+# --- Exercise template matching throughput against the number of templates ---
+# Generates movement families (a few keypoints moving on smooth random paths for 6 s),
+# one template per family, then streams a time-warped, noisy copy of a random family
+# through TemplateMatcher at 30 FPS and matches once per hop, as the Exercise page does.
+# Reports the time per match and how much work the lower bounds / early abandoning saved,
+# and checks every answer against banded DTW over all templates without pruning.
+# Exits with status 1 on a wrong answer or if a 64-template match takes 20 ms or more.
+# Usage: python bench_templates.py [--counts 1 4 16 64 256] [--queries 50]
+
+DURATION_S = 6.0
+CAMERA_FPS = 30.0
+MOVING_POINTS = et.FEATURE_POINTS[[0, 1, 2, 5, 6, 7, 8]]  # not the shoulders (the reference frame)
+
+
+def movement(rng):
+    """A function t -> (len(MOVING_POINTS), 2) offsets in normalized image units."""
+    amplitude = rng.uniform(0.0, 0.06, size=(len(MOVING_POINTS), 2, 2))
+    frequency = rng.uniform(0.1, 0.5, size=(len(MOVING_POINTS), 2, 2))
+    phase = rng.uniform(0.0, 2 * np.pi, size=(len(MOVING_POINTS), 2, 2))
+    return lambda t: (amplitude * np.sin(2 * np.pi * frequency * t + phase)).sum(axis=-1)
+
+
+def render(base, motion, times, rng=None, noise=0.0):
+    frames = np.repeat(base[np.newaxis], len(times), axis=0)
+    for i, t in enumerate(times):
+        frames[i, MOVING_POINTS, :2] += motion(t)
+    if rng is not None and noise:
+        frames[:, :, :2] += rng.normal(0.0, noise, size=frames[:, :, :2].shape).astype(np.float32)
+    return frames
+
+
+def make_library(count, base, rng):
+    library = et.TemplateLibrary.empty()
+    motions = []
+    times = np.arange(0.0, DURATION_S, 1 / 15.0)
+    for i in range(count):
+        motion = movement(rng)
+        motions.append(motion)
+        library.add(f"template {i}", "synthetic", times, render(base, motion, times), 640, 480)
+    return library, motions
+
+
+def run(count, queries, rng, base):
+    library, motions = make_library(count, base, rng)
+    matcher = et.TemplateMatcher(library, window_s=DURATION_S, hop_s=0.5, capacity=256)
+    full_rows = 0
+    wrong = 0
+    match_times = []
+    t = 0.0
+    for _ in range(queries):
+        target = int(rng.integers(count))
+        # Slightly faster or slower, with a wobble in the timing, plus landmark jitter
+        speed = rng.uniform(0.9, 1.1)
+        times = t + np.arange(0.0, DURATION_S, 1 / CAMERA_FPS)
+        warped = (times - t) * speed + 0.15 * np.sin(2 * np.pi * (times - t) / DURATION_S)
+        frames = render(base, motions[target], warped, rng, noise=0.002)
+        for frame, timestamp in zip(frames, times):
+            matcher.push(frame, timestamp, 640, 480)
+        t = times[-1]
+        start = time.perf_counter()
+        result = matcher.match(t)
+        match_times.append(time.perf_counter() - start)
+        # Reference answer: every template, no pruning
+        distances, rows = et.banded_dtw(matcher.window(t), library.features, library.band)
+        full_rows += rows
+        if result is None or result.index != int(np.argmin(distances)) or \
+                not np.isclose(result.distance, np.sqrt(distances.min() / library.length)):
+            wrong += 1
+        t += 1.0
+    match_times = np.asarray(match_times) * 1000.0
+    return {
+        "count": count,
+        "p50": float(np.percentile(match_times, 50)),
+        "p99": float(np.percentile(match_times, 99)),
+        "pruned": matcher.pruned / (queries * count),
+        "rows": matcher.dtw_rows / max(full_rows, 1),
+        "wrong": wrong,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exercise template matching.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = bench_posture.make_frames(1)[0]
+    print(f"{'templates':>9}  {'match p50':>10}  {'p99':>8}  {'matches/s':>9}  {'pruned by LB':>12}  {'DTW rows':>8}  wrong")
+    ok = True
+    for count in args.counts:
+        result = run(count, args.queries, rng, base)
+        print(f"{count:>9}  {result['p50']:>7.2f} ms  {result['p99']:>5.2f} ms  {1000.0 / result['p50']:>9.0f}  "
+              f"{result['pruned']:>12.0%}  {result['rows']:>8.0%}  {result['wrong']}")
+        ok &= result["wrong"] == 0 and (count != 64 or result["p99"] < 20.0)
+    print("ok" if ok else "FAIL")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if main() else 1)
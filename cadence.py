@@ -0,0 +1,176 @@
+import numpy as np
+
+import posture_engine as pe
+
+# --- Adaptive inference cadence ---
+# Posture changes slowly, so MediaPipe only needs to run on some frames ("keyframes").
+# AdaptiveCadence decides when the next keyframe is due:
+#   - fast landmark movement -> up to max_rate_hz
+#   - neck angle or shoulder difference close to their thresholds -> up to max_rate_hz
+#   - stable user far from the thresholds -> down to min_rate_hz (e.g. 2 Hz)
+# Between keyframes the landmarks are extrapolated from the last two keyframes so the
+# overlay keeps following the user.
+# evaluate() replays recorded always-on landmarks through the scheduler and reports the
+# inference rate and how well the posture status (and its flips) agree with always-on inference.
+
+DEFAULT_MIN_RATE_HZ = 2.0
+DEFAULT_MAX_RATE_HZ = 15.0
+
+
+class AdaptiveCadence:
+    """Keyframe scheduler. Use from a single thread (the inference stage).
+
+    Parameters:
+      - min_rate_hz / max_rate_hz: inference rate range. max_rate_hz=None runs every frame.
+      - motion_slow / motion_fast: mean landmark speed (normalized image units per second)
+        mapped to the bottom / top of the rate range.
+      - neck_margin: degrees around the neck threshold that count as "near".
+      - shoulder_margin: pixels around the shoulder threshold that count as "near".
+      - max_extrapolation: seconds after a keyframe that landmarks keep moving; after that
+        they are held in place.
+    """
+    def __init__(self, min_rate_hz=DEFAULT_MIN_RATE_HZ, max_rate_hz=DEFAULT_MAX_RATE_HZ,
+                 motion_slow=0.02, motion_fast=0.3, neck_margin=8.0, shoulder_margin=8.0,
+                 max_extrapolation=0.25,
+                 neck_threshold=pe.THRESHOLD_NECK_FORWARD,
+                 shoulder_threshold=pe.THRESHOLD_SHOULDER_ASYMMETRY):
+        self.min_rate_hz = min_rate_hz
+        self.max_rate_hz = max_rate_hz
+        self.motion_slow = motion_slow
+        self.motion_fast = motion_fast
+        self.neck_margin = neck_margin
+        self.shoulder_margin = shoulder_margin
+        self.max_extrapolation = max_extrapolation
+        self.neck_threshold = neck_threshold
+        self.shoulder_threshold = shoulder_threshold
+
+        shape = (pe.LANDMARK_COUNT, pe.LANDMARK_FIELDS)
+        self._last = np.full(shape, np.nan, dtype=np.float32)
+        self._velocity = np.zeros(shape, dtype=np.float32)
+        self._last_time = None
+        self._has_person = False
+        self.next_due = 0.0
+        self.rate_hz = min_rate_hz if max_rate_hz is None else max_rate_hz
+        self.frames = 0
+        self.keyframes = 0
+
+    def due(self, now):
+        """Called once per camera frame. True if this frame should go through the model."""
+        self.frames += 1
+        return self.max_rate_hz is None or now >= self.next_due
+
+    def add_keyframe(self, now, frame, angle_left_neck=pe.NAN, angle_right_neck=pe.NAN, shoulder_y_diff=pe.NAN):
+        """Record a model result (a (33, 4) array, all-NaN if nobody was found) and plan the next keyframe."""
+        self.keyframes += 1
+        has_person = not np.isnan(frame[:, 0]).all()
+        speed = 0.0
+        if has_person and self._has_person and self._last_time is not None and now > self._last_time:
+            dt = now - self._last_time
+            np.subtract(frame, self._last, out=self._velocity)
+            self._velocity /= dt
+            self._velocity[:, 3] = 0.0  # don't extrapolate visibility
+            np.nan_to_num(self._velocity, copy=False)
+            speed = float(np.mean(np.hypot(self._velocity[:, 0], self._velocity[:, 1])))
+        else:
+            self._velocity.fill(0.0)
+        self._last[:] = frame
+        self._last_time = now
+        self._has_person = has_person
+
+        # How urgent is the next keyframe? 0 = stable, 1 = as soon as possible
+        urgency = 0.0
+        if has_person:
+            span = self.motion_fast - self.motion_slow
+            urgency = (speed - self.motion_slow) / span if span > 0 else 1.0
+            neck = min(angle_left_neck, angle_right_neck)
+            if neck == neck:
+                urgency = max(urgency, 1.0 - abs(neck - self.neck_threshold) / self.neck_margin)
+            if shoulder_y_diff == shoulder_y_diff:
+                urgency = max(urgency, 1.0 - abs(shoulder_y_diff - self.shoulder_threshold) / self.shoulder_margin)
+        urgency = min(1.0, max(0.0, urgency))
+
+        if self.max_rate_hz is not None:
+            self.rate_hz = self.min_rate_hz + (self.max_rate_hz - self.min_rate_hz) * urgency
+            self.next_due = now + 1.0 / self.rate_hz
+
+    def predict(self, now, out):
+        """Extrapolate the landmarks to `now` into `out`. Returns None if there is no person to predict."""
+        if not self._has_person:
+            return None
+        dt = min(max(now - self._last_time, 0.0), self.max_extrapolation)
+        np.multiply(self._velocity, dt, out=out)
+        np.add(out, self._last, out=out)
+        return out
+
+    @property
+    def keyframe_ratio(self):
+        """Fraction of frames that ran inference."""
+        return self.keyframes / self.frames if self.frames else 0.0
+
+
+def to_landmark_list(frame):
+    """Wrap a (33, 4) array as a MediaPipe NormalizedLandmarkList so mp_drawing can draw it."""
+    from mediapipe.framework.formats import landmark_pb2
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in frame.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+
+# --- Offline evaluation against always-on inference ---
+def _flips(status, times):
+    """(time, new_status) for every status change."""
+    changes = np.flatnonzero(status[1:] != status[:-1]) + 1
+    return times[changes], status[changes]
+
+
+def evaluate(frames, timestamps, image_width, image_height, flip_tolerance=1.0, **config):
+    """Replay recorded always-on landmarks (N, 33, 4) through AdaptiveCadence.
+
+    Keyword arguments other than flip_tolerance are passed to AdaptiveCadence.
+    Returns a dict with the inference rate and agreement with always-on statuses:
+      - frame_agreement: fraction of frames with the same status
+      - flip_recall: fraction of always-on status flips that the scheduled path also
+        reached within flip_tolerance seconds
+      - flip_delay_mean: mean delay (seconds) of those matched flips
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    cadence = AdaptiveCadence(**config)
+    engine = pe.PostureEngine(cadence.neck_threshold, cadence.shoulder_threshold)
+    scheduled = np.empty_like(frames)
+    predicted = np.empty(frames.shape[1:], dtype=np.float32)
+
+    for i, (frame, now) in enumerate(zip(frames, timestamps)):
+        if cadence.due(now):
+            engine.analyze(frame, image_width, image_height)
+            cadence.add_keyframe(now, frame, engine.angle_left_neck, engine.angle_right_neck, engine.shoulder_y_diff)
+            scheduled[i] = frame
+        elif cadence.predict(now, predicted) is not None:
+            scheduled[i] = predicted
+        else:
+            scheduled[i] = np.nan
+
+    thresholds = dict(neck_threshold=cadence.neck_threshold, shoulder_threshold=cadence.shoulder_threshold)
+    baseline = pe.analyze_batch(frames, image_width, image_height, **thresholds)["status"]
+    result = pe.analyze_batch(scheduled, image_width, image_height, **thresholds)["status"]
+
+    flip_times, flip_status = _flips(baseline, timestamps)
+    delays = []
+    for t, s in zip(flip_times, flip_status):
+        window = np.flatnonzero((timestamps >= t) & (timestamps <= t + flip_tolerance) & (result == s))
+        if len(window):
+            delays.append(timestamps[window[0]] - t)
+
+    duration = timestamps[-1] - timestamps[0] if len(timestamps) > 1 else 0.0
+    return {
+        "frames": len(frames),
+        "keyframes": cadence.keyframes,
+        "keyframe_ratio": cadence.keyframe_ratio,
+        "camera_rate_hz": (len(frames) - 1) / duration if duration > 0 else 0.0,
+        "inference_rate_hz": cadence.keyframes / duration if duration > 0 else 0.0,
+        "frame_agreement": float(np.mean(baseline == result)) if len(frames) else 1.0,
+        "flips": len(flip_times),
+        "flip_recall": len(delays) / len(flip_times) if len(flip_times) else 1.0,
+        "flip_delay_mean": float(np.mean(delays)) if delays else 0.0,
+    }
@@ -0,0 +1,118 @@
+import threading
+
+# --- Persistent camera session ---
+# Opening a webcam takes seconds on many devices, so the Detect tab doesn't close it when
+# the user switches to another tab: CameraSession pauses the pipeline instead (the
+# device keeps streaming, see pipeline.PosePipeline.pause) and only closes it if the tab
+# stays hidden for longer than the grace period. Coming back within the grace period
+# resumes in about one frame interval.
+#
+# The device is only ever released by the pipeline's capture thread (release=True), after
+# its last read, so the UI thread, the render loop and the grace timer can all call close()
+# at the same time without racing on cap.release().
+
+
+class CameraSession:
+    """One capture device + PosePipeline, kept open across pause/resume.
+
+    Parameters:
+      - open_capture: function() -> an opened (or failed) cv2.VideoCapture-like object
+      - make_pipeline: function(cap) -> a new, not yet started pipeline.PosePipeline
+        created with release=True
+      - grace_s: how long a paused session keeps the device before closing it
+    """
+    def __init__(self, open_capture, make_pipeline, grace_s=60.0):
+        self.open_capture = open_capture
+        self.make_pipeline = make_pipeline
+        self.grace_s = grace_s
+        self.pipeline = None
+        self.keep_inference = False
+        self._lock = threading.Lock()
+        self._grace_timer = None
+        self._paused = False
+
+    @property
+    def active(self):
+        """True while a pipeline is running (paused or not)."""
+        pipeline = self.pipeline
+        return pipeline is not None and not pipeline.finished
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def start(self):
+        """Open the device and start the pipeline, or resume a paused session.
+
+        Returns the running pipeline, or None if the device could not be opened. Opening
+        can take seconds, so call this off the Tk thread.
+        """
+        with self._lock:
+            if self.active:
+                self._resume_locked()
+                return self.pipeline
+        cap = self.open_capture()
+        if not cap.isOpened():
+            cap.release()
+            return None
+        pipeline = self.make_pipeline(cap)
+        with self._lock:
+            self._paused = False
+            self.pipeline = pipeline.start()
+        return pipeline
+
+    def pause(self, keep_inference=False):
+        """Stop delivering frames to the render stage and start the grace timer.
+
+        keep_inference=True keeps capture and inference running (results are still
+        produced, the caller just doesn't show them); otherwise the device only grabs.
+        """
+        with self._lock:
+            if not self.active or self._paused:
+                return
+            self._paused = True
+            self.keep_inference = keep_inference
+            if not keep_inference:
+                self.pipeline.pause()
+            self._cancel_grace_timer()
+            self._grace_timer = threading.Timer(self.grace_s, self._grace_expired)
+            self._grace_timer.daemon = True
+            self._grace_timer.start()
+
+    def resume(self):
+        with self._lock:
+            self._resume_locked()
+
+    def close(self):
+        """Stop the pipeline (the capture thread releases the device). Safe from any thread, any number of times."""
+        with self._lock:
+            pipeline = self._detach_locked()
+        if pipeline is not None:
+            pipeline.stop()
+
+    # --- Internals (caller holds the lock) ---
+    def _resume_locked(self):
+        self._cancel_grace_timer()
+        if self._paused and self.pipeline is not None:
+            self.pipeline.resume()
+        self._paused = False
+
+    def _cancel_grace_timer(self):
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+            self._grace_timer = None
+
+    def _detach_locked(self):
+        self._cancel_grace_timer()
+        pipeline, self.pipeline = self.pipeline, None
+        self._paused = False
+        return pipeline
+
+    def _grace_expired(self):
+        with self._lock:
+            # Resumed (or closed and restarted) while the timer was firing
+            if not self._paused or threading.current_thread() is not self._grace_timer:
+                return
+            pipeline = self._detach_locked()
+        if pipeline is not None:
+            pipeline.stop()
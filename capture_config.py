@@ -0,0 +1,267 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# --- Camera capture configuration ---
+# cv2.VideoCapture(1) with default properties often means YUYV at a low frame rate and
+# a driver buffer of several frames (every read returns a frame that is already old).
+# CaptureConfig sets the device, backend, FOURCC, resolution, FPS and buffer size;
+# open_capture() applies it. The probe mode tries every device and a list of modes,
+# measures the frame rate actually delivered and the read latency, and saves the best
+# suitable mode to CAPTURE_CONFIG_PATH, which ui.py and detect.py read on start.
+#
+# Usage:
+#   python capture_config.py show
+#   python capture_config.py probe [--devices 0 2 /dev/video4] [--frames 90] [--save]
+# A video file (or a v4l2loopback device) can stand in for a camera: --devices clip.mp4
+
+CAPTURE_CONFIG_PATH = "capture_config.json"
+
+BACKENDS = {
+    "auto": cv2.CAP_ANY,
+    "v4l2": cv2.CAP_V4L2,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "avfoundation": cv2.CAP_AVFOUNDATION,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "ffmpeg": cv2.CAP_FFMPEG,
+}
+
+# (fourcc, width, height, fps) tried by the probe, per device
+PROBE_MODES = [
+    ("MJPG", 640, 480, 30),
+    ("YUYV", 640, 480, 30),
+    ("MJPG", 640, 480, 60),
+    ("MJPG", 1280, 720, 30),
+    ("YUYV", 1280, 720, 30),
+    ("MJPG", 1280, 720, 60),
+    ("MJPG", 1920, 1080, 30),
+]
+MIN_FPS = 24.0       # slower modes are not suitable
+MIN_HEIGHT = 480     # smaller frames lose too much landmark accuracy
+
+
+class CaptureConfig:
+    """How to open the camera. None leaves a property at the driver default.
+
+    Parameters:
+      - device: camera index, device path (/dev/video2) or video file
+      - backend: key of BACKENDS
+      - width, height, fps: requested mode
+      - fourcc: pixel format, e.g. "MJPG" or "YUYV"
+      - buffer_size: frames buffered by the driver (1 = always the newest frame)
+    """
+    FIELDS = ("device", "backend", "width", "height", "fps", "fourcc", "buffer_size")
+
+    def __init__(self, device=1, backend="auto", width=None, height=None, fps=None, fourcc=None, buffer_size=1):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, expected one of {sorted(BACKENDS)}")
+        self.device = device
+        self.backend = backend
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    def copy(self, **changes):
+        return CaptureConfig.from_dict(dict(self.to_dict(), **changes))
+
+    def __repr__(self):
+        return f"CaptureConfig({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
+
+
+def load_config(path=CAPTURE_CONFIG_PATH):
+    """The saved configuration, or the defaults if there is no config file."""
+    if not os.path.exists(path):
+        return CaptureConfig()
+    with open(path) as f:
+        return CaptureConfig.from_dict(json.load(f))
+
+
+def save_config(config, path=CAPTURE_CONFIG_PATH, probe=None):
+    """Write the config (and, for reference, the probe measurement it came from)."""
+    data = config.to_dict()
+    if probe is not None:
+        data["probe"] = {key: value for key, value in probe.items() if key != "config"}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def parse_device(text):
+    """Command line / config value -> camera index (int) or path (str)."""
+    return int(text) if str(text).isdigit() else text
+
+
+def open_capture(config=None):
+    """Open and configure a cv2.VideoCapture. Check isOpened() on the result."""
+    if config is None:
+        config = load_config()
+    cap = cv2.VideoCapture(parse_device(config.device), BACKENDS[config.backend])
+    if not cap.isOpened():
+        return cap
+    # FOURCC first: on V4L2 the available resolutions and frame rates depend on it
+    if config.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+    if config.width:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+    if config.height:
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+    if config.fps:
+        cap.set(cv2.CAP_PROP_FPS, config.fps)
+    if config.buffer_size:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+    return cap
+
+
+def actual_mode(cap):
+    """The mode the driver actually picked (it may ignore what was requested)."""
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    fourcc = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ") or None
+    return {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "fourcc": fourcc,
+    }
+
+
+# --- Probe ---
+def list_devices(max_index=4):
+    """Camera indices to try: /dev/video* on Linux, otherwise 0..max_index."""
+    nodes = sorted(glob.glob("/dev/video*"))
+    if nodes:
+        return sorted(int(node[len("/dev/video"):]) for node in nodes if node[len("/dev/video"):].isdigit())
+    return list(range(max_index + 1))
+
+
+def measure(config, frames=90, warmup=15, open_fn=open_capture):
+    """Open with `config`, read frames and time them. Returns a result dict, or None if it can't read."""
+    cap = open_fn(config)
+    try:
+        if not cap.isOpened():
+            return None
+        # The first frames after opening (auto exposure, buffer fill) are not representative
+        for _ in range(warmup):
+            if not cap.read()[0]:
+                return None
+        mode = actual_mode(cap)
+        latencies = []
+        shape = None
+        start = time.perf_counter()
+        for _ in range(frames):
+            t = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            latencies.append(time.perf_counter() - t)
+            shape = frame.shape
+        elapsed = time.perf_counter() - start
+    finally:
+        cap.release()
+    if not latencies:
+        return None
+    latencies = np.asarray(latencies) * 1000.0
+    return {
+        "config": config,
+        "actual": mode,
+        "frame_shape": list(shape),
+        "frames": len(latencies),
+        "delivered_fps": round(len(latencies) / elapsed, 2),
+        "read_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+        "read_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def suitable(result, min_fps=MIN_FPS, min_height=MIN_HEIGHT):
+    return result["delivered_fps"] >= min_fps and result["frame_shape"][0] >= min_height
+
+
+def rank(result):
+    """Sort key: higher FPS (in 5 FPS steps) first, then fewer pixels, then faster reads.
+
+    Delivered FPS counts only up to the requested rate, so a source that reads faster
+    than real time (a video file) doesn't win on noise.
+    """
+    height, width = result["frame_shape"][:2]
+    fps = result["delivered_fps"]
+    if result["config"].fps:
+        fps = min(fps, result["config"].fps)
+    return (-int(fps // 5), width * height, result["read_ms_p50"])
+
+
+def probe(devices=None, modes=PROBE_MODES, backend="auto", buffer_size=1, frames=90, open_fn=open_capture, log=print):
+    """Measure every (device, mode). Returns the results, best first; unsuitable ones at the end."""
+    if devices is None:
+        devices = list_devices()
+    results = []
+    for device in devices:
+        base = CaptureConfig(device=device, backend=backend, buffer_size=buffer_size)
+        if measure(base, frames=1, warmup=0, open_fn=open_fn) is None:
+            log(f"{device}: can't open / read, skipped")
+            continue
+        seen = set()
+        for fourcc, width, height, fps in modes:
+            config = base.copy(fourcc=fourcc, width=width, height=height, fps=fps)
+            result = measure(config, frames=frames, open_fn=open_fn)
+            if result is None:
+                log(f"{device} {fourcc} {width}x{height}@{fps}: no frames")
+                continue
+            actual = result["actual"]
+            # Drivers fall back to another mode when the requested one isn't supported
+            key = (actual["fourcc"], actual["width"], actual["height"], round(actual["fps"]))
+            if key in seen:
+                log(f"{device} {fourcc} {width}x{height}@{fps}: not supported, driver used an already measured mode")
+                continue
+            seen.add(key)
+            log(f"{device} {fourcc} {width}x{height}@{fps} -> {actual['fourcc']} {actual['width']}x{actual['height']}: "
+                f"{result['delivered_fps']:.1f} FPS, read p50 {result['read_ms_p50']:.1f} ms p95 {result['read_ms_p95']:.1f} ms")
+            results.append(result)
+    results.sort(key=lambda r: (not suitable(r), rank(r)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show, probe and save the camera capture configuration.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="print the current configuration")
+    probe_parser = sub.add_parser("probe", help="measure devices and modes, optionally save the best")
+    probe_parser.add_argument("--devices", nargs="+", type=parse_device, help="indices, device paths or video files")
+    probe_parser.add_argument("--backend", default="auto", choices=sorted(BACKENDS))
+    probe_parser.add_argument("--frames", type=int, default=90, help="frames to time per mode")
+    probe_parser.add_argument("--save", action="store_true", help=f"write the best mode to {CAPTURE_CONFIG_PATH}")
+    parser.add_argument("--config", default=CAPTURE_CONFIG_PATH, help="config file")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        print(json.dumps(load_config(args.config).to_dict(), indent=2))
+        return 0
+
+    results = probe(args.devices, backend=args.backend, frames=args.frames)
+    best = [r for r in results if suitable(r)]
+    if not best:
+        print(f"No suitable mode (>= {MIN_FPS:g} FPS, >= {MIN_HEIGHT}p) found.")
+        return 1
+    chosen = best[0]
+    print(f"Best: {chosen['config']} ({chosen['delivered_fps']:.1f} FPS, read p50 {chosen['read_ms_p50']:.1f} ms)")
+    if args.save:
+        save_config(chosen["config"], args.config, probe=chosen)
+        print(f"Saved to {args.config}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,16 @@ import mediapipe as mp
 import numpy as np
 import time
 
+import cadence
+import capture_config
+import instrumentation
+import latency_governor
+import motion_gate
+import pipeline
+import posture_engine
+import posture_rules
+import roi
+
 # --- 1. Initialize MediaPipe Pose and drawing utilities ---
 
 # Setup MediaPipe Pose model
@@ -12,7 +22,14 @@ import time
 #   - 0: Fastest, less accurate.
 #   - 1: Balanced speed and accuracy (recommended for most cases).
 #   - 2: Slower, more accurate.
-pose = mp.solutions.pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5, model_complexity=1)
+def build_pose(model_complexity=1):
+    return mp.solutions.pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5, model_complexity=model_complexity)
+
+# The complexity (and the input resolution) is not fixed: the latency governor starts at
+# model_complexity=1 and moves between 0/1/2 and a few downscaled input sizes to keep
+# inference within FRAME_BUDGET_MS milliseconds on this machine.
+FRAME_BUDGET_MS = 50
+governor = None # Created in main()
 
 # Drawing utilities for visualizing landmarks and connections
 mp_drawing = mp.solutions.drawing_utils
@@ -21,6 +38,8 @@ mp_drawing_styles = mp.solutions.drawing_styles
 # --- 2. Helper function to calculate angle between three points ---
 # This function calculates the angle (in degrees) formed by three points.
 # The angle is calculated at the 'mid' point.
+# The math lives in posture_engine.calculate_angle, which also accepts whole arrays
+# of points (shape (..., 2)) so many angles can be computed in one call.
 # Parameters:
 #   - a: First point coordinates (e.g., [x1, y1])
 #   - b: Mid point coordinates (e.g., [x2, y2]) - where the angle is formed
@@ -28,29 +47,18 @@ mp_drawing_styles = mp.solutions.drawing_styles
 # Returns:
 #   - angle: The calculated angle in degrees.
 def calculate_angle(a, b, c):
-    a = np.array(a) # First point
-    b = np.array(b) # Mid point (vertex of the angle)
-    c = np.array(c) # End point
-
-    # Calculate vectors from the mid point
-    ba = a - b
-    bc = c - b
-
-    # Calculate the cosine of the angle using the dot product formula
-    # cos(theta) = (A . B) / (|A| * |B|)
-    cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-
-    # Ensure cosine_angle is within valid range [-1, 1] to prevent arccos errors
-    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-
-    # Calculate the angle in radians and convert to degrees
-    angle = np.degrees(np.arccos(cosine_angle))
-
-    return angle
+    return posture_engine.calculate_angle(a, b, c)
 
 # --- 3. Main function to analyze posture based on landmarks ---
 # This function takes MediaPipe landmarks and image dimensions to determine posture.
-# It applies simple rules based on angles and distances.
+# The rules themselves (neck angle < 165 degrees = forward head/slouching,
+# shoulder height difference > 25 px = leaning) are implemented in posture_engine.
+# PostureEngine copies the landmarks into a reused (33, 4) array once and scores them
+# without allocating new arrays every frame. It also computes the bounding box.
+# The status comes from the rules in posture_rules.json if that file exists (create it
+# with `python posture_rules.py init` to edit thresholds or enable head tilt / hunching),
+# otherwise from the same defaults as above. A file that can't be read or has invalid rules
+# is reported on the console and the defaults are used, as in ui.py.
 # Parameters:
 #   - landmarks: MediaPipe PoseLandmarks object containing detected keypoints.
 #   - image_width: Width of the input image/frame.
@@ -58,173 +66,249 @@ def calculate_angle(a, b, c):
 # Returns:
 #   - posture_status: A string indicating the posture (e.g., "Correct Posture", "Incorrect Posture").
 #   - text_color: RGB tuple for the text and bounding box color.
+engine = posture_engine.PostureEngine(rules=posture_rules.load_rules_or_defaults())
+
 def analyze_posture(landmarks, image_width, image_height):
-    posture_status = "Unknown"
-    text_color = (0, 0, 0) # Default color (black)
-
-    # Check if landmarks were detected
-    if landmarks:
-        try:
-            # Extract coordinates of essential landmarks for upper body posture analysis.
-            # MediaPipe provides normalized coordinates (0 to 1), so multiply by image dimensions
-            # to get pixel coordinates.
-            left_shoulder = [landmarks[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value].x * image_width,
-                             landmarks[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value].y * image_height]
-            right_shoulder = [landmarks[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value].x * image_width,
-                              landmarks[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value].y * image_height]
-            left_ear = [landmarks[mp.solutions.pose.PoseLandmark.LEFT_EAR.value].x * image_width,
-                        landmarks[mp.solutions.pose.PoseLandmark.LEFT_EAR.value].y * image_height]
-            right_ear = [landmarks[mp.solutions.pose.PoseLandmark.RIGHT_EAR.value].x * image_width,
-                         landmarks[mp.solutions.pose.PoseLandmark.RIGHT_EAR.value].y * image_height]
-            nose = [landmarks[mp.solutions.pose.PoseLandmark.NOSE.value].x * image_width,
-                    landmarks[mp.solutions.pose.PoseLandmark.NOSE.value].y * image_height]
-            
-            # Note: For full posture analysis (e.g., back slouching, hip angle),
-            # landmarks like Hips and Knees are crucial. Since we only see the upper body,
-            # our analysis will focus on neck/head posture and shoulder symmetry.
-
-            # --- Rule 1: Detect Forward Head Posture / Neck Strain ---
-            # Concept: Analyze the angle formed by shoulder, ear, and nose.
-            # A healthy posture would have the ear roughly aligned with the shoulder.
-            # Forward head posture causes the ear to move significantly forward relative to the shoulder.
-            # A smaller angle (e.g., shoulder-ear-nose) might indicate forward head or slouching.
-
-            # Calculate angles for both sides of the neck
-            angle_left_neck = calculate_angle(left_shoulder, left_ear, nose)
-            angle_right_neck = calculate_angle(right_shoulder, right_ear, nose)
-
-            # Threshold for forward head posture (These values need calibration!)
-            # You should test this by sitting in correct and incorrect postures
-            # and observing the calculated angle values to set appropriate thresholds.
-            # Example: If correct posture gives ~170-180 degrees, and forward head gives ~150-160 degrees.
-            THRESHOLD_NECK_FORWARD = 165 # If angle is less than this, consider it forward head/slouching
-
-            if angle_left_neck < THRESHOLD_NECK_FORWARD or angle_right_neck < THRESHOLD_NECK_FORWARD:
-                posture_status = "Incorrect Posture: Forward Head/Slouching"
-                text_color = (0, 0, 255) # Red color for incorrect posture
-
-            # --- Rule 2: Check for Shoulder Asymmetry (Leaning) ---
-            # Concept: Compare the vertical (Y) position of the left and right shoulders.
-            # Significant difference might indicate leaning to one side.
-            shoulder_y_diff = abs(left_shoulder[1] - right_shoulder[1]) # Difference in Y-coordinates (height)
-
-            # Threshold for shoulder asymmetry (Needs calibration!)
-            # Example: If straight posture gives ~0-10 pixels difference, and leaning gives >20 pixels.
-            THRESHOLD_SHOULDER_ASYMMETRY = 25 # If difference is greater than this, consider it leaning
-
-            # Only check for leaning if not already flagged as forward head/slouching
-            if posture_status != "Incorrect Posture: Forward Head/Slouching" and shoulder_y_diff > THRESHOLD_SHOULDER_ASYMMETRY:
-                posture_status = "Incorrect Posture: Leaning Shoulder"
-                text_color = (0, 0, 255) # Red color
-
-            # --- Rule 3: Correct Posture ---
-            # If no incorrect posture rules are triggered, assume correct posture.
-            if posture_status == "Unknown":
-                posture_status = "Correct Posture"
-                text_color = (0, 255, 0) # Green color for correct posture
-
-        except Exception as e:
-            # print(f"Error during posture analysis: {e}") # Uncomment for debugging
-            posture_status = "Cannot Analyze Posture (Missing Data/Error)"
-            text_color = (0, 165, 255) # Orange color for analysis issues
+    try:
+        status = engine.analyze_landmarks(landmarks, image_width, image_height)
+    except Exception as e:
+        # print(f"Error during posture analysis: {e}") # Uncomment for debugging
+        status = posture_engine.STATUS_CANNOT_ANALYZE
+    return posture_engine.STATUS_LABELS[status], posture_engine.STATUS_COLORS[status]
+
+# --- 4. Inference stage ---
+# Runs on the pipeline's inference thread: MediaPipe Pose plus posture analysis.
+# Capture runs on its own thread and drawing/display (the render stage) stays on the
+# main thread, so camera latency, inference and display no longer add up.
+#
+# The model only runs on keyframes chosen by AdaptiveCadence: up to MAX_INFERENCE_HZ when
+# the user moves fast or is close to the neck/shoulder thresholds, down to MIN_INFERENCE_HZ
+# when stable. Set MAX_INFERENCE_HZ = None to run the model on every frame.
+# In between, landmarks are extrapolated from the last keyframes for the overlay.
+# Returns a tuple of (pose_landmarks, posture_status, text_color, bbox).
+MIN_INFERENCE_HZ = 2.0
+MAX_INFERENCE_HZ = 15.0
+scheduler = cadence.AdaptiveCadence(min_rate_hz=MIN_INFERENCE_HZ, max_rate_hz=MAX_INFERENCE_HZ)
+# ROI tracking: run the model only on a crop around the person found in the previous keyframe
+# (expanded by ROI_MARGIN of the box size on each side), which is much cheaper on high resolution cameras.
+USE_ROI_TRACKING = True
+ROI_MARGIN = 0.3
+roi_tracker = roi.RoiTracker(margin=ROI_MARGIN, enabled=USE_ROI_TRACKING)
+# Per-stage timings (capture, flip, color convert, pose.process, posture analysis, draw_landmarks, display),
+# dumped to PROFILE_STATS_PATH on exit. The sampling profiler is off until 'p' is pressed.
+SHOW_PROFILE_OVERLAY = False
+PROFILE_STATS_PATH = "profile_stats.json"
+SAMPLING_PROFILE_PATH = "profile_samples.folded"
+profiler = instrumentation.StageProfiler()
+sampler = instrumentation.SamplingProfiler()
+# Cheap frame differencing in front of the model: reuse the last result while the scene is
+# static, and drop to gate.idle_fps after nobody has been seen for idle_after_s
+USE_MOTION_GATE = True
+gate = motion_gate.MotionGate(enabled=USE_MOTION_GATE)
+last_result = None
+predicted_landmarks = np.empty((posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS), dtype=np.float32)
+
+def run_inference(frame):
+    global last_result
+    now = time.monotonic()
+    image_width, image_height = frame.shape[1], frame.shape[0]
+
+    # Nothing moved since the model last ran: show the previous result again
+    start = profiler.clock()
+    passed = gate.check(frame, now)
+    profiler.record("motion gate", profiler.clock() - start)
+    if not passed and last_result is not None:
+        gate.report(last_result[0] is not None, now)
+        return last_result
+
+    if scheduler.due(now):
+        # Only look at the area around the person from the previous keyframe (full frame if unknown)
+        crop, crop_roi = roi_tracker.crop(frame)
+
+        # Downscale to the governor's current input size, then convert the BGR image
+        # (OpenCV default) to RGB (MediaPipe requires RGB)
+        start = profiler.clock()
+        image = cv2.cvtColor(governor.prepare(crop), cv2.COLOR_BGR2RGB)
+        # Set the image to be writeable = False for better performance with MediaPipe
+        image.flags.writeable = False
+        profiler.record("color convert", profiler.clock() - start)
+
+        # Process the image with MediaPipe Pose to detect landmarks (the governor times it)
+        start = profiler.clock()
+        results = governor.process(image)
+        profiler.record("pose.process", profiler.clock() - start)
+        pose_landmarks = results.pose_landmarks
+        if pose_landmarks:
+            # Landmarks are relative to the crop; convert them back to full-frame coordinates
+            roi_tracker.to_full_frame(pose_landmarks.landmark, crop_roi, image_width, image_height)
 
+        # Analyze the posture using our custom function
+        # (with no landmarks this also resets engine.frame to NaN = nobody in view)
+        start = profiler.clock()
+        posture_status, text_color = analyze_posture(pose_landmarks.landmark if pose_landmarks else None, image_width, image_height)
+        profiler.record("posture analysis", profiler.clock() - start)
+        scheduler.add_keyframe(now, engine.frame, engine.angle_left_neck, engine.angle_right_neck, engine.shoulder_y_diff)
+
+        # Plan the next crop from this bounding box; losing the person switches back to the full frame
+        found = engine.status != posture_engine.STATUS_NO_PERSON
+        roi_tracker.update(engine.bbox.tolist() if found else None, image_width, image_height)
+    elif scheduler.predict(now, predicted_landmarks) is not None:
+        # Between keyframes: score and draw the extrapolated landmarks
+        start = profiler.clock()
+        status = engine.analyze(predicted_landmarks, image_width, image_height)
+        profiler.record("posture analysis", profiler.clock() - start)
+        posture_status, text_color = posture_engine.STATUS_LABELS[status], posture_engine.STATUS_COLORS[status]
+        pose_landmarks = cadence.to_landmark_list(predicted_landmarks)
     else:
+        pose_landmarks = None
         posture_status = "No Person Detected"
-        text_color = (0, 165, 255) # Orange color if no person is found
-
-    return posture_status, text_color
+        text_color = (0, 165, 255) # Default orange color
 
-# --- 4. Start capturing video from webcam ---
-# cv2.VideoCapture(0) opens the default webcam. If you have multiple cameras,
-# you might need to try 1, 2, etc.
-cap = cv2.VideoCapture(1)
+    # Copy the bounding box (engine.bbox is reused for the next frame)
+    bbox = None
+    if pose_landmarks and engine.status != posture_engine.STATUS_NO_PERSON:
+        bbox = engine.bbox.tolist()
 
-# Check if the webcam was opened successfully
-if not cap.isOpened():
-    print("Error: Could not open webcam. Please check if it's connected and not in use.")
-    exit()
+    gate.report(pose_landmarks is not None, now)
+    last_result = (pose_landmarks, posture_status, text_color, bbox)
+    return last_result
 
-print("Webcam opened successfully. Press 'q' to quit.")
-
-# Variables for calculating Frames Per Second (FPS)
-prev_frame_time = 0
-new_frame_time = 0
-
-# --- 5. Main video processing loop ---
-while cap.isOpened():
-    # Read a frame from the webcam
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame. Exiting...")
-        break
-
-    # Flip the frame horizontally (like a mirror) for a more intuitive view
-    frame = cv2.flip(frame, 1)
-
-    # Convert the BGR image (OpenCV default) to RGB (MediaPipe requires RGB)
-    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    # Set the image to be writeable = False for better performance with MediaPipe
-    image.flags.writeable = False
-
-    # Process the image with MediaPipe Pose to detect landmarks
-    results = pose.process(image)
-
-    # Set the image back to writeable = True for drawing
-    image.flags.writeable = True
-    # Convert the image back to BGR for OpenCV display
-    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-    # --- 6. Draw results and analyze posture ---
-    posture_status = "No Person Detected"
-    text_color = (0, 165, 255) # Default orange color
-
-    if results.pose_landmarks:
-        # Draw the pose landmarks (skeleton) on the image
-        mp_drawing.draw_landmarks(image, results.pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS,
-                                  landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style())
-
-        # Analyze the posture using our custom function
-        posture_status, text_color = analyze_posture(results.pose_landmarks.landmark, frame.shape[1], frame.shape[0])
-    
-    # --- 7. Display status and bounding box ---
-    # Display the posture status text on the image
-    cv2.putText(image, f"Status: {posture_status}", (20, 50),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, text_color, 2, cv2.LINE_AA)
-
-    # Draw a bounding box around the detected person
-    if results.pose_landmarks:
-        # Get all x and y coordinates of the detected landmarks
-        x_coords = [landmark.x * frame.shape[1] for landmark in results.pose_landmarks.landmark]
-        y_coords = [landmark.y * frame.shape[0] for landmark in results.pose_landmarks.landmark]
-
-        # Calculate min/max x and y to form the bounding box
-        if x_coords and y_coords: # Ensure there are coordinates to prevent errors
-            min_x = int(min(x_coords)) - 10 # Add/subtract padding for better visual
-            max_x = int(max(x_coords)) + 10
-            min_y = int(min(y_coords)) - 10
-            max_y = int(max(y_coords)) + 10
+# --- 5. Main function: capture, render loop and clean up ---
+# Parameters:
+#   - cap: an opened capture. None opens the webcam. Anything with read()/isOpened()/release()
+#     works, e.g. frame_sources.VideoFileSource to replay a recording.
+#   - show: False runs headless (no window, no key handling), e.g. for benchmarks.
+#   - pose_builder: function(model_complexity) -> Pose. Defaults to build_pose.
+#   - max_frames: stop after this many displayed frames (None = until the source ends or 'q').
+# Returns:
+#   - frame_pipeline: the finished PosePipeline, with its stats and latency samples.
+def main(cap=None, show=True, pose_builder=build_pose, max_frames=None):
+    global governor
+    governor = latency_governor.LatencyGovernor(pose_builder, budget_ms=FRAME_BUDGET_MS)
+
+    # Start capturing video from webcam
+    # The device, resolution, FPS, FOURCC and buffer size come from capture_config.json
+    # (camera 1 with driver defaults if there is none). To find the fastest mode for this
+    # machine, run: python capture_config.py probe --save
+    if cap is None:
+        config = capture_config.load_config()
+        print(f"Opening camera: {config}")
+        cap = capture_config.open_capture(config)
+
+    # Check if the webcam was opened successfully
+    if not cap.isOpened():
+        print("Error: Could not open webcam. Please check if it's connected and not in use.")
+        governor.close()
+        return None
+
+    print("Webcam opened successfully. Press 'q' to quit.")
+
+    # Start the capture and inference threads.
+    # The frame is flipped horizontally (like a mirror) on the capture thread for a more intuitive view.
+    # Queues between the stages hold only the newest frame; stale frames are dropped.
+    frame_pipeline = pipeline.PosePipeline(cap, run_inference, transform=lambda f: cv2.flip(f, 1), profiler=profiler).start()
+
+    show_overlay = SHOW_PROFILE_OVERLAY
+
+    # Variables for calculating Frames Per Second (FPS)
+    prev_frame_time = time.monotonic()
+    new_frame_time = 0
+
+    # --- 6. Main render loop ---
+    while not frame_pipeline.finished:
+        # Nobody in view for a while: only a few frames per second until something moves
+        frame_pipeline.max_fps = gate.idle_fps if gate.idle else None
+
+        # Wait for the newest processed frame
+        item = frame_pipeline.get_result(timeout=0.1)
+        if item is None:
+            # Keep the window responsive while waiting for inference
+            if show and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+        captured_at, image, (pose_landmarks, posture_status, text_color, bbox) = item
+
+        # --- 7. Draw results, status and bounding box ---
+        # The captured frame is only used here after inference, so we can draw on it directly
+        if pose_landmarks:
+            # Draw the pose landmarks (skeleton) on the image
+            start = profiler.clock()
+            mp_drawing.draw_landmarks(image, pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS,
+                                      landmark_drawing_spec=mp_drawing_styles.get_default_pose_landmarks_style())
+            profiler.record("draw_landmarks", profiler.clock() - start)
+
+        # Display the posture status text on the image
+        cv2.putText(image, f"Status: {posture_status} [{governor.mode_label}]", (20, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, text_color, 2, cv2.LINE_AA)
+
+        # Draw a bounding box around the detected person
+        # (analyze_posture already computed it, including 10 px padding)
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
 
             # Draw the rectangle (bounding box) with the color based on posture status
             cv2.rectangle(image, (min_x, min_y), (max_x, max_y), text_color, 3) # Thickness of 3 pixels
 
-    # Calculate and display FPS (Frames Per Second)
-    new_frame_time = time.time()
-    fps = 1 / (new_frame_time - prev_frame_time)
-    prev_frame_time = new_frame_time
-    cv2.putText(image, f"FPS: {int(fps)}", (20, 90),
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2, cv2.LINE_AA) # White color for FPS
-
-    # Display the processed image in a window
-    cv2.imshow('Posture Detection', image)
-
-    # Wait for a key press. If 'q' is pressed, exit the loop.
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-# --- 8. Clean up and release resources ---
-# Release the webcam
-cap.release()
-# Close all OpenCV windows
-cv2.destroyAllWindows()
-# Close the MediaPipe Pose model
-pose.close()
+        # Calculate and display FPS (Frames Per Second) of displayed frames
+        new_frame_time = time.monotonic()
+        fps = 1 / max(new_frame_time - prev_frame_time, 1e-6)
+        prev_frame_time = new_frame_time
+        cv2.putText(image, f"FPS: {int(fps)}", (20, 90),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2, cv2.LINE_AA) # White color for FPS
+
+        # Queue depth and dropped-frame counts for each stage, plus the current model rate
+        cv2.putText(image, f"{frame_pipeline.format_stats()} | model {scheduler.rate_hz:.1f} Hz | roi {roi_tracker.area_ratio:.0%} | {gate.state_label} {gate.pass_ratio:.0%}", (20, 120),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+
+        # Rolling per-stage timings ('o' to toggle)
+        if show_overlay:
+            profiler.draw_overlay(image)
+
+        if show:
+            # Display the processed image in a window
+            start = profiler.clock()
+            cv2.imshow('Posture Detection', image)
+            profiler.record("display", profiler.clock() - start)
+        frame_pipeline.frame_done(captured_at)
+
+        if max_frames is not None and frame_pipeline.rendered >= max_frames:
+            break
+        if not show:
+            continue
+        # Wait for a key press. If 'q' is pressed, exit the loop.
+        # 'o' toggles the timing overlay, 'p' starts/stops the sampling profiler.
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'):
+            break
+        elif key == ord('o'):
+            show_overlay = not show_overlay
+        elif key == ord('p'):
+            running = sampler.toggle(SAMPLING_PROFILE_PATH)
+            print("Sampling profiler started" if running else f"Sampling profile written to {SAMPLING_PROFILE_PATH}")
+
+    # The capture thread stops on its own when the camera stops delivering frames
+    if frame_pipeline.finished:
+        print("Failed to grab frame. Exiting...")
+
+    # --- 8. Clean up and release resources ---
+    # Stop the capture and inference threads and print the final stage counters
+    frame_pipeline.stop()
+    print(f"Pipeline stats: {frame_pipeline.stats()}")
+    print(f"Model ran on {scheduler.keyframes} of {scheduler.frames} frames ({scheduler.keyframe_ratio:.0%})")
+    # Save the stage timing histograms (and the sampling profile if it is still running)
+    if sampler.running:
+        sampler.stop(SAMPLING_PROFILE_PATH)
+    profiler.dump(PROFILE_STATS_PATH)
+    print(f"Stage timings written to {PROFILE_STATS_PATH}")
+    # Release the webcam
+    cap.release()
+    # Close all OpenCV windows
+    if show:
+        cv2.destroyAllWindows()
+    # Close the MediaPipe Pose model(s)
+    governor.close()
+    return frame_pipeline
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import math
+
+import numpy as np
+
+import posture_engine
+
+# --- Guided stretch breaks: streaming rep and hold counting ---
+# Each exercise follows one joint-angle (or distance) signal from the pose landmarks the
+# posture pipeline already produces:
+#   chin_tuck       shoulder-ear-nose angle (posture_engine.calculate_angle), lower = tucked
+#   neck_stretch    tilt of the line between the ears, degrees from horizontal
+#   shoulder_shrug  ear-to-shoulder height divided by shoulder width, lower = shrugged
+#
+# RepDetector runs on every frame in O(1): the signal is smoothed with a time-based EMA and
+# compared with a resting baseline (a slow EMA that only moves while resting, so it adapts
+# to the user and the camera angle). Hysteresis between enter_delta and exit_delta turns
+# the deviation into rest / active phases, and an active phase that lasted hold_s is one
+# rep. The detector keeps only this scalar state - no sample history or buffer - so its
+# cost and memory don't grow with the session length.
+#
+# The thresholds are starting points from a few test sessions - tune them per setup.
+
+EXERCISES = {
+    "chin_tuck": {"label": "Chin tuck (ดึงคางเข้า)", "signal": "neck_angle", "direction": -1,
+                  "enter_delta": 8.0, "exit_delta": 4.0, "hold_s": 3.0, "reps": 10},
+    "neck_stretch": {"label": "Neck stretch (เอียงคอ)", "signal": "ear_tilt", "direction": 1,
+                     "enter_delta": 15.0, "exit_delta": 8.0, "hold_s": 10.0, "reps": 4},
+    "shoulder_shrug": {"label": "Shoulder shrug (ยักไหล่)", "signal": "ear_shoulder_height", "direction": -1,
+                       "enter_delta": 0.08, "exit_delta": 0.04, "hold_s": 2.0, "reps": 10},
+}
+
+# Phases of RepDetector
+RESTING = 0
+ACTIVE = 1
+
+# RepDetector.update() events
+EVENT_START = "start"   # the user moved into the exercise position
+EVENT_REP = "rep"       # ... held it for hold_s and came back: one more rep
+EVENT_SHORT = "short"   # ... came back before hold_s: not counted
+
+
+# --- Signals: one float per (33, 4) frame, NaN if the landmarks aren't there ---
+_NECK_POINTS = np.array([[posture_engine.LEFT_SHOULDER, posture_engine.LEFT_EAR, posture_engine.NOSE],
+                         [posture_engine.RIGHT_SHOULDER, posture_engine.RIGHT_EAR, posture_engine.NOSE]], dtype=np.intp)
+
+
+def neck_angle(frame, image_width, image_height):
+    """Smaller of the two shoulder-ear-nose angles, degrees."""
+    points = frame[_NECK_POINTS, :2] * (image_width, image_height)
+    angles = posture_engine.calculate_angle(points[:, 0], points[:, 1], points[:, 2])
+    return float(np.fmin(angles[0], angles[1]))
+
+
+def ear_tilt(frame, image_width, image_height):
+    """Angle of the ear line from horizontal, 0-90 degrees."""
+    dx = (frame.item(posture_engine.LEFT_EAR, 0) - frame.item(posture_engine.RIGHT_EAR, 0)) * image_width
+    dy = (frame.item(posture_engine.LEFT_EAR, 1) - frame.item(posture_engine.RIGHT_EAR, 1)) * image_height
+    return math.degrees(math.atan2(abs(dy), abs(dx)))
+
+
+def ear_shoulder_height(frame, image_width, image_height):
+    """Mean vertical ear-to-shoulder distance as a fraction of the shoulder width."""
+    item = frame.item
+    left_shoulder_x, left_shoulder_y = item(posture_engine.LEFT_SHOULDER, 0), item(posture_engine.LEFT_SHOULDER, 1)
+    right_shoulder_x, right_shoulder_y = item(posture_engine.RIGHT_SHOULDER, 0), item(posture_engine.RIGHT_SHOULDER, 1)
+    width = math.hypot((left_shoulder_x - right_shoulder_x) * image_width, (left_shoulder_y - right_shoulder_y) * image_height)
+    if not width > 0:
+        return posture_engine.NAN
+    height = ((left_shoulder_y - item(posture_engine.LEFT_EAR, 1)) + (right_shoulder_y - item(posture_engine.RIGHT_EAR, 1))) * 0.5
+    return height * image_height / width
+
+
+SIGNALS = {"neck_angle": neck_angle, "ear_tilt": ear_tilt, "ear_shoulder_height": ear_shoulder_height}
+
+
+# --- Streaming pieces ---
+class RepDetector:
+    """Counts reps and holds in one signal, O(1) per sample.
+
+    Parameters:
+      - direction: +1 if the exercise raises the signal above the resting baseline, -1 if it lowers it
+      - enter_delta / exit_delta: deviation from the baseline that starts / ends an active phase
+        (exit_delta < enter_delta, so jitter around one threshold doesn't count as reps)
+      - hold_s: how long an active phase must last to count as a rep
+      - smoothing_s: time constant of the signal EMA
+      - baseline_s: time constant of the resting baseline
+      - max_gap_s: an active phase without samples for this long (user left the frame) is dropped
+    """
+    def __init__(self, direction=1, enter_delta=10.0, exit_delta=5.0, hold_s=0.0, smoothing_s=0.15, baseline_s=3.0,
+                 max_gap_s=2.0):
+        self.direction = direction
+        self.enter_delta = enter_delta
+        self.exit_delta = exit_delta
+        self.hold_s = hold_s
+        self.smoothing_s = smoothing_s
+        self.baseline_s = baseline_s
+        self.max_gap_s = max_gap_s
+        self.reset()
+
+    def reset(self):
+        self.phase = RESTING
+        self.reps = 0
+        self.short = 0            # active phases that ended before hold_s
+        self.value = None         # smoothed signal
+        self.baseline = None
+        self.deviation = 0.0
+        self.active_since = None
+        self.peak = 0.0           # largest deviation of the current / last active phase
+        self.longest_hold_s = 0.0
+        self.last_time = None
+
+    @property
+    def hold_elapsed(self):
+        """Seconds in the current active phase (0 while resting)."""
+        return self.last_time - self.active_since if self.phase == ACTIVE else 0.0
+
+    def update(self, timestamp, value):
+        """Feed one sample. Returns EVENT_* or None. NaN samples are skipped."""
+        if value != value:
+            return None
+        last, self.last_time = self.last_time, timestamp
+        if self.value is None:
+            self.value = self.baseline = value
+            return None
+        dt = timestamp - last
+        if self.phase == ACTIVE and dt > self.max_gap_s:
+            self.phase = RESTING
+        self.value += (value - self.value) * (1.0 - math.exp(-max(dt, 0.0) / self.smoothing_s))
+        self.deviation = self.direction * (self.value - self.baseline)
+
+        if self.phase == RESTING:
+            if self.deviation >= self.enter_delta:
+                self.phase = ACTIVE
+                self.active_since = timestamp
+                self.peak = self.deviation
+                return EVENT_START
+            self.baseline += (self.value - self.baseline) * (1.0 - math.exp(-max(dt, 0.0) / self.baseline_s))
+            return None
+
+        if self.deviation > self.peak:
+            self.peak = self.deviation
+        if self.deviation >= self.exit_delta:
+            return None
+        self.phase = RESTING
+        held = timestamp - self.active_since
+        self.longest_hold_s = max(self.longest_hold_s, held)
+        if held >= self.hold_s:
+            self.reps += 1
+            return EVENT_REP
+        self.short += 1
+        return EVENT_SHORT
+
+
+class ExerciseSession:
+    """One guided exercise: signal extraction and RepDetector together.
+
+    Parameters:
+      - name: key of EXERCISES
+      - reps: target number of reps (default from EXERCISES)
+    """
+    def __init__(self, name, reps=None):
+        spec = EXERCISES[name]
+        self.name = name
+        self.label = spec["label"]
+        self.target = reps or spec["reps"]
+        self._signal = SIGNALS[spec["signal"]]
+        self.detector = RepDetector(spec["direction"], spec["enter_delta"], spec["exit_delta"], spec["hold_s"])
+        self.last_value = posture_engine.NAN
+
+    def update(self, frame, timestamp, image_width, image_height):
+        """Feed one (33, 4) landmark frame. Returns the RepDetector event (or None)."""
+        value = self.last_value = self._signal(frame, image_width, image_height)
+        return self.detector.update(timestamp, value)
+
+    def repeat(self, timestamp):
+        """Nothing moved (the motion gate skipped the frame): the last value still holds at `timestamp`."""
+        return self.detector.update(timestamp, self.last_value)
+
+    @property
+    def reps(self):
+        return self.detector.reps
+
+    @property
+    def done(self):
+        return self.detector.reps >= self.target
+
+    @property
+    def progress(self):
+        """0..1 for a progress bar, counting the current hold as part of a rep."""
+        detector = self.detector
+        partial = min(detector.hold_elapsed / detector.hold_s, 0.99) if detector.hold_s and detector.phase == ACTIVE else 0.0
+        return min((detector.reps + partial) / self.target, 1.0)
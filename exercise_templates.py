@@ -0,0 +1,357 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+import posture_engine
+
+# --- Matching exercises against reference recordings ---
+# A template is a reference movement (e.g. a physiotherapist's chin tuck) taken from a
+# landmark recording. Both templates and the live stream go through the same features:
+# the upper-body keypoints relative to the mid-shoulder point, divided by the shoulder
+# width, so the match doesn't depend on where the user sits or how far from the camera.
+# Every template is resampled to `length` frames over its own duration, and the live
+# window (the last window_s seconds) is resampled the same way before matching.
+#
+# TemplateLibrary precomputes, per template, the Sakoe-Chiba envelopes (upper / lower
+# bound of each feature within +-band frames) and the first / last frame. TemplateMatcher
+# then scores the live window against all templates in three steps, cheapest first:
+#   1. lower bounds for every template at once (LB_Kim: first + last frame, LB_Keogh:
+#      distance to the envelope), vectorized over templates
+#   2. banded DTW in lower-bound order, a chunk of templates at a time (NumPy over the
+#      chunk); a chunk is skipped entirely if its lower bound can't beat the best so far
+#   3. early abandoning: after each row, templates whose cost so far plus the lower bound
+#      of the remaining rows already exceeds the best are dropped
+# The result is exact (same best template and distance as DTW against every template).
+#
+# The library is an .npz file. Add templates from recordings made with RECORD_LANDMARKS:
+#   python exercise_templates.py add exercise_templates.npz recording.plm --name "chin tuck (PT)" \
+#       --exercise chin_tuck --start 12.5 --end 18
+#   python exercise_templates.py list exercise_templates.npz
+# Throughput against the number of templates: python bench_templates.py
+
+LIBRARY_PATH = "exercise_templates.npz"
+
+# Nose, ears, shoulders, elbows, wrists
+FEATURE_POINTS = np.array([posture_engine.NOSE, posture_engine.LEFT_EAR, posture_engine.RIGHT_EAR,
+                           posture_engine.LEFT_SHOULDER, posture_engine.RIGHT_SHOULDER, 13, 14, 15, 16], dtype=np.intp)
+FEATURE_SIZE = 2 * len(FEATURE_POINTS)
+_LEFT = int(np.flatnonzero(FEATURE_POINTS == posture_engine.LEFT_SHOULDER)[0])
+_RIGHT = int(np.flatnonzero(FEATURE_POINTS == posture_engine.RIGHT_SHOULDER)[0])
+
+
+def normalize(frames, image_width, image_height):
+    """(N, 33, 4) landmarks -> (N, FEATURE_SIZE) float64 features (NaN rows where points are missing)."""
+    frames = np.asarray(frames)
+    if frames.ndim == 2:
+        frames = frames[np.newaxis]
+    points = frames[:, FEATURE_POINTS, :2].astype(np.float64) * (image_width, image_height)
+    origin = (points[:, _LEFT] + points[:, _RIGHT]) * 0.5
+    delta = points[:, _LEFT] - points[:, _RIGHT]
+    width = np.hypot(delta[:, 0], delta[:, 1])
+    width[~(width > 0)] = np.nan
+    features = (points - origin[:, np.newaxis]) / width[:, np.newaxis, np.newaxis]
+    return features.reshape(len(frames), FEATURE_SIZE)
+
+
+def resample(times, features, length):
+    """Linear interpolation of (N, D) features at `length` evenly spaced times. None if too few valid frames."""
+    valid = np.isfinite(features).all(axis=1)
+    if valid.sum() < max(length // 4, 2):
+        return None
+    times, features = np.asarray(times, dtype=np.float64)[valid], features[valid]
+    grid = np.linspace(times[0], times[-1], length)
+    return np.stack([np.interp(grid, times, features[:, d]) for d in range(features.shape[1])], axis=1)
+
+
+def envelopes(templates, band):
+    """Upper / lower envelope of (T, L, D) templates over +-band frames."""
+    padded_max = np.pad(templates, ((0, 0), (band, band), (0, 0)), constant_values=-np.inf)
+    padded_min = np.pad(templates, ((0, 0), (band, band), (0, 0)), constant_values=np.inf)
+    window = 2 * band + 1
+    upper = np.lib.stride_tricks.sliding_window_view(padded_max, window, axis=1).max(axis=-1)
+    lower = np.lib.stride_tricks.sliding_window_view(padded_min, window, axis=1).min(axis=-1)
+    return upper, lower
+
+
+class TemplateLibrary:
+    """Reference sequences with precomputed lower-bound data.
+
+    Parameters:
+      - names / exercises: per-template labels (exercises are EXERCISES keys or free text)
+      - features: (T, length, FEATURE_SIZE) normalized, resampled sequences
+      - durations: seconds each template originally lasted
+      - band: Sakoe-Chiba band half-width in frames
+    """
+    def __init__(self, names, exercises, features, durations, band=3):
+        self.names = list(names)
+        self.exercises = list(exercises)
+        self.features = np.asarray(features, dtype=np.float64)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.band = band
+        self._precompute()
+
+    def _precompute(self):
+        self.length = self.features.shape[1]
+        self.upper, self.lower = envelopes(self.features, self.band)
+        self.first = self.features[:, 0]
+        self.last = self.features[:, -1]
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def empty(cls, length=32, band=3):
+        return cls([], [], np.empty((0, length, FEATURE_SIZE)), [], band)
+
+    def add(self, name, exercise_name, times, frames, image_width, image_height):
+        """Append a template from raw (N, 33, 4) landmarks and their timestamps."""
+        sequence = resample(times, normalize(frames, image_width, image_height), self.length)
+        if sequence is None:
+            raise ValueError(f"{name}: not enough frames with the upper body visible")
+        self.names.append(name)
+        self.exercises.append(exercise_name)
+        self.features = np.concatenate([self.features, sequence[np.newaxis]])
+        self.durations = np.append(self.durations, float(times[-1] - times[0]))
+        self._precompute()
+
+    def remove(self, name):
+        keep = [i for i, other in enumerate(self.names) if other != name]
+        self.names = [self.names[i] for i in keep]
+        self.exercises = [self.exercises[i] for i in keep]
+        self.features, self.durations = self.features[keep], self.durations[keep]
+        self._precompute()
+
+    def save(self, path=LIBRARY_PATH):
+        np.savez(path, names=np.array(self.names, dtype=str), exercises=np.array(self.exercises, dtype=str),
+                 features=self.features, durations=self.durations, band=self.band)
+
+    @classmethod
+    def load(cls, path=LIBRARY_PATH):
+        with np.load(path) as data:
+            return cls(data["names"].tolist(), data["exercises"].tolist(), data["features"], data["durations"],
+                       int(data["band"]))
+
+
+# --- DTW ---
+def lower_bounds(query, library):
+    """(lb per template (T,), LB_Keogh per template and row (T, L)) for a (L, D) query."""
+    above = np.maximum(query - library.upper, 0.0)
+    below = np.maximum(library.lower - query, 0.0)
+    rows = (above * above + below * below).sum(axis=2)
+    keogh = rows.sum(axis=1)
+    kim = ((query[0] - library.first) ** 2).sum(axis=1) + ((query[-1] - library.last) ** 2).sum(axis=1)
+    return np.maximum(keogh, kim), rows
+
+
+def banded_dtw(query, templates, band, best=np.inf, row_bounds=None):
+    """Banded DTW (squared Euclidean cost) of a (L, D) query against (T, L, D) templates.
+
+    Templates whose cost can no longer get below `best` are abandoned (distance inf).
+    row_bounds: (T, L) per-row lower bounds (LB_Keogh rows) for tighter abandoning.
+    Returns (distances (T,), rows computed) - rows counts template-rows actually evaluated.
+    """
+    count, length, _ = templates.shape
+    distances = np.full(count, np.inf)
+    if count == 0:
+        return distances, 0
+    width = 2 * band + 1
+    # Band coordinates: cell k of row i is column j = i + k - band
+    columns = np.arange(length)[:, np.newaxis] + np.arange(-band, band + 1)
+    inside = (columns >= 0) & (columns < length)
+    difference = templates[:, np.clip(columns, 0, length - 1)] - query[:, np.newaxis]
+    cost = np.einsum("tlkd,tlkd->tlk", difference, difference)
+    cost[:, ~inside] = np.inf
+    if row_bounds is not None:
+        # remaining[t, i] = lower bound of the cost still to come after row i
+        remaining = np.cumsum(row_bounds[:, ::-1], axis=1)[:, ::-1]
+        remaining = np.concatenate([remaining[:, 1:], np.zeros((count, 1))], axis=1)
+    else:
+        remaining = np.zeros((count, length))
+    alive = np.arange(count)
+    previous = np.full((count, width + 1), np.inf)
+    previous[:, band] = 0.0  # D[-1, -1]
+    rows = 0
+    for i in range(length):
+        # diagonal D[i-1, j-1] is previous[k], up D[i-1, j] is previous[k+1]
+        reach = np.minimum(previous[:, :width], previous[:, 1:])
+        current = np.empty_like(previous)
+        current[:, width] = np.inf
+        left = np.full(len(alive), np.inf)
+        row_cost = cost[:, i]
+        for k in range(width):
+            left = row_cost[:, k] + np.minimum(reach[:, k], left)
+            current[:, k] = left
+        rows += len(alive)
+        if best < np.inf:
+            keep = current[:, :width].min(axis=1) + remaining[:, i] < best
+            if not keep.all():
+                alive, current, cost, remaining = alive[keep], current[keep], cost[keep], remaining[keep]
+                if not len(alive):
+                    return distances, rows
+        previous = current
+    distances[alive] = previous[:, band]
+    return distances, rows
+
+
+class Match:
+    __slots__ = ("index", "name", "exercise", "distance", "score", "timestamp")
+
+    def __init__(self, index, name, exercise_name, distance, score, timestamp):
+        self.index = index
+        self.name = name
+        self.exercise = exercise_name
+        self.distance = distance
+        self.score = score
+        self.timestamp = timestamp
+
+
+class TemplateMatcher:
+    """Streaming matcher: push() every frame, match() every hop_s.
+
+    Parameters:
+      - library: TemplateLibrary
+      - window_s: live window length (default: median template duration)
+      - hop_s: how often match() actually runs
+      - capacity: frames kept in the ring buffer (must cover window_s at the camera rate)
+      - chunk: templates per DTW batch
+      - score_scale: RMS distance per frame (in shoulder widths) that scores 1/e
+    """
+    def __init__(self, library, window_s=None, hop_s=0.5, capacity=512, chunk=8, score_scale=0.25):
+        self.library = library
+        self.window_s = window_s or (float(np.median(library.durations)) if len(library) else 5.0)
+        self.hop_s = hop_s
+        self.chunk = chunk
+        self.score_scale = score_scale
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._features = np.full((capacity, FEATURE_SIZE), np.nan, dtype=np.float64)
+        self._count = 0
+        self._next_match = None
+        self.last = None
+        # Work counters: matches run, templates pruned by their lower bound, DTW rows computed
+        self.matches = 0
+        self.pruned = 0
+        self.dtw_rows = 0
+        self.match_seconds = 0.0
+
+    def push(self, frame, timestamp, image_width, image_height):
+        """Add one (33, 4) landmark frame (O(1))."""
+        index = self._count % len(self._times)
+        self._times[index] = timestamp
+        self._features[index] = normalize(frame, image_width, image_height)[0]
+        self._count += 1
+
+    def due(self, timestamp):
+        return len(self.library) and (self._next_match is None or timestamp >= self._next_match)
+
+    def window(self, timestamp):
+        """The resampled live window ending at `timestamp`, or None."""
+        count = min(self._count, len(self._times))
+        if count < 2:
+            return None
+        order = (np.arange(self._count - count, self._count)) % len(self._times)
+        times = self._times[order]
+        start = np.searchsorted(times, timestamp - self.window_s)
+        if times[-1] - times[start] < self.window_s * 0.8:
+            return None
+        return resample(times[start:], self._features[order[start:]], self.library.length)
+
+    def match(self, timestamp):
+        """Score the live window against every template. Returns a Match (also kept in self.last) or None."""
+        self._next_match = timestamp + self.hop_s
+        query = self.window(timestamp)
+        if query is None:
+            return None
+        started = time.perf_counter()
+        index, distance = self.best(query)
+        self.match_seconds += time.perf_counter() - started
+        self.matches += 1
+        library = self.library
+        rms = np.sqrt(distance / library.length)
+        self.last = Match(index, library.names[index], library.exercises[index], float(rms),
+                          float(np.exp(-rms / self.score_scale)), timestamp)
+        return self.last
+
+    def best(self, query):
+        """(template index, DTW distance) of the closest template to a resampled (L, D) query."""
+        library = self.library
+        bounds, row_bounds = lower_bounds(query, library)
+        order = np.argsort(bounds)
+        best_index, best = -1, np.inf
+        # The template with the smallest lower bound first, alone: it usually sets a tight bound
+        start = 0
+        while start < len(order):
+            if bounds[order[start]] >= best:
+                # Sorted by lower bound: nothing after this can beat the best either
+                self.pruned += len(order) - start
+                break
+            size = 1 if start == 0 else self.chunk
+            candidates = order[start:start + size]
+            start += size
+            keep = bounds[candidates] < best
+            self.pruned += int((~keep).sum())
+            candidates = candidates[keep]
+            distances, rows = banded_dtw(query, library.features[candidates], library.band, best,
+                                         row_bounds[candidates])
+            self.dtw_rows += rows
+            i = int(np.argmin(distances))
+            if distances[i] < best:
+                best_index, best = int(candidates[i]), float(distances[i])
+        return best_index, best
+
+    def format_stats(self):
+        average = self.match_seconds / self.matches * 1000.0 if self.matches else 0.0
+        return (f"{self.matches} matches against {len(self.library)} templates, {average:.2f} ms each, "
+                f"{self.pruned} templates pruned by lower bound, {self.dtw_rows} DTW rows")
+
+
+# --- Command line ---
+def load_or_empty(path, length, band):
+    return TemplateLibrary.load(path) if os.path.exists(path) else TemplateLibrary.empty(length, band)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the exercise template library.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="add a template from a landmark recording (landmark_recording.py)")
+    add.add_argument("library")
+    add.add_argument("recording")
+    add.add_argument("--name", required=True)
+    add.add_argument("--exercise", required=True, help="e.g. chin_tuck, neck_stretch, shoulder_shrug")
+    add.add_argument("--start", type=float, default=0.0, help="seconds since the start of the recording")
+    add.add_argument("--end", type=float, help="seconds since the start of the recording (default: the end)")
+    add.add_argument("--length", type=int, default=32, help="frames per template (new library only)")
+    add.add_argument("--band", type=int, default=3, help="DTW band in frames (new library only)")
+    remove = commands.add_parser("remove", help="remove a template by name")
+    remove.add_argument("library")
+    remove.add_argument("name")
+    listing = commands.add_parser("list", help="list the templates")
+    listing.add_argument("library")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        import landmark_recording
+        library = load_or_empty(args.library, args.length, args.band)
+        recording = landmark_recording.LandmarkRecording(args.recording)
+        end = recording.duration + 1.0 if args.end is None else args.end
+        times, frames = recording.window(args.start, end)
+        library.add(args.name, args.exercise, times, np.asarray(frames, dtype=np.float32),
+                    recording.image_width, recording.image_height)
+        recording.close()
+        library.save(args.library)
+        print(f"Added {args.name!r} ({len(times)} frames, {library.durations[-1]:.1f} s); {len(library)} templates")
+    elif args.command == "remove":
+        library = TemplateLibrary.load(args.library)
+        library.remove(args.name)
+        library.save(args.library)
+        print(f"{len(library)} templates left")
+    else:
+        library = TemplateLibrary.load(args.library)
+        print(f"{len(library)} templates, {library.length} frames each, band {library.band}")
+        for name, exercise_name, duration in zip(library.names, library.exercises, library.durations):
+            print(f"  {name:<30} {exercise_name:<16} {duration:5.1f} s")
+
+
+if __name__ == "__main__":
+    main()
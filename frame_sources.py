@@ -0,0 +1,212 @@
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+import cadence
+import posture_engine as pe
+
+# --- Stand-ins for the webcam and the Pose model ---
+# Used by bench_suite.py (and anything else that needs to run without hardware):
+#   - VideoFileSource: replays a video file through the cv2.VideoCapture interface,
+#     either at its real frame rate or as fast as possible.
+#   - SyntheticSource: generated frames, for when there is no video at hand.
+#   - FixturePose: returns recorded landmarks instead of running MediaPipe.
+#   - synthetic_fixture: a generated seated session, for when there is no recording either.
+# Landmark fixtures use the .npz layout written by analyze_videos.py:
+# "landmarks" (N, 33, 4) float32 and "time_s" (N,) float64.
+
+SESSION_FPS = 30.0
+# Nose height (normalized y) and left shoulder drop for each posture in synthetic sessions
+SESSION_POSES = {
+    pe.STATUS_CORRECT: (0.08, 0.0),
+    pe.STATUS_FORWARD_HEAD: (0.25, 0.0),
+    pe.STATUS_LEANING: (0.08, 0.08),
+}
+
+
+class VideoFileSource:
+    """Drop-in for cv2.VideoCapture that replays a video file.
+
+    Parameters:
+      - realtime: True paces read() to the file's FPS (like a camera); False reads at max speed.
+      - loop: start again from the first frame at the end of the file.
+      - max_frames: stop after this many frames (None = whole file, or forever with loop).
+    """
+    def __init__(self, path, realtime=True, loop=False, max_frames=None):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.max_frames = max_frames
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frames_read = 0
+        self._start = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def grab(self):
+        if self.max_frames is not None and self.frames_read >= self.max_frames:
+            return False
+        ret = self.cap.grab()
+        if not ret and self.loop and self.frames_read > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret = self.cap.grab()
+        if not ret:
+            return False
+        if self.realtime:
+            # Deliver frame i no earlier than i / fps seconds after the first read, like a camera
+            if self._start is None:
+                self._start = time.monotonic()
+            delay = self._start + self.frames_read / self.fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames_read += 1
+        return True
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource:
+    """Camera stand-in that needs no file: cycles through a few generated noise frames."""
+    def __init__(self, width=640, height=480, fps=30.0, frames=300, realtime=False, seed=0):
+        rng = np.random.default_rng(seed)
+        self._pool = [rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8) for _ in range(8)]
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.max_frames = frames
+        self.realtime = realtime
+        self.frames_read = 0
+        self._start = None
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def grab(self):
+        if not self._open or (self.max_frames is not None and self.frames_read >= self.max_frames):
+            return False
+        if self.realtime:
+            if self._start is None:
+                self._start = time.monotonic()
+            delay = self._start + self.frames_read / self.fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames_read += 1
+        return True
+
+    def retrieve(self):
+        if not self._open or not self.frames_read:
+            return False, None
+        # Copy so callers can draw on the frame like a real capture
+        return True, self._pool[(self.frames_read - 1) % len(self._pool)].copy()
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.width, cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv2.CAP_PROP_FPS: self.fps, cv2.CAP_PROP_FRAME_COUNT: self.max_frames or 0}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self._open = False
+
+
+# --- Landmark fixtures ---
+def load_landmark_fixture(path):
+    """(landmarks, timestamps) from an .npz fixture."""
+    with np.load(path) as data:
+        landmarks = data["landmarks"].astype(np.float32)
+        timestamps = data["time_s"] if "time_s" in data else np.arange(len(landmarks)) / 30.0
+    return landmarks, timestamps
+
+
+def save_landmark_fixture(path, landmarks, timestamps):
+    np.savez_compressed(path, landmarks=np.asarray(landmarks, dtype=np.float32), time_s=np.asarray(timestamps))
+
+
+class FixturePose:
+    """Stand-in for mp.solutions.pose.Pose that replays fixture landmarks, one frame per process() call.
+
+    The image is ignored, so run it with ROI tracking disabled. Landmark lists are MediaPipe
+    NormalizedLandmarkList objects (mp_drawing can draw them), which needs the mediapipe package.
+    """
+    def __init__(self, landmarks):
+        self.landmarks = np.asarray(landmarks, dtype=np.float32)
+        self.calls = 0
+
+    def process(self, image):
+        frame = self.landmarks[self.calls % len(self.landmarks)]
+        self.calls += 1
+        if np.isnan(frame[:, 0]).all():
+            return SimpleNamespace(pose_landmarks=None)
+        return SimpleNamespace(pose_landmarks=cadence.to_landmark_list(frame))
+
+    def reset(self):
+        self.calls = 0
+
+    def close(self):
+        pass
+
+
+def synthetic_fixture(minutes=1.0, seed=0):
+    """(landmarks, timestamps) for a seated user switching posture every 20-120 seconds, at SESSION_FPS."""
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * SESSION_FPS)
+    timestamps = np.arange(n) / SESSION_FPS
+
+    # Target nose height / shoulder drop per frame, with 1 second transitions
+    nose_y = np.empty(n)
+    drop = np.empty(n)
+    i = 0
+    state = SESSION_POSES[pe.STATUS_CORRECT]
+    while i < n:
+        length = int(rng.uniform(20, 120) * SESSION_FPS)
+        target = SESSION_POSES[rng.choice(list(SESSION_POSES))]
+        ramp = min(int(SESSION_FPS), n - i)
+        nose_y[i:i + ramp] = np.linspace(state[0], target[0], ramp)
+        drop[i:i + ramp] = np.linspace(state[1], target[1], ramp)
+        nose_y[i + ramp:i + length] = target[0]
+        drop[i + ramp:i + length] = target[1]
+        state = target
+        i += length
+
+    base = rng.uniform(0.35, 0.65, size=(pe.LANDMARK_COUNT, pe.LANDMARK_FIELDS)).astype(np.float32)
+    base[:, 3] = 0.99
+    base[pe.LEFT_EAR, :2] = (0.56, 0.30)
+    base[pe.RIGHT_EAR, :2] = (0.44, 0.30)
+    base[pe.LEFT_SHOULDER, :2] = (0.62, 0.55)
+    base[pe.RIGHT_SHOULDER, :2] = (0.38, 0.55)
+    frames = np.repeat(base[np.newaxis], n, axis=0)
+    frames[:, pe.NOSE, 0] = 0.5
+    frames[:, pe.NOSE, 1] = nose_y
+    frames[:, pe.LEFT_SHOULDER, 1] += drop
+
+    # Slow body sway plus per-frame detector noise
+    sway = 0.01 * np.sin(2 * np.pi * timestamps / 7.0)
+    frames[:, :, 0] += sway[:, np.newaxis]
+    frames[:, :, :2] += rng.normal(0, 0.001, size=(n, pe.LANDMARK_COUNT, 2))
+    return frames, timestamps
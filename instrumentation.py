@@ -0,0 +1,171 @@
+import collections
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+# --- Hot-path instrumentation ---
+# StageProfiler times named stages (capture, flip, color conversion, pose.process, ...) with
+# time.perf_counter(), a monotonic high resolution clock. For every stage it keeps:
+#   - a ring of the most recent samples, for rolling p50/p95/max in the overlay
+#   - a cumulative histogram with log-spaced buckets, for the dump on exit
+# Recording a sample is a few array writes, so it can stay on in production.
+#
+# SamplingProfiler is an on-demand stack sampler for chasing regressions in the field:
+# it periodically samples every thread's stack and writes them as "folded" stacks
+# (one "frame;frame;frame count" line per stack) that flamegraph tools can read.
+
+# Histogram bucket edges in seconds: 10 us .. 10 s, 4 buckets per decade
+HISTOGRAM_EDGES = np.logspace(-5, 1, 25)
+
+
+class StageStats:
+    """Rolling window and cumulative histogram for one stage. Written from a single thread."""
+    def __init__(self, window):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.histogram = np.zeros(len(HISTOGRAM_EDGES) + 1, dtype=np.int64)
+
+    def add(self, seconds):
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.total += seconds
+        self.histogram[np.searchsorted(HISTOGRAM_EDGES, seconds)] += 1
+
+    def recent(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def summary(self):
+        recent = self.recent()
+        if not len(recent):
+            return {"count": 0}
+        p50, p95 = np.percentile(recent, [50, 95])
+        return {
+            "count": self.count,
+            "mean_ms": 1000.0 * self.total / self.count,
+            "p50_ms": 1000.0 * p50,
+            "p95_ms": 1000.0 * p95,
+            "max_ms": 1000.0 * recent.max(),
+        }
+
+
+class StageProfiler:
+    """Per-stage timings. Stages appear in the order they are first recorded.
+
+    Usage:
+        start = profiler.clock()
+        ... work ...
+        profiler.record("pose.process", profiler.clock() - start)
+    """
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, window=300, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.stages = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        if not self.enabled:
+            return
+        stats = self.stages.get(stage)
+        if stats is None:
+            with self._lock:
+                stats = self.stages.setdefault(stage, StageStats(self.window))
+        stats.add(seconds)
+
+    def summary(self):
+        return {stage: stats.summary() for stage, stats in list(self.stages.items())}
+
+    def overlay_lines(self):
+        lines = []
+        for stage, s in self.summary().items():
+            if s["count"]:
+                lines.append(f"{stage:<14} p50 {s['p50_ms']:6.2f}  p95 {s['p95_ms']:6.2f}  max {s['max_ms']:6.2f} ms")
+        return lines
+
+    def draw_overlay(self, image, origin=(20, 150), line_height=18):
+        """Draw the rolling stage timings onto a BGR image."""
+        import cv2  # only needed for the overlay; keeps cv2 out of ui.py's startup imports
+        x, y = origin
+        for line in self.overlay_lines():
+            cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1, cv2.LINE_AA)
+            y += line_height
+
+    def dump(self, path):
+        """Write summaries and cumulative histograms to a JSON file."""
+        data = {
+            "histogram_edges_ms": (HISTOGRAM_EDGES * 1000.0).tolist(),
+            "stages": {},
+        }
+        for stage, stats in list(self.stages.items()):
+            data["stages"][stage] = dict(stats.summary(), histogram=stats.histogram.tolist())
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads every `interval` seconds while running."""
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, path=None):
+        """Stop sampling; write folded stacks to `path` if given. Returns the number of samples."""
+        if self._thread is None:
+            return 0
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        if path:
+            with open(path, "w") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        return self.samples
+
+    def toggle(self, path):
+        """Start if stopped, otherwise stop and write to `path`. Returns True if now running."""
+        if self.running:
+            self.stop(path)
+            return False
+        self.start()
+        return True
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]})")
+                    frame = frame.f_back
+                parts.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
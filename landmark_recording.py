@@ -0,0 +1,283 @@
+import argparse
+import itertools
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+import posture_engine
+import posture_rules
+
+# --- Landmark recordings ---
+# The raw pose stream (33 x (x, y, z, visibility) per frame) for regression analysis and
+# threshold tuning, in a file that can be memory-mapped directly:
+#
+#   header   64 bytes: magic "PLMK", version, bytes per value (2 = float16, 4 = float32),
+#            records per chunk, image width/height, start time (time.time()), record count
+#   records  fixed size: float32 seconds since the start time + (33, 4) landmarks
+#
+# LandmarkRecorder appends records one chunk at a time (one write() per chunk_records
+# frames) and updates the record count in the header after each chunk, so a reader only
+# ever sees complete records, even while the recording is still running.
+# LandmarkRecording maps the records with np.memmap: timestamps and landmarks are
+# zero-copy views, and a one-second bucket index makes seek by time O(1).
+#
+# Size: float16 records are 268 bytes. Only frames where the model actually ran are
+# recorded (cadence keyframes, 2-15 Hz), so an 8 h day at an average of 4 Hz is ~31 MB.
+#
+# Usage:
+#   python landmark_recording.py info recordings/landmarks-20240101-090000.plm
+#   python landmark_recording.py analyze recording.plm --neck 160 165 170 --shoulder 0.04 0.05 0.06
+# `analyze` scores with the posture rules (posture_rules.json or the built-in ones), like
+# the live app; --shoulder is then in the unit of the "leaning" rule (a fraction of the
+# image height by default). --legacy uses posture_engine's thresholds, with pixels.
+
+MAGIC = b"PLMK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIdQ")
+HEADER_SIZE = 64
+COUNT_OFFSET = HEADER.size - 8
+
+
+def record_dtype(value_size=2):
+    """numpy dtype of one record: t (float32 seconds since start) and landmarks (33, 4)."""
+    value = {2: "<f2", 4: "<f4"}[value_size]
+    return np.dtype([("t", "<f4"),
+                     ("landmarks", value, (posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS))])
+
+
+class LandmarkRecorder:
+    """Appends (33, 4) landmark frames to a recording. append() and close() are thread-safe.
+
+    Parameters:
+      - path: output file (overwritten)
+      - image_width, image_height: frame size the normalized landmarks refer to
+      - value_size: 2 stores float16 (about 0.0005 resolution, ~0.3 px at 640), 4 stores float32
+      - chunk_records: frames buffered in memory before one write
+      - start_time: time.time() of t = 0 (default: now)
+    """
+    def __init__(self, path, image_width, image_height, value_size=2, chunk_records=4096, start_time=None):
+        self.path = path
+        self.dtype = record_dtype(value_size)
+        self.start_time = time.time() if start_time is None else start_time
+        self.count = 0
+        self._chunk = np.empty(chunk_records, dtype=self.dtype)
+        self._pending = 0
+        self._last_t = 0.0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "wb")
+        header = HEADER.pack(MAGIC, VERSION, value_size, chunk_records, image_width, image_height, self.start_time, 0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def append(self, frame, timestamp=None):
+        """Add one (33, 4) frame (all NaN = no person). timestamp is time.time(), default now."""
+        t = (time.time() if timestamp is None else timestamp) - self.start_time
+        with self._lock:
+            if self._file is None:
+                return
+            # Timestamps must not go backwards for seek(); a clock adjustment just repeats the last one
+            t = max(t, self._last_t)
+            self._last_t = t
+            record = self._chunk[self._pending]
+            record["t"] = t
+            record["landmarks"] = frame
+            self._pending += 1
+            if self._pending == len(self._chunk):
+                self._write_chunk()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._write_chunk()
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._write_chunk()
+            self._file.close()
+            self._file = None
+
+    def _write_chunk(self):
+        if not self._pending:
+            return
+        self._file.write(self._chunk[:self._pending].tobytes())
+        self.count += self._pending
+        self._pending = 0
+        # Publish the new record count only after the records themselves are written
+        self._file.flush()
+        self._file.seek(COUNT_OFFSET)
+        self._file.write(struct.pack("<Q", self.count))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+
+
+class LandmarkRecording:
+    """Read-only memory-mapped view of a recording.
+
+    Attributes:
+      - timestamps: float32 (N,) seconds since start_time (a view into the file)
+      - landmarks: (N, 33, 4) float16/float32 (a view into the file)
+      - image_width, image_height, start_time, value_size
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+            raise ValueError(f"{path} is not a landmark recording")
+        (_, version, self.value_size, self.chunk_records, self.image_width, self.image_height,
+         self.start_time, count) = HEADER.unpack(header[:HEADER.size])
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported recording version {version}")
+        self.dtype = record_dtype(self.value_size)
+        # The file may hold a chunk being written after the header's count; map only complete records
+        available = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+        count = min(count, available)
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+        self.timestamps = self.records["t"]
+        self.landmarks = self.records["landmarks"]
+        # _index[s] = first record at or after second s
+        seconds = int(np.ceil(self.timestamps[-1])) + 1 if count else 1
+        self._index = np.searchsorted(self.timestamps, np.arange(seconds + 1, dtype=np.float32))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1]) if len(self) else 0.0
+
+    def seek(self, seconds):
+        """Index of the first record at or after `seconds` since the start."""
+        if seconds <= 0:
+            return 0
+        if seconds >= len(self._index) - 1:
+            return len(self)
+        i = int(self._index[int(seconds)])
+        end = int(self._index[int(seconds) + 1])
+        # At most one second's worth of frames to step over
+        while i < end and self.timestamps[i] < seconds:
+            i += 1
+        return i
+
+    def window(self, start_s, end_s):
+        """(timestamps, landmarks) views for start_s <= t < end_s."""
+        i, j = self.seek(start_s), self.seek(end_s)
+        return self.timestamps[i:j], self.landmarks[i:j]
+
+    def blocks(self, block_frames=65536, start=0, stop=None):
+        """Yield landmark views of at most block_frames records (bounded memory for analysis)."""
+        stop = len(self) if stop is None else stop
+        for i in range(start, stop, block_frames):
+            yield self.landmarks[i:min(i + block_frames, stop)]
+
+    def close(self):
+        mmap = getattr(self.records, "_mmap", None)
+        self.records = self.timestamps = self.landmarks = None
+        if mmap is not None:
+            mmap.close()
+
+
+NECK_RULE = "forward_head"
+SHOULDER_RULE = "leaning"
+
+
+def sweep(recording, neck_thresholds, shoulder_thresholds, block_frames=65536, start=0, stop=None, rules=None):
+    """Status counts for every (neck, shoulder) threshold pair over the recording.
+
+    With `rules` (a posture_rules.RuleSet) each pair replaces the thresholds of its
+    NECK_RULE and SHOULDER_RULE rules; without, posture_engine's classifier is used.
+    Either way the values are measured once per block (measure_batch) and classified
+    with each pair, so extra pairs cost little. Returns {(neck, shoulder): counts by status}.
+    """
+    pairs = list(itertools.product(neck_thresholds, shoulder_thresholds))
+    counts = {pair: np.zeros(len(posture_engine.STATUS_LABELS_SHORT), dtype=np.int64) for pair in pairs}
+    for block in recording.blocks(block_frames, start, stop):
+        if rules is not None:
+            measured = rules.measure_batch(block, recording.image_width, recording.image_height)
+        else:
+            measurements = posture_engine.measure_batch(block, recording.image_width, recording.image_height)
+        for pair in pairs:
+            if rules is not None:
+                status = rules.classify_batch(measured, {NECK_RULE: pair[0], SHOULDER_RULE: pair[1]})
+            else:
+                status = posture_engine.classify_batch(measurements, *pair)
+            counts[pair] += np.bincount(status, minlength=len(counts[pair]))
+    return counts
+
+
+# --- Command line ---
+def command_info(args):
+    recording = LandmarkRecording(args.recording)
+    size = os.path.getsize(args.recording)
+    print(f"{args.recording}: {len(recording)} frames, {recording.duration / 3600:.2f} h, "
+          f"{recording.image_width}x{recording.image_height}, float{recording.value_size * 8}, {size / 1e6:.1f} MB")
+    print(f"started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(recording.start_time))}"
+          f", {len(recording) / max(recording.duration, 1e-9):.1f} frames/s on average")
+    recording.close()
+
+
+def command_analyze(args):
+    recording = LandmarkRecording(args.recording)
+    start = recording.seek(args.start) if args.start is not None else 0
+    stop = recording.seek(args.end) if args.end is not None else len(recording)
+    if args.legacy:
+        rules = None
+        neck = args.neck or [posture_engine.THRESHOLD_NECK_FORWARD]
+        shoulder = args.shoulder or [posture_engine.THRESHOLD_SHOULDER_ASYMMETRY]
+    else:
+        rules = posture_rules.load_rules_or_defaults(args.rules)
+        thresholds = rules.thresholds
+        for name, values in ((NECK_RULE, args.neck), (SHOULDER_RULE, args.shoulder)):
+            if values and name not in thresholds:
+                print(f"note: no enabled rule named {name!r}, its thresholds have no effect")
+        neck = args.neck or [thresholds.get(NECK_RULE, posture_engine.NAN)]
+        shoulder = args.shoulder or [thresholds.get(SHOULDER_RULE, posture_engine.NAN)]
+    began = time.perf_counter()
+    counts = sweep(recording, neck, shoulder, args.block, start, stop, rules)
+    elapsed = time.perf_counter() - began
+    frames = stop - start
+
+    statuses = sorted(set(posture_engine.STATUS_LABELS_SHORT) - {posture_engine.STATUS_EXERCISING})
+    print(f"{'neck':>6}{'shoulder':>10}" + "".join(f"{posture_engine.STATUS_LABELS_SHORT[s][:18]:>20}" for s in statuses))
+    for (n, sh), c in counts.items():
+        total = max(int(c.sum()), 1)
+        print(f"{n:>6g}{sh:>10g}" + "".join(f"{c[s] / total:>20.1%}" for s in statuses))
+    read_mb = frames * recording.dtype.itemsize / 1e6
+    print(f"{frames} frames x {len(counts)} threshold pairs in {elapsed:.2f} s "
+          f"({frames / max(elapsed, 1e-9):,.0f} frames/s, {read_mb / max(elapsed, 1e-9):,.0f} MB/s)")
+    recording.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect landmark recordings and re-run posture analysis on them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="frames, duration and size of a recording")
+    info.add_argument("recording")
+    info.set_defaults(run=command_info)
+    analyze = commands.add_parser("analyze", help="status breakdown for one or more threshold pairs")
+    analyze.add_argument("recording")
+    analyze.add_argument("--neck", type=float, nargs="+", help="neck angle thresholds (degrees)")
+    analyze.add_argument("--shoulder", type=float, nargs="+",
+                         help="shoulder difference thresholds, in the unit of the leaning rule (pixels with --legacy)")
+    analyze.add_argument("--rules", default=posture_rules.RULES_PATH, help="posture rules file (built-in rules if it does not exist)")
+    analyze.add_argument("--legacy", action="store_true", help="posture_engine's built-in thresholds instead of the rules")
+    analyze.add_argument("--start", type=float, help="seconds from the start of the recording")
+    analyze.add_argument("--end", type=float, help="seconds from the start of the recording")
+    analyze.add_argument("--block", type=int, default=65536, help="frames analysed per block")
+    analyze.set_defaults(run=command_analyze)
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
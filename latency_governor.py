@@ -0,0 +1,141 @@
+import collections
+import threading
+import time
+
+import cv2
+
+# --- Latency-budget governor ---
+# One fixed model_complexity / input resolution is too slow on old laptops and needlessly
+# inaccurate on workstations. LatencyGovernor measures the rolling inference latency and
+# moves through MODES to stay inside a per-frame budget:
+#   - mean latency above the budget            -> one step cheaper
+#   - mean latency below headroom * the budget -> one step more accurate
+# A new Pose instance (needed when model_complexity changes) is built on a background
+# thread and swapped in when ready, so the inference thread never waits for it.
+
+# (model_complexity, longest input side in pixels or None for the camera resolution),
+# ordered from cheapest to most accurate
+MODES = [
+    (0, 256),
+    (0, 384),
+    (1, 384),
+    (1, 512),
+    (1, None),
+    (2, None),
+]
+DEFAULT_MODE = 4  # model_complexity=1 at full resolution, same as before
+
+
+class LatencyGovernor:
+    """Picks the Pose model and input size for each inference. Use from the inference thread.
+
+    Parameters:
+      - build_pose: function(model_complexity) -> a new mp.solutions.pose.Pose
+      - budget_ms: target inference time per frame
+      - window: number of inferences averaged before deciding
+      - headroom: step up only when the mean is below headroom * budget
+      - cooldown_s: minimum time between switches
+    """
+    def __init__(self, build_pose, budget_ms=50.0, window=20, headroom=0.6, cooldown_s=3.0, mode=DEFAULT_MODE):
+        self.build_pose = build_pose
+        self.budget = budget_ms / 1000.0
+        self.headroom = headroom
+        self.cooldown_s = cooldown_s
+        self.latencies = collections.deque(maxlen=window)
+        self.mode = mode
+        self.pose = build_pose(MODES[mode][0])
+        self.switches = 0
+        self._lock = threading.Lock()
+        self._pending = None       # (mode, pose) built in the background, waiting to be swapped in
+        self._building = False
+        self._last_switch = time.monotonic()
+
+    @property
+    def model_complexity(self):
+        return MODES[self.mode][0]
+
+    @property
+    def max_side(self):
+        return MODES[self.mode][1]
+
+    @property
+    def mean_latency_ms(self):
+        return 1000.0 * sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    @property
+    def mode_label(self):
+        side = f"{self.max_side}px" if self.max_side else "full"
+        return f"c{self.model_complexity} {side} {self.mean_latency_ms:.0f}ms"
+
+    def prepare(self, image):
+        """Downscale the image for the current mode (landmarks are normalized, so no mapping is needed)."""
+        self._swap_pending()
+        max_side = self.max_side
+        height, width = image.shape[:2]
+        if max_side is None or max(height, width) <= max_side:
+            return image
+        scale = max_side / max(height, width)
+        return cv2.resize(image, (max(int(width * scale), 1), max(int(height * scale), 1)), interpolation=cv2.INTER_AREA)
+
+    def process(self, image):
+        """Run the current Pose model on an RGB image and record how long it took."""
+        start = time.monotonic()
+        results = self.pose.process(image)
+        self.record(time.monotonic() - start)
+        return results
+
+    def record(self, latency_s):
+        self.latencies.append(latency_s)
+        now = time.monotonic()
+        if len(self.latencies) < self.latencies.maxlen or self._building or now - self._last_switch < self.cooldown_s:
+            return
+        mean = sum(self.latencies) / len(self.latencies)
+        if mean > self.budget and self.mode > 0:
+            self._switch(self.mode - 1)
+        elif mean < self.headroom * self.budget and self.mode < len(MODES) - 1:
+            self._switch(self.mode + 1)
+
+    def close(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            pending[1].close()
+        self.pose.close()
+
+    # --- Switching ---
+    def _switch(self, mode):
+        self._last_switch = time.monotonic()
+        self.latencies.clear()
+        if MODES[mode][0] == self.model_complexity:
+            # Same model, different input size: switch immediately
+            self.mode = mode
+            self.switches += 1
+            return
+        self._building = True
+        threading.Thread(target=self._build, args=(mode,), name="pose-builder", daemon=True).start()
+
+    def _build(self, mode):
+        try:
+            pose = self.build_pose(MODES[mode][0])
+        except Exception as e:
+            print(f"Error building Pose model: {e}")
+            self._building = False
+            return
+        with self._lock:
+            self._pending = (mode, pose)
+
+    def _swap_pending(self):
+        if self._pending is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        old = self.pose
+        self.mode, self.pose = pending
+        self.switches += 1
+        self._building = False
+        self._last_switch = time.monotonic()
+        self.latencies.clear()
+        # Closing the old graph can take a moment too, so do it off the inference thread
+        threading.Thread(target=old.close, daemon=True).start()
@@ -0,0 +1,127 @@
+import time
+
+import cv2
+import numpy as np
+
+# --- Motion / presence gate in front of the Pose model ---
+# Deciding whether anything changed is far cheaper than running Pose: the frame is
+# shrunk to 64x48 grayscale and compared with the frame the model last saw.
+#   - static scene  -> reuse the last result (the model runs again after refresh_s anyway)
+#   - no person for idle_after_s -> idle: the caller lowers the frame rate to idle_fps and
+#     the model only runs on motion or every idle_refresh_s
+# The gate also keeps track of when a person was actually in front of the camera, so the
+# posture timer can count sitting time instead of wall-clock time.
+
+GATE_SIZE = (64, 48)
+
+
+class MotionGate:
+    """Decides per frame whether inference is needed. Use from the inference thread.
+
+    Parameters:
+      - pixel_threshold: gray level change (0-255) for a pixel to count as changed
+      - motion_threshold: fraction of changed pixels that counts as motion
+      - refresh_s: longest a result is reused while the scene is static
+      - idle_after_s: seconds without a person before going idle
+      - idle_fps: frame rate the caller should drop to while idle
+      - idle_refresh_s: longest a result is reused while idle
+      - enabled: False passes every frame (and never goes idle)
+    """
+    def __init__(self, pixel_threshold=12, motion_threshold=0.01, refresh_s=5.0, idle_after_s=10.0,
+                 idle_fps=2.0, idle_refresh_s=10.0, enabled=True, clock=time.monotonic):
+        self.pixel_threshold = pixel_threshold
+        self.motion_threshold = motion_threshold
+        self.refresh_s = refresh_s
+        self.idle_after_s = idle_after_s
+        self.idle_fps = idle_fps
+        self.idle_refresh_s = idle_refresh_s
+        self.enabled = enabled
+        self.clock = clock
+        self.motion = 0.0          # fraction of changed pixels in the last checked frame
+        self.frames = 0
+        self.passed = 0
+        self.person_present = False
+        self.last_seen = None      # when a person was last detected
+        self.away_seconds = 0.0    # total time with the camera running but nobody detected
+        self._reference = None     # small gray frame the model last ran on
+        self._last_pass = None
+        self._last_report = None
+        self._first_report = None
+        self._small = np.empty((GATE_SIZE[1], GATE_SIZE[0], 3), dtype=np.uint8)
+        self._gray = np.empty((GATE_SIZE[1], GATE_SIZE[0]), dtype=np.uint8)
+
+    @property
+    def idle(self):
+        if not self.enabled or self.person_present:
+            return False
+        since = self.last_seen if self.last_seen is not None else self._first_report
+        return since is not None and self.clock() - since >= self.idle_after_s
+
+    @property
+    def pass_ratio(self):
+        return self.passed / self.frames if self.frames else 1.0
+
+    @property
+    def state_label(self):
+        if self.idle:
+            return "idle"
+        return "static" if self.frames and self._last_pass is not None and self.motion < self.motion_threshold else "active"
+
+    def check(self, frame, now=None):
+        """True if the model should run on this BGR frame, False to reuse the last result."""
+        self.frames += 1
+        if not self.enabled:
+            self.passed += 1
+            return True
+        if now is None:
+            now = self.clock()
+        cv2.resize(frame, GATE_SIZE, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self._reference is None:
+            self.motion = 1.0
+        else:
+            diff = cv2.absdiff(self._gray, self._reference)
+            self.motion = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        refresh = self.idle_refresh_s if self.idle else self.refresh_s
+        if self.motion < self.motion_threshold and self._last_pass is not None and now - self._last_pass < refresh:
+            return False
+        # Motion is measured against the frame the model last saw, so slow drift adds up
+        self._reference = self._gray.copy()
+        self._last_pass = now
+        self.passed += 1
+        return True
+
+    def report(self, person_present, now=None):
+        """Tell the gate whether the last result had a person in it (once per frame)."""
+        if now is None:
+            now = self.clock()
+        if self._last_report is not None and not self.person_present:
+            self.away_seconds += now - self._last_report
+        if self._last_report is None:
+            self._first_report = now
+        self._last_report = now
+        self.person_present = person_present
+        if person_present:
+            self.last_seen = now
+
+    def stop(self, now=None):
+        """The camera stopped: close the current away interval and forget the reference frame."""
+        if now is None:
+            now = self.clock()
+        if self._last_report is not None and not self.person_present:
+            self.away_seconds += now - self._last_report
+        self._last_report = None
+        self._first_report = None
+        self._reference = None
+        self._last_pass = None
+        self.person_present = False
+        self.last_seen = None
+
+    def away_since(self, away_seconds_then, now=None):
+        """Away time accumulated since a reading of away_seconds, including the current interval."""
+        if now is None:
+            now = self.clock()
+        away = self.away_seconds
+        if self._last_report is not None and not self.person_present:
+            away += now - self._last_report
+        return away - away_seconds_then
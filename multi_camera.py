@@ -0,0 +1,284 @@
+import argparse
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+import posture_engine
+import posture_rules
+
+# --- Multi-camera monitoring ---
+# One worker process per camera / video source, each with its own capture device and its
+# own Pose graph, so N streams use N cores and the GIL of the dashboard process (drawing,
+# window events) never competes with inference. Workers send no images back: each one
+# writes its latest landmarks, status code and counters into its own slot of a shared
+# memory block, guarded by a sequence counter (odd while the worker is writing).
+# The main process reads the slots (snapshot()), draws a tiled dashboard of stick figures
+# and aggregates the statuses. The posture rules are loaded (and validated) once in the
+# main process; each worker compiles its own RuleSet from the rule dicts, since the
+# generated evaluator can't be pickled.
+#
+# Usage:
+#   python multi_camera.py 0 1 2                   cameras 0, 1 and 2
+#   python multi_camera.py a.mp4 b.mp4 --no-window --seconds 30   throughput, no window
+# Video files are analysed as fast as the worker can (--loop restarts them at the end),
+# which makes `frames/s` a direct measure of how throughput scales with streams.
+
+SLOT_DTYPE = np.dtype([
+    ("seq", "<u8"),          # even = stable, odd = being written
+    ("timestamp", "<f8"),    # time.time() of the last result
+    ("frames", "<u8"),       # frames analysed so far
+    ("busy_s", "<f8"),       # seconds spent reading + analysing
+    ("status", "<i4"),       # posture_engine.STATUS_*
+    ("state", "<i4"),        # STATE_*
+    ("width", "<i4"),
+    ("height", "<i4"),
+    ("landmarks", "<f4", (posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS)),
+])
+
+STATE_STARTING = 0
+STATE_RUNNING = 1
+STATE_FINISHED = 2
+STATE_ERROR = 3
+STATE_LABELS = {STATE_STARTING: "starting", STATE_RUNNING: "running", STATE_FINISHED: "finished", STATE_ERROR: "error"}
+
+# Upper-body connections drawn on the dashboard (indices of mp.solutions.pose.PoseLandmark)
+SKELETON = ((0, 7), (0, 8), (11, 12), (11, 13), (13, 15), (12, 14), (14, 16), (11, 23), (12, 24), (23, 24))
+
+POSE_SETTINGS = dict(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+
+def parse_source(source):
+    """'0' -> camera 0, anything else is a file path or URL."""
+    return int(source) if str(source).isdigit() else source
+
+
+# --- Worker process ---
+def _worker(index, source, shm_name, count, stop_event, model_complexity, loop, rules):
+    import mediapipe as mp
+    cv2.setNumThreads(1)  # one core per stream
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slot = np.ndarray(count, dtype=SLOT_DTYPE, buffer=shm.buf)[index:index + 1]
+    camera = isinstance(source, int)
+    cap = None
+    pose = None
+    try:
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise IOError(f"cannot open {source!r}")
+        pose = mp.solutions.pose.Pose(model_complexity=model_complexity, **POSE_SETTINGS)
+        engine = posture_engine.PostureEngine(rules=posture_rules.RuleSet(rules))
+        slot["state"] = STATE_RUNNING
+        frames, busy = 0, 0.0
+        while not stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                if camera or not loop:
+                    break
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                pose.reset()
+                continue
+            if camera:
+                frame = cv2.flip(frame, 1)
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = pose.process(image)
+            height, width = frame.shape[:2]
+            status = engine.analyze_landmarks(results.pose_landmarks.landmark if results.pose_landmarks else None,
+                                              width, height)
+            frames += 1
+            busy += time.perf_counter() - start
+
+            slot["seq"] += 1
+            slot["timestamp"] = time.time()
+            slot["frames"] = frames
+            slot["busy_s"] = busy
+            slot["status"] = status
+            slot["width"], slot["height"] = width, height
+            slot["landmarks"] = engine.frame
+            slot["seq"] += 1
+        slot["state"] = STATE_FINISHED
+    except Exception as e:
+        print(f"stream {index} ({source!r}): {e}")
+        slot["state"] = STATE_ERROR
+    finally:
+        if cap is not None:
+            cap.release()
+        if pose is not None:
+            pose.close()
+        del slot
+        shm.close()
+
+
+# --- Main process ---
+class MultiCameraMonitor:
+    """Runs one worker process per source and reads their results from shared memory.
+
+    Parameters:
+      - sources: camera indices and/or video paths
+      - model_complexity: Pose model for every worker (0 is the lightest)
+      - loop: restart video files at the end
+      - rules: posture_rules.RuleSet for every worker (default: posture_rules.json or the built-in rules)
+    """
+    def __init__(self, sources, model_complexity=1, loop=False, rules=None):
+        self.sources = [parse_source(source) for source in sources]
+        self.model_complexity = model_complexity
+        self.loop = loop
+        self.rules = rules if rules is not None else posture_rules.load_rules_or_defaults()
+        count = len(self.sources)
+        self._shm = shared_memory.SharedMemory(create=True, size=SLOT_DTYPE.itemsize * count)
+        self._slots = np.ndarray(count, dtype=SLOT_DTYPE, buffer=self._shm.buf)
+        self._slots.fill(0)
+        self._slots["landmarks"] = np.nan
+        # spawn: a fresh interpreter per worker (forking a process that already has
+        # threads or a Pose graph is not safe)
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._processes = []
+        self.started = None
+
+    def start(self):
+        for index, source in enumerate(self.sources):
+            process = self._context.Process(
+                target=_worker, name=f"pose-{index}", daemon=True,
+                args=(index, source, self._shm.name, len(self.sources), self._stop, self.model_complexity, self.loop,
+                      self.rules.rules))
+            process.start()
+            self._processes.append(process)
+        self.started = time.perf_counter()
+        return self
+
+    def snapshot(self):
+        """A consistent copy of every slot (structured array with SLOT_DTYPE fields)."""
+        result = np.empty(len(self._slots), dtype=SLOT_DTYPE)
+        for i in range(len(self._slots)):
+            slot = self._slots[i:i + 1]
+            # A worker that died mid-write leaves the counter odd: give up after a while and take what's there
+            for _ in range(1000):
+                before = int(slot["seq"][0])
+                if before % 2 == 0:
+                    result[i] = slot[0]
+                    if int(slot["seq"][0]) == before:
+                        break
+                time.sleep(0)
+            else:
+                result[i] = slot[0]
+        return result
+
+    @property
+    def alive(self):
+        return any(process.is_alive() for process in self._processes)
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def close(self):
+        self.stop()
+        self._slots = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+def aggregate(snapshot):
+    """Streams per status, counting only streams that are running."""
+    running = snapshot[snapshot["state"] == STATE_RUNNING]
+    counts = np.bincount(running["status"], minlength=len(posture_engine.STATUS_LABELS_SHORT))
+    return {status: int(counts[status]) for status in posture_engine.STATUS_LABELS_SHORT}
+
+
+def throughput(snapshot, elapsed):
+    """(total frames/s, [frames/s per stream], [frames/s per busy core second per stream])."""
+    per_stream = snapshot["frames"] / max(elapsed, 1e-9)
+    per_core = np.where(snapshot["busy_s"] > 0, snapshot["frames"] / np.maximum(snapshot["busy_s"], 1e-9), 0.0)
+    return float(per_stream.sum()), per_stream.tolist(), per_core.tolist()
+
+
+def draw_dashboard(snapshot, sources, tile_size=(320, 240), columns=None):
+    """One tile per stream: stick figure, status and frame counter. Returns a BGR image."""
+    count = len(snapshot)
+    columns = columns or int(np.ceil(np.sqrt(count)))
+    rows = int(np.ceil(count / columns))
+    tile_w, tile_h = tile_size
+    canvas = np.zeros((rows * tile_h, columns * tile_w, 3), dtype=np.uint8)
+    now = time.time()
+    for i, slot in enumerate(snapshot):
+        x0, y0 = (i % columns) * tile_w, (i // columns) * tile_h
+        tile = canvas[y0:y0 + tile_h, x0:x0 + tile_w]
+        status = int(slot["status"])
+        color = posture_engine.STATUS_COLORS[status]
+        points = slot["landmarks"][:, :2] * (tile_w, tile_h)
+        for a, b in SKELETON:
+            if np.isfinite(points[a]).all() and np.isfinite(points[b]).all():
+                cv2.line(tile, tuple(int(v) for v in points[a]), tuple(int(v) for v in points[b]), color, 2, cv2.LINE_AA)
+        state = STATE_LABELS[int(slot["state"])]
+        stale = slot["timestamp"] and now - slot["timestamp"] > 2.0
+        label = posture_engine.STATUS_LABELS_SHORT[status] if state == "running" and not stale else state
+        cv2.putText(tile, f"{i}: {sources[i]}", (8, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(tile, label, (8, tile_h - 28), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+        cv2.putText(tile, f"{int(slot['frames'])} frames", (8, tile_h - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.4,
+                    (200, 200, 200), 1, cv2.LINE_AA)
+        cv2.rectangle(tile, (0, 0), (tile_w - 1, tile_h - 1), (80, 80, 80), 1)
+    return canvas
+
+
+def format_aggregate(counts):
+    return " | ".join(f"{posture_engine.STATUS_LABELS_SHORT[status]}: {n}" for status, n in counts.items() if n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor posture on several cameras, one Pose process per stream.")
+    parser.add_argument("sources", nargs="+", help="camera indices (0, 1, ...) or video files")
+    parser.add_argument("--complexity", type=int, default=1, choices=(0, 1, 2), help="Pose model_complexity")
+    parser.add_argument("--seconds", type=float, help="stop after this long")
+    parser.add_argument("--loop", action="store_true", help="restart video files at the end")
+    parser.add_argument("--no-window", action="store_true", help="print a summary every second instead")
+    parser.add_argument("--rules", default=posture_rules.RULES_PATH, help="posture rules file (built-in rules if it does not exist)")
+    args = parser.parse_args()
+
+    monitor = MultiCameraMonitor(args.sources, model_complexity=args.complexity, loop=args.loop,
+                                 rules=posture_rules.load_rules_or_defaults(args.rules)).start()
+    print(f"{len(monitor.sources)} streams on {os.cpu_count()} cores. Press 'q' in the window (or Ctrl+C) to quit.")
+    last_print = time.perf_counter()
+    try:
+        while monitor.alive:
+            elapsed = time.perf_counter() - monitor.started
+            if args.seconds and elapsed >= args.seconds:
+                break
+            snapshot = monitor.snapshot()
+            if not args.no_window:
+                cv2.imshow("Posture - all cameras", draw_dashboard(snapshot, args.sources))
+                if cv2.waitKey(100) & 0xFF == ord("q"):
+                    break
+            else:
+                time.sleep(0.1)
+            if time.perf_counter() - last_print >= 1.0:
+                last_print = time.perf_counter()
+                total, _, _ = throughput(snapshot, elapsed)
+                print(f"{elapsed:6.1f} s  {total:7.1f} frames/s  {format_aggregate(aggregate(snapshot))}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.perf_counter() - monitor.started
+        snapshot = monitor.snapshot()
+        monitor.close()
+        if not args.no_window:
+            cv2.destroyAllWindows()
+
+    total, per_stream, per_core = throughput(snapshot, elapsed)
+    print(f"total {total:.1f} frames/s over {elapsed:.1f} s")
+    for i, source in enumerate(args.sources):
+        print(f"  {i}: {source}: {per_stream[i]:.1f} frames/s ({per_core[i]:.1f} per busy core second), "
+              f"{STATE_LABELS[int(snapshot['state'][i])]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import posture_engine
+import posture_rules
+import scheduler
+
+# --- Multi-person mode for shared-desk cameras ---
+# mp.solutions.pose.Pose follows a single person, so with several people in view it scores
+# whoever it locks onto. This mode splits the frame per person:
+#   1. FaceBoxDetector finds people on a downscaled copy of the frame (MediaPipe face
+#      detection, expanded to a head-and-shoulders box). It only runs every
+#      detect_every_s, to pick up people who arrive and to re-anchor the tracks; between
+#      detections every track follows its own pose.
+#   2. PersonTracker keeps stable IDs: greedy matching on IoU, then on centroid distance
+#      for boxes that moved too far to overlap.
+#   3. Every track owns a Pose instance from a pool (Pose keeps temporal state, so it
+#      can't be shared between people). The ROI crops are resized to at most crop_size and
+#      processed on a thread pool - MediaPipe releases the GIL while its graph runs, so
+#      on a machine with spare cores the people are processed in parallel.
+#   4. The landmarks of all people are mapped back to full-frame coordinates and scored
+#      in one posture_engine.analyze_batch call.
+# Detection cost doesn't depend on the number of people and scoring is one vectorized
+# call, but Pose runs once per person: CPU time per frame grows linearly with the number
+# of people. The thread pool only shortens the wall time per frame when there are idle
+# cores (roughly people / cores Pose runs back to back); what makes each person cheaper is
+# the small crop and model_complexity 0. bench_multi_person.py measures both.
+#
+# Each track has its own posture status, sitting timer (time in view since the track
+# started) and bad-posture time. A person who is gone for longer than lost_s gets a new
+# ID (and timer) when they come back.
+#
+# Usage:
+#   python multi_person.py run 0                           camera 0, window with IDs and timers
+#   python multi_person.py run office.mp4 --max-people 6
+#   python multi_person.py record office.mp4 -o people.npz  multi-person landmark fixture
+
+# Head and shoulders, used for the track boxes
+UPPER_BODY = np.arange(posture_engine.RIGHT_SHOULDER + 1)
+
+
+def upper_body_box(points):
+    """(x0, y0, x1, y1) head-and-shoulders box around the pixel (K, 2) points of landmarks 0-12."""
+    min_x, min_y = np.nanmin(points, axis=0)
+    max_x, max_y = np.nanmax(points, axis=0)
+    width, height = max_x - min_x, max_y - min_y
+    return np.array([min_x - 0.15 * width, min_y - 0.5 * height, max_x + 0.15 * width, max_y + 0.5 * height])
+
+
+def face_to_box(x, y, width, height):
+    """Head-and-shoulders box (same proportions as upper_body_box) from a face box."""
+    center = x + width * 0.5
+    return np.array([center - 1.9 * width, y - 0.6 * height, center + 1.9 * width, y + 3.2 * height])
+
+
+def iou_matrix(a, b):
+    """IoU of every box in a (N, 4) against every box in b (M, 4)."""
+    a, b = a[:, np.newaxis], b[np.newaxis]
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    overlap = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.nan_to_num(overlap / (area_a + area_b - overlap))
+
+
+# --- 1. Person detection ---
+class FaceBoxDetector:
+    """People as head-and-shoulders boxes (pixels), from face detection on a downscaled frame.
+
+    Parameters:
+      - detect_width: frames are downscaled to this width first
+      - min_confidence: face detection threshold
+      - model_selection: 1 = full-range model (people up to ~5 m away), 0 = within ~2 m
+    """
+    def __init__(self, detect_width=320, min_confidence=0.5, model_selection=1):
+        import mediapipe as mp
+        self.detect_width = detect_width
+        self._faces = mp.solutions.face_detection.FaceDetection(min_detection_confidence=min_confidence,
+                                                                model_selection=model_selection)
+
+    def __call__(self, frame_bgr):
+        height, width = frame_bgr.shape[:2]
+        scale = min(self.detect_width / width, 1.0)
+        small = cv2.resize(frame_bgr, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        results = self._faces.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        boxes = []
+        for detection in results.detections or ():
+            box = detection.location_data.relative_bounding_box
+            boxes.append(face_to_box(box.xmin * width, box.ymin * height, box.width * width, box.height * height))
+        return np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+    def close(self):
+        self._faces.close()
+
+
+# --- 2. Tracking ---
+class Track:
+    """One person. `box` is the head-and-shoulders box in pixels."""
+    def __init__(self, track_id, box, timestamp, pose):
+        self.id = track_id
+        self.box = box
+        self.pose = pose
+        self.first_seen = self.last_seen = timestamp
+        self.landmarks = np.full((posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS), np.nan,
+                                 dtype=np.float32)
+        self.found = False          # pose found this person in the last frame
+        self.status = posture_engine.STATUS_NO_PERSON
+        self.sitting_s = 0.0
+        self.bad_s = 0.0
+        self.roi = None
+
+
+class PersonTracker:
+    """Assigns detections to tracks.
+
+    Parameters:
+      - iou_threshold: minimum IoU for a match in the first pass
+      - max_center_distance: second pass, centroid distance as a fraction of the box diagonal
+    """
+    def __init__(self, iou_threshold=0.3, max_center_distance=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance
+
+    def match(self, track_boxes, boxes):
+        """Greedy matching. Returns ([(track index, box index)], unmatched box indices)."""
+        if not len(track_boxes) or not len(boxes):
+            return [], list(range(len(boxes)))
+        pairs = []
+        used_tracks, used_boxes = set(), set()
+        overlap = iou_matrix(track_boxes, boxes)
+        for flat in np.argsort(-overlap, axis=None):
+            i, j = divmod(int(flat), len(boxes))
+            if overlap[i, j] < self.iou_threshold:
+                break
+            if i not in used_tracks and j not in used_boxes:
+                pairs.append((i, j))
+                used_tracks.add(i)
+                used_boxes.add(j)
+        # Centroid distance for what's left (fast movement, very different box sizes)
+        centers_t = (track_boxes[:, :2] + track_boxes[:, 2:]) * 0.5
+        centers_b = (boxes[:, :2] + boxes[:, 2:]) * 0.5
+        diagonal = np.hypot(track_boxes[:, 2] - track_boxes[:, 0], track_boxes[:, 3] - track_boxes[:, 1])
+        distance = np.hypot(*(centers_t[:, np.newaxis] - centers_b[np.newaxis]).transpose(2, 0, 1)) / diagonal[:, np.newaxis]
+        for flat in np.argsort(distance, axis=None):
+            i, j = divmod(int(flat), len(boxes))
+            if distance[i, j] > self.max_center_distance:
+                break
+            if i not in used_tracks and j not in used_boxes:
+                pairs.append((i, j))
+                used_tracks.add(i)
+                used_boxes.add(j)
+        return pairs, [j for j in range(len(boxes)) if j not in used_boxes]
+
+
+# --- 3. Pose pool ---
+class PosePool:
+    """Pose instances handed to tracks; an instance freed by a lost track is reset and reused."""
+    def __init__(self, builder):
+        self.builder = builder
+        self._free = []
+        self.built = 0
+
+    def acquire(self):
+        if self._free:
+            return self._free.pop()
+        self.built += 1
+        return self.builder()
+
+    def release(self, pose):
+        pose.reset()
+        self._free.append(pose)
+
+    def close(self, poses=()):
+        for pose in itertools.chain(self._free, poses):
+            pose.close()
+        self._free = []
+
+
+# --- 4. The monitor ---
+class MultiPersonMonitor:
+    """Per-person posture for one camera. Call process() with every frame.
+
+    Parameters:
+      - pose_builder: function() -> a Pose-like object (process(rgb), reset(), close())
+      - detector: function(frame_bgr) -> (K, 4) boxes, e.g. FaceBoxDetector()
+      - max_people: tracks kept at most (largest detections first)
+      - detect_every_s: how often the detector runs while everyone is tracked
+      - lost_s: a track without pose or detection for this long is dropped
+      - crop_size: ROI crops are downscaled so the longer side is at most this
+      - margin: space around the head-and-shoulders box in the ROI, as a fraction of its size
+      - workers: Pose threads (default max_people)
+      - rules: optional posture_rules.RuleSet for the status
+    """
+    def __init__(self, pose_builder, detector, max_people=4, detect_every_s=1.0, lost_s=2.0, crop_size=256,
+                 margin=0.6, workers=None, rules=None):
+        self.detector = detector
+        self.pool = PosePool(pose_builder)
+        self.tracker = PersonTracker()
+        self.max_people = max_people
+        self.detect_every_s = detect_every_s
+        self.lost_s = lost_s
+        self.crop_size = crop_size
+        self.margin = margin
+        self.rules = rules
+        self.tracks = []
+        self._ids = itertools.count(1)
+        self._next_detection = None
+        self._last_time = None
+        self._executor = ThreadPoolExecutor(max_workers=workers or max_people, thread_name_prefix="pose")
+        self.frames = 0
+        self.detections = 0
+        self.pose_runs = 0
+
+    def process(self, frame_bgr, timestamp):
+        """Detect (when due), run Pose per person and score everyone. Returns the list of tracks."""
+        height, width = frame_bgr.shape[:2]
+        dt = 0.0 if self._last_time is None else timestamp - self._last_time
+        self._last_time = timestamp
+        self.frames += 1
+        if self._next_detection is None or timestamp >= self._next_detection or not self.tracks:
+            self._detect(frame_bgr, timestamp, width, height)
+        if not self.tracks:
+            return self.tracks
+
+        # Pose for every person at once: one job per ROI on the thread pool
+        for track in self.tracks:
+            track.roi = self._roi(track.box, width, height)
+        results = list(self._executor.map(lambda track: self.estimate(track, frame_bgr), self.tracks))
+        self.pose_runs += len(results)
+
+        # Crop coordinates -> full-frame coordinates, for everyone in one go
+        found = np.array([landmarks is not None for landmarks in results])
+        frames = np.full((len(self.tracks), posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS), np.nan,
+                         dtype=np.float32)
+        if found.any():
+            frames[found] = np.stack([landmarks for landmarks in results if landmarks is not None])
+            rois = np.array([track.roi for track in self.tracks], dtype=np.float32)
+            scale = (rois[:, 2:] - rois[:, :2]) / (width, height)
+            frames[:, :, :2] = frames[:, :, :2] * scale[:, np.newaxis] + (rois[:, np.newaxis, :2] / (width, height))
+            frames[:, :, 2] *= scale[:, np.newaxis, 0]
+        scored = posture_engine.analyze_batch(frames, width, height, rules=self.rules)
+        status = scored["status"].tolist()
+
+        for i, track in enumerate(self.tracks):
+            track.found = bool(found[i])
+            track.status = status[i]
+            if track.found:
+                track.landmarks[:] = frames[i]
+                points = frames[i, UPPER_BODY, :2].astype(np.float64) * (width, height)
+                if np.isfinite(points).any():
+                    track.box = upper_body_box(points)
+                track.last_seen = timestamp
+                track.sitting_s += dt
+                if track.status in posture_engine.BAD_STATUSES:
+                    track.bad_s += dt
+        self._drop_duplicates()
+        self._drop_lost(timestamp)
+        return self.tracks
+
+    def estimate(self, track, frame_bgr):
+        """Pose thread: (33, 4) landmarks normalized to track.roi, or None."""
+        x0, y0, x1, y1 = track.roi
+        crop = frame_bgr[y0:y1, x0:x1]
+        scale = self.crop_size / max(crop.shape[:2])
+        if scale < 1.0:
+            crop = cv2.resize(crop, (int(crop.shape[1] * scale), int(crop.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        image = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        return self.run_pose(track, image)
+
+    def run_pose(self, track, image_rgb):
+        """Pose thread: the track's Pose on its ROI image -> (33, 4) landmarks normalized to the ROI, or None."""
+        results = track.pose.process(image_rgb)
+        if not results.pose_landmarks:
+            return None
+        return posture_engine.landmarks_to_array(results.pose_landmarks.landmark)
+
+    def _roi(self, box, width, height):
+        x0, y0, x1, y1 = box
+        pad_x, pad_y = (x1 - x0) * self.margin, (y1 - y0) * self.margin
+        roi = (max(int(x0 - pad_x), 0), max(int(y0 - pad_y), 0), min(int(x1 + pad_x), width), min(int(y1 + pad_y), height))
+        if roi[2] - roi[0] < 16 or roi[3] - roi[1] < 16:
+            return (0, 0, width, height)
+        return roi
+
+    def _detect(self, frame_bgr, timestamp, width, height):
+        self._next_detection = timestamp + self.detect_every_s
+        self.detections += 1
+        boxes = np.asarray(self.detector(frame_bgr), dtype=np.float64).reshape(-1, 4)
+        track_boxes = np.array([track.box for track in self.tracks]).reshape(-1, 4)
+        pairs, new = self.tracker.match(track_boxes, boxes)
+        for i, j in pairs:
+            track = self.tracks[i]
+            track.last_seen = timestamp
+            if not track.found:
+                # Pose lost this person: start again from the detection
+                track.box = boxes[j]
+        # Largest new people first, up to max_people tracks
+        new.sort(key=lambda j: -(boxes[j, 2] - boxes[j, 0]) * (boxes[j, 3] - boxes[j, 1]))
+        for j in new[:max(self.max_people - len(self.tracks), 0)]:
+            self.tracks.append(Track(next(self._ids), boxes[j], timestamp, self.pool.acquire()))
+
+    def _drop_duplicates(self, threshold=0.7):
+        """Two Pose instances locked onto the same person: keep the older track."""
+        if len(self.tracks) < 2:
+            return
+        overlap = iou_matrix(np.array([track.box for track in self.tracks]), np.array([track.box for track in self.tracks]))
+        drop = set()
+        for i, j in zip(*np.nonzero(np.triu(overlap, 1) > threshold)):
+            drop.add(int(j) if self.tracks[i].id < self.tracks[j].id else int(i))
+        for i in sorted(drop, reverse=True):
+            self.pool.release(self.tracks.pop(i).pose)
+
+    def _drop_lost(self, timestamp):
+        for track in [track for track in self.tracks if timestamp - track.last_seen > self.lost_s]:
+            self.tracks.remove(track)
+            self.pool.release(track.pose)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close([track.pose for track in self.tracks])
+        self.tracks = []
+        close = getattr(self.detector, "close", None)
+        if close is not None:
+            close()
+
+    def format_stats(self):
+        per_frame = self.pose_runs / self.frames if self.frames else 0.0
+        return (f"{self.frames} frames, {self.detections} detector runs, {per_frame:.2f} people per frame, "
+                f"{self.pool.built} Pose instances built")
+
+
+def draw_tracks(image, tracks):
+    """Box, ID, status and sitting timer for every tracked person (in place)."""
+    for track in tracks:
+        color = posture_engine.STATUS_COLORS[track.status]
+        x0, y0, x1, y1 = (int(v) for v in track.box)
+        cv2.rectangle(image, (x0, y0), (x1, y1), color, 2)
+        label = f"#{track.id} {posture_engine.STATUS_LABELS_SHORT[track.status]}"
+        cv2.putText(image, label, (x0, max(y0 - 24, 12)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+        bad = track.bad_s / track.sitting_s if track.sitting_s else 0.0
+        cv2.putText(image, f"sitting {scheduler.format_hms(track.sitting_s)}  bad {bad:.0%}", (x0, max(y0 - 8, 24)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+    return image
+
+
+# --- Multi-person landmark fixtures ---
+# .npz: "landmarks" (N, P, 33, 4) float32 full-frame landmarks (NaN = nobody in that slot),
+# "ids" (N, P) int32 person / track id per slot (-1 = empty), "time_s" (N,), "image_size" (2,).
+def save_fixture(path, landmarks, ids, timestamps, image_size):
+    np.savez_compressed(path, landmarks=np.asarray(landmarks, dtype=np.float32), ids=np.asarray(ids, dtype=np.int32),
+                        time_s=np.asarray(timestamps, dtype=np.float64), image_size=np.asarray(image_size))
+
+
+def load_fixture(path):
+    """(landmarks, ids, timestamps, (width, height))."""
+    with np.load(path) as data:
+        return data["landmarks"], data["ids"], data["time_s"], tuple(int(v) for v in data["image_size"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Posture for several people in one camera view.")
+    parser.add_argument("command", choices=("run", "record"))
+    parser.add_argument("source", nargs="?", default="0", help="camera index or video file")
+    parser.add_argument("--max-people", type=int, default=4)
+    parser.add_argument("--complexity", type=int, default=0, choices=(0, 1, 2), help="Pose model_complexity")
+    parser.add_argument("--detect-every", type=float, default=1.0, help="seconds between detector runs")
+    parser.add_argument("--seconds", type=float, help="stop after this long")
+    parser.add_argument("-o", "--output", default="multi_person_fixture.npz", help="fixture path (record)")
+    parser.add_argument("--no-window", action="store_true")
+    parser.add_argument("--rules", default=posture_rules.RULES_PATH, help="posture rules file (built-in rules if it does not exist)")
+    args = parser.parse_args()
+
+    import mediapipe as mp
+    source = int(args.source) if args.source.isdigit() else args.source
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise SystemExit(f"cannot open {args.source!r}")
+    monitor = MultiPersonMonitor(
+        lambda: mp.solutions.pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                                       model_complexity=args.complexity),
+        FaceBoxDetector(), max_people=args.max_people, detect_every_s=args.detect_every,
+        rules=posture_rules.load_rules_or_defaults(args.rules))
+    recorded, recorded_ids, recorded_times = [], [], []
+    image_size = None
+    times = []
+    started = time.perf_counter()
+    try:
+        while True:
+            ret, frame = cap.read()
+            now = time.perf_counter() - started
+            if not ret or (args.seconds and now >= args.seconds):
+                break
+            if isinstance(source, int):
+                frame = cv2.flip(frame, 1)
+            start = time.perf_counter()
+            tracks = monitor.process(frame, now)
+            times.append(time.perf_counter() - start)
+            image_size = (frame.shape[1], frame.shape[0])
+            if args.command == "record":
+                landmarks = np.full((args.max_people, posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS),
+                                    np.nan, dtype=np.float32)
+                ids = np.full(args.max_people, -1, dtype=np.int32)
+                for slot, track in enumerate(track for track in tracks if track.found):
+                    landmarks[slot], ids[slot] = track.landmarks, track.id
+                recorded.append(landmarks)
+                recorded_ids.append(ids)
+                recorded_times.append(now)
+            if not args.no_window:
+                cv2.imshow("Posture - multi-person", draw_tracks(frame, tracks))
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        monitor.close()
+        if not args.no_window:
+            cv2.destroyAllWindows()
+
+    print(monitor.format_stats())
+    if times:
+        p50, p99 = np.percentile(np.asarray(times) * 1000.0, [50, 99])
+        print(f"process(): p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    if args.command == "record" and recorded:
+        save_fixture(args.output, recorded, recorded_ids, recorded_times, image_size)
+        print(f"Wrote {len(recorded)} frames to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
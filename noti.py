@@ -1,9 +1,9 @@
 #อันนี้มันจะขึ้นเป็นป็ิอปอัพให้ใส่เวลา ซึ่งเราสร้างมาหลายๆเเบบเพื่อเทส
 import tkinter as tk
 from tkinter import messagebox
-import threading
-import time
-from plyer import notification
+import notifier
+from scheduler import Countdown, Scheduler, format_hms
+from toast import Toast
 
 class CountdownTimer:
     def __init__(self, root):
@@ -11,9 +11,19 @@ class CountdownTimer:
         self.root.title("โปรแกรมจับเวลา")
         self.root.geometry("300x200")
         
-        self.timer_thread = None
+        # นับถอยหลังด้วย scheduler บน event loop ของ Tk (ไม่ต้องมี thread ที่ sleep ทีละวินาที)
+        self.scheduler = Scheduler(root)
+        self.countdown = None
         self.running = False
 
+        # แจ้งเตือนผ่าน worker thread (plyer ช้าได้ ไม่ให้หน้าต่างค้าง) และ toast ที่ไม่บล็อกหน้าต่าง
+        self.toast = Toast(root)
+        backends = [lambda title, message: root.after(0, self.toast.show, title, message)]
+        system_backend = notifier.plyer_backend(timeout=5)
+        if system_backend is not None:
+            backends.append(system_backend)
+        self.notifier = notifier.NotificationDispatcher(backends)
+
         # --- จัดวาง UI ให้สวยงามขึ้นเล็กน้อยด้วย padding ---
         # ช่องกรอกเวลา
         tk.Label(root, text="ชั่วโมง").grid(row=0, column=0, padx=5, pady=5)
@@ -58,23 +68,9 @@ class CountdownTimer:
         self.start_button.config(state="disabled")
         self.cancel_button.config(state="normal")
         
-        self.timer_thread = threading.Thread(target=self.countdown, args=(total_seconds,))
-        self.timer_thread.daemon = True
-        self.timer_thread.start()
-
-    def countdown(self, total_seconds):
-        while total_seconds > 0 and self.running:
-            mins, secs = divmod(total_seconds, 60)
-            hours, mins = divmod(mins, 60)
-            time_string = f"{hours:02d}:{mins:02d}:{secs:02d}"
-            
-            self.root.after(0, self.update_display, time_string)
-
-            time.sleep(1)
-            total_seconds -= 1
-
-        if self.running:
-            self.root.after(0, self.on_timer_finish)
+        self.countdown = Countdown(self.scheduler, total_seconds,
+                                   on_tick=lambda remaining: self.update_display(format_hms(remaining)),
+                                   on_finish=self.on_timer_finish)
 
     def update_display(self, text):
         self.time_label.config(text=text)
@@ -85,64 +81,21 @@ class CountdownTimer:
         self.running = False
         self.start_button.config(state="normal")
         self.cancel_button.config(state="disabled")
-        
-        # ส่งเสียงเตือน
-        self.root.bell()
-        
-        # # แก้ไข: แสดง Pop-up ที่จะอยู่บนสุดเสมอ แทน messagebox เดิม
-        self.show_topmost_popup()
-        
-        # แสดง Notification ของระบบ (plyer) ซึ่งจะทำงานได้ดีเมื่อโปรแกรมอยู่เบื้องหลัง
+
+        # เสียงเตือน + toast บนหน้าต่าง + Notification ของระบบ (plyer) ส่งจาก worker thread ของ notifier
         self.show_notification()
 
     def cancel_timer(self):
         if self.running:
             self.running = False
+            self.countdown.cancel()
             self.time_label.config(text="ยกเลิกแล้ว")
             self.start_button.config(state="normal")
             self.cancel_button.config(state="disabled")
 
-    # # เพิ่มเข้ามา: ฟังก์ชันสำหรับสร้าง pop-up ที่อยู่บนสุด
-    def show_topmost_popup(self):
-        """สร้างหน้าต่าง Pop-up ที่จะแสดงอยู่บนสุดเสมอ"""
-        popup = tk.Toplevel(self.root)
-        popup.title("หมดเวลา!")
-        popup.geometry("300x120")
-
-        # จัดหน้าต่างให้อยู่กลางจอ
-        root_x = self.root.winfo_x()
-        root_y = self.root.winfo_y()
-        root_width = self.root.winfo_width()
-        root_height = self.root.winfo_height()
-        popup_x = root_x + (root_width / 2) - (300 / 2)
-        popup_y = root_y + (root_height / 2) - (120 / 2)
-        popup.geometry(f"+{int(popup_x)}+{int(popup_y)}")
-
-        # # คุณสมบัติสำคัญ: ทำให้หน้าต่างอยู่บนสุดเสมอ
-        popup.attributes('-topmost', True)
-
-        label = tk.Label(popup, text="หมดเวลาที่ตั้งไว้แล้ว!", font=("Arial", 16))
-        label.pack(pady=20, padx=10)
-
-        ok_button = tk.Button(popup, text="รับทราบ", command=popup.destroy)
-        ok_button.pack(pady=5)
-
-        # ทำให้หน้าต่าง pop-up ได้รับ focus ทันที
-        popup.focus_force()
-        # ทำให้หน้าต่างหลักเด้งขึ้นมาข้างหน้าด้วย
-        self.root.lift()
-
-
     def show_notification(self):
-        """แสดง Notification ของระบบปฏิบัติการ"""
-        try:
-            notification.notify(
-                title="⏰ แจ้งเตือน",
-                message="หมดเวลาที่ตั้งไว้แล้ว!",
-                timeout=5
-            )
-        except Exception as e:
-            print(f"Error showing notification: {e}")
+        """แสดงการแจ้งเตือน (ไม่บล็อก main thread)"""
+        self.notifier.notify("⏰ แจ้งเตือน", "หมดเวลาที่ตั้งไว้แล้ว!", category="timer")
 
 
 if __name__ == "__main__":
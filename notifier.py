@@ -0,0 +1,182 @@
+import collections
+import queue
+import threading
+import time
+
+import numpy as np
+
+# --- Notification dispatcher ---
+# plyer's notification.notify() can take hundreds of milliseconds (or hang) depending on
+# the desktop, and calling it on the Tk thread froze the UI and the video feed.
+# NotificationDispatcher.notify() only puts the request on a queue; a worker thread
+# delivers it to every backend. On the way it:
+#   - collects requests arriving within coalesce_s of each other into one burst,
+#     drops duplicates and merges the rest into a single notification
+#   - applies a per-category minimum interval (rate limit), dropping what comes too soon
+#   - counts delivered / coalesced / dropped / failed and records delivery latency
+# Backends are functions(title, message). plyer_backend() is the system notification;
+# RecordingBackend is a local stand-in for tests and benchmarks (see bench_notifier.py).
+
+# Minimum seconds between two notifications of the same category
+DEFAULT_RATE_LIMITS = {
+    "reminder": 0.0,   # scheduled by the posture timer, already spaced out
+    "posture": 120.0,  # bad posture alerts from detection
+    "timer": 0.0,      # countdown finished
+}
+
+
+def plyer_backend(timeout=10):
+    """System notifications through plyer, or None if plyer isn't installed."""
+    try:
+        from plyer import notification
+    except ImportError:
+        return None
+
+    def deliver(title, message):
+        notification.notify(title=title, message=message, timeout=timeout)
+    return deliver
+
+
+class RecordingBackend:
+    """Stand-in backend that records what it receives; `delay` simulates a slow desktop."""
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.delivered = []
+
+    def __call__(self, title, message):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend failure")
+        self.delivered.append((time.monotonic(), title, message))
+
+
+class NotificationDispatcher:
+    """Delivers notifications on a worker thread. notify() is safe from any thread and never blocks.
+
+    Parameters:
+      - backends: list of functions(title, message), called in order for every delivery
+      - rate_limits: {category: minimum seconds between deliveries}; unknown categories are not limited
+      - coalesce_s: requests arriving within this long of the previous one form one burst
+      - max_pending: requests waiting beyond this are dropped
+    """
+    def __init__(self, backends, rate_limits=None, coalesce_s=0.5, max_pending=64, latency_samples=1000):
+        self.backends = list(backends)
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.coalesce_s = coalesce_s
+        self.delivered = 0
+        self.coalesced = 0      # requests merged into another delivery (including exact duplicates)
+        self.rate_limited = 0
+        self.queue_full = 0
+        self.failed = 0
+        self.latencies = collections.deque(maxlen=latency_samples)  # request -> all backends done, seconds
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._last_delivery = {}
+        self._stop = threading.Event()  # set when close() couldn't queue its sentinel: drop what's left
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def notify(self, title, message, category="reminder"):
+        """Queue a notification. Returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait((time.monotonic(), category, title, message))
+            return True
+        except queue.Full:
+            self.queue_full += 1
+            return False
+
+    def close(self, timeout=1.0):
+        """Deliver what is queued and stop the worker, waiting at most `timeout` seconds in total.
+
+        If the queue is still full after `timeout` (a backend is stuck, e.g. one that waits for
+        the Tk main loop that is calling close()), pending notifications are dropped instead.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put((None, None, None, None), timeout=timeout)
+        except queue.Full:
+            self._stop.set()
+        self._thread.join(max(deadline - time.monotonic(), 0.0))
+
+    def stats(self):
+        latencies = np.asarray(self.latencies, dtype=np.float64) * 1000.0
+        p50, p95 = np.percentile(latencies, [50, 95]) if len(latencies) else (0.0, 0.0)
+        return {
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "queue_full": self.queue_full,
+            "failed": self.failed,
+            "latency_ms_p50": round(float(p50), 1),
+            "latency_ms_p95": round(float(p95), 1),
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"notifications: {s['delivered']} delivered, {s['coalesced']} coalesced, "
+                f"{s['rate_limited']} rate limited, {s['queue_full']} queue full, {s['failed']} failed, "
+                f"latency p50 {s['latency_ms_p50']:.0f} ms p95 {s['latency_ms_p95']:.0f} ms")
+
+    # --- Worker thread ---
+    def _run(self):
+        while not self._stop.is_set():
+            first = self._queue.get()
+            if first[0] is None or self._stop.is_set():
+                return
+            burst = [first]
+            # Keep collecting while requests keep arriving close together
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.coalesce_s)
+                except queue.Empty:
+                    break
+                if item[0] is None:
+                    self._deliver(burst)
+                    return
+                burst.append(item)
+            if self._stop.is_set():
+                return
+            self._deliver(burst)
+
+    def _deliver(self, burst):
+        now = time.monotonic()
+        accepted = []
+        seen = set()
+        for item in burst:
+            created, category, title, message = item
+            if (title, message) in seen:
+                self.coalesced += 1
+                continue
+            limit = self.rate_limits.get(category, 0.0)
+            last = self._last_delivery.get(category)
+            if limit and last is not None and now - last < limit:
+                self.rate_limited += 1
+                continue
+            seen.add((title, message))
+            accepted.append(item)
+        if not accepted:
+            return
+        for _, category, _, _ in accepted:
+            self._last_delivery[category] = now
+
+        if len(accepted) == 1:
+            _, _, title, message = accepted[0]
+        else:
+            # Several different notifications at once: one notification listing them all
+            self.coalesced += len(accepted) - 1
+            title = f"{accepted[-1][2]} (+{len(accepted) - 1})"
+            message = "\n".join(f"• {item[2]}: {item[3]}" for item in accepted)
+
+        succeeded = 0
+        for backend in self.backends:
+            try:
+                backend(title, message)
+                succeeded += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error showing notification: {e}")
+        if succeeded:
+            self.delivered += 1
+        done = time.monotonic()
+        self.latencies.extend(done - item[0] for item in accepted)
@@ -0,0 +1,201 @@
+import collections
+import threading
+import time
+
+# --- Staged capture / inference / render pipeline ---
+# Running cap.read(), pose.process and drawing one after another on one thread makes
+# the end-to-end delay the sum of all three. Here each stage runs on its own:
+#
+#   capture thread --[frames]--> inference thread --[results]--> render stage (caller)
+#
+# Both queues hold at most one item. A new item replaces an old one that hasn't been
+# picked up yet (the old one is counted as dropped), so a slow stage always works on
+# the newest frame instead of a backlog of stale ones.
+#
+# The capture thread always grab()s every frame (cheap: no decode) so the camera keeps
+# streaming and its buffer stays fresh, but only retrieve()s (decodes) the frames it
+# delivers. That makes two cheap ways to do less work without closing the device:
+#   - pause() / resume(): deliver no frames at all
+#   - max_fps: deliver at most this many frames per second (None = every frame)
+
+
+class LatestQueue:
+    """Bounded queue of size 1 that drops the stale item instead of blocking the producer."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the newest item, or None on timeout / when the queue is closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_item or self.closed, timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self):
+        """Tell the consumer no more items will arrive."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    @property
+    def depth(self):
+        return 1 if self._has_item else 0
+
+
+class PosePipeline:
+    """Runs capture and inference on background threads; the caller is the render stage.
+
+    Parameters:
+      - cap: an opened cv2.VideoCapture (or anything with read(), grab() and retrieve()).
+        With release=True the capture thread releases it when it exits; otherwise the caller
+        releases it after stop().
+      - infer: function(frame) -> result, called on the inference thread.
+      - transform: optional function(frame) -> frame run on the capture thread (e.g. flip).
+      - profiler: optional instrumentation.StageProfiler; the "capture" and "flip" stages are timed here.
+
+    The render stage calls get_result(), which returns (capture_time, frame, result) for the
+    newest finished frame, or None. capture_time comes from time.monotonic(). Passing it to
+    frame_done() after the frame is displayed records the end-to-end latency.
+    """
+    def __init__(self, cap, infer, transform=None, latency_samples=10000, profiler=None, release=False):
+        self.cap = cap
+        self.infer = infer
+        self.transform = transform
+        self.profiler = profiler
+        self.release = release
+        self.max_fps = None
+        self.frames = LatestQueue()
+        self.results = LatestQueue()
+        self._stop_event = threading.Event()
+        self._running = threading.Event()  # cleared while paused
+        self._running.set()
+        self._threads = []
+        self.captured = 0
+        self.inferred = 0
+        self.rendered = 0
+        self.last_latency = 0.0  # seconds from capture to hand-off to the render stage
+        # End-to-end latencies (capture to displayed) reported by the render stage via frame_done()
+        self.latency_samples = collections.deque(maxlen=latency_samples)
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="pipeline-capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="pipeline-inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Stop both threads. Safe to call more than once."""
+        self._stop_event.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+
+    def pause(self):
+        """Stop delivering frames; the device keeps streaming (see the module comment)."""
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def finished(self):
+        """True once the source is exhausted (or stopped) and every result has been taken."""
+        return self.results.closed and self.results.depth == 0
+
+    def get_result(self, timeout=None):
+        item = self.results.get(timeout)
+        if item is not None:
+            self.rendered += 1
+            self.last_latency = time.monotonic() - item[0]
+        return item
+
+    def frame_done(self, captured_at):
+        """Called by the render stage once a frame is on screen, to record end-to-end latency."""
+        self.latency_samples.append(time.monotonic() - captured_at)
+
+    def stats(self):
+        """Per-stage counters: frames handled, current queue depth and stale frames dropped."""
+        return {
+            "capture": {"frames": self.captured, "queue_depth": self.frames.depth, "dropped": self.frames.dropped},
+            "inference": {"frames": self.inferred, "queue_depth": self.results.depth, "dropped": self.results.dropped},
+            "render": {"frames": self.rendered, "latency_ms": self.last_latency * 1000.0},
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"cap {s['capture']['frames']} (q{s['capture']['queue_depth']} drop {s['capture']['dropped']}) | "
+                f"inf {s['inference']['frames']} (q{s['inference']['queue_depth']} drop {s['inference']['dropped']}) | "
+                f"lat {s['render']['latency_ms']:.0f}ms")
+
+    # --- Stage threads ---
+    def _capture_loop(self):
+        try:
+            profiler = self.profiler
+            last_delivered = None
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                if not self.cap.grab():
+                    break
+                if not self._running.is_set():
+                    continue
+                captured_at = time.monotonic()
+                max_fps = self.max_fps
+                if max_fps and last_delivered is not None and captured_at - last_delivered < 1.0 / max_fps:
+                    continue
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    break
+                last_delivered = captured_at
+                if profiler is not None:
+                    profiler.record("capture", time.perf_counter() - start)
+                if self.transform is not None:
+                    start = time.perf_counter()
+                    frame = self.transform(frame)
+                    if profiler is not None:
+                        profiler.record("flip", time.perf_counter() - start)
+                self.captured += 1
+                self.frames.put((captured_at, frame))
+        finally:
+            self.frames.close()
+            if self.release:
+                self.cap.release()
+
+    def _inference_loop(self):
+        try:
+            while not self._stop_event.is_set():
+                item = self.frames.get(timeout=0.1)
+                if item is None:
+                    if self.frames.closed:
+                        break
+                    continue
+                captured_at, frame = item
+                result = self.infer(frame)
+                self.inferred += 1
+                self.results.put((captured_at, frame, result))
+        finally:
+            self.results.close()
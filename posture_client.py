@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import itertools
+import time
+
+import numpy as np
+
+import posture_service
+
+# --- Client and load generator for posture_service.py ---
+# PostureClient keeps one connection and pipelines requests: every call writes a request
+# and waits for the reply with the same id, so many calls can be in flight at once.
+#
+# The load generator opens --connections connections and keeps --concurrency requests
+# in flight on each for --seconds, then reports requests/s, latency percentiles and how
+# many requests the service turned away as overloaded.
+# Usage:
+#   python posture_service.py --pose-workers 0 &
+#   python posture_client.py --connections 4 --concurrency 64 --seconds 10
+#   python posture_client.py --jpeg frame.jpg --concurrency 4        (needs --pose-workers > 0)
+
+
+class PostureClient:
+    """Async client. Use `await PostureClient.connect(...)`, then score() / analyze_jpeg()."""
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._receiver = asyncio.get_running_loop().create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def score(self, frame, image_width, image_height):
+        """Score one (33, 4) landmark frame. Returns a dict (see _decode)."""
+        payload = np.ascontiguousarray(frame, dtype="<f4").tobytes()
+        return await self._request(posture_service.KIND_LANDMARKS, image_width, image_height, payload)
+
+    async def analyze_jpeg(self, jpeg_bytes):
+        """Run Pose on the server and score the result."""
+        return await self._request(posture_service.KIND_JPEG, 0, 0, jpeg_bytes)
+
+    async def _request(self, kind, width, height, payload):
+        request_id = next(self._ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(posture_service.REQUEST.pack(kind, request_id, width, height, len(payload)) + payload)
+        await self._writer.drain()
+        return await future
+
+    async def _receive(self):
+        size = posture_service.RESPONSE.size
+        try:
+            while True:
+                data = await self._reader.readexactly(size)
+                request_id, *fields = posture_service.RESPONSE.unpack(data)
+                future = self._waiting.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(_decode(fields))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"connection closed: {e}"))
+            self._waiting.clear()
+
+    async def close(self):
+        self._writer.close()
+        self._receiver.cancel()
+
+
+def _decode(fields):
+    result, status, left, right, diff, *bbox = fields
+    return {"result": result, "status": status, "angle_left_neck": left, "angle_right_neck": right,
+            "shoulder_y_diff": diff, "bbox": bbox}
+
+
+# --- Load generator ---
+async def _load(client, make_request, deadline, latencies, results):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        reply = await make_request(client)
+        latencies.append(time.perf_counter() - start)
+        results[reply["result"]] = results.get(reply["result"], 0) + 1
+
+
+async def run_load(args):
+    if args.jpeg:
+        with open(args.jpeg, "rb") as f:
+            jpeg = f.read()
+
+        def make_request(client):
+            return client.analyze_jpeg(jpeg)
+    else:
+        # Realistic landmarks: a seated person with a bit of noise (see bench_posture.make_frames)
+        import bench_posture
+        frames = bench_posture.make_frames(1024)
+        counter = itertools.count()
+
+        def make_request(client):
+            return client.score(frames[next(counter) % len(frames)], 640, 480)
+
+    clients = [await PostureClient.connect(args.host, args.port, args.unix) for _ in range(args.connections)]
+    latencies, results = [], {}
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    await asyncio.gather(*(_load(client, make_request, deadline, latencies, results)
+                           for client in clients for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        await client.close()
+
+    latencies = np.asarray(latencies) * 1000.0
+    p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9]) if len(latencies) else (0.0, 0.0, 0.0)
+    ok = results.get(posture_service.RESULT_OK, 0)
+    print(f"{args.connections} connections x {args.concurrency} in flight, {elapsed:.1f} s")
+    print(f"{len(latencies) / elapsed:,.0f} requests/s ({ok / elapsed:,.0f} ok/s), "
+          f"latency p50 {p50:.2f} ms, p99 {p99:.2f} ms, p99.9 {p999:.2f} ms, max {latencies.max() if len(latencies) else 0.0:.2f} ms")
+    print(", ".join(f"{count} {posture_service.RESULT_LABELS[code]}" for code, count in sorted(results.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for posture_service.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight per connection")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--jpeg", help="send this JPEG (Pose on the server) instead of landmarks")
+    args = parser.parse_args()
+    asyncio.run(run_load(args))
+
+
+if __name__ == "__main__":
+    main()
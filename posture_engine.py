@@ -0,0 +1,308 @@
+import math
+
+import numpy as np
+
+# --- Shared posture engine ---
+# Both detect.py and ui.py used to score posture one landmark at a time through
+# mp.solutions.pose.PoseLandmark lookups and Python lists. This module works on
+# landmarks stored as one contiguous float32 array instead:
+#   - a single frame has shape (33, 4): x, y, z, visibility (normalized 0..1)
+#   - a batch of frames has shape (N_frames, 33, 4)
+# Frames with no detected person are stored as all-NaN rows.
+
+# --- 1. Landmark layout and thresholds ---
+# Indices follow mp.solutions.pose.PoseLandmark so we don't need mediapipe here.
+LANDMARK_COUNT = 33
+LANDMARK_FIELDS = 4  # x, y, z, visibility
+NOSE = 0
+LEFT_EAR = 7
+RIGHT_EAR = 8
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+
+# Keypoints used by the rules, ordered so that basic slices give each group:
+#   [0:2] shoulders (left, right), [2:4] ears (left, right), [4:5] nose
+KEYPOINTS = np.array([LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_EAR, RIGHT_EAR, NOSE], dtype=np.intp)
+
+# Note: For full posture analysis (e.g., back slouching, hip angle), landmarks like Hips
+# and Knees are crucial. Since we only see the upper body, the rules focus on neck/head
+# posture and shoulder symmetry:
+#   Rule 1 - Forward head / neck strain: the shoulder-ear-nose angle gets smaller when the
+#            ear moves forward of the shoulder (correct posture is roughly 170-180 degrees).
+#   Rule 2 - Leaning: a large difference between the left and right shoulder heights.
+#            Only checked if Rule 1 did not fire.
+#   Rule 3 - Otherwise the posture is considered correct.
+# Same calibration values as the original scripts (these still need tuning per setup!)
+THRESHOLD_NECK_FORWARD = 165       # degrees, shoulder-ear-nose angle below this = forward head
+THRESHOLD_SHOULDER_ASYMMETRY = 25  # pixels, shoulder height difference above this = leaning
+BBOX_PADDING = 10                  # pixels added around the landmark bounding box
+NAN = float("nan")
+
+# --- 2. Status codes ---
+# Status is stored as a small integer so whole batches fit in one int8 array.
+STATUS_NO_PERSON = 0
+STATUS_CORRECT = 1
+STATUS_FORWARD_HEAD = 2
+STATUS_LEANING = 3
+STATUS_CANNOT_ANALYZE = 4
+# Only produced by the optional rules in posture_rules.py
+STATUS_HEAD_TILT = 5
+STATUS_HUNCHING = 6
+# Set by ui.py while a guided exercise runs (the stretches look like bad posture on purpose);
+# never produced by the classifiers
+STATUS_EXERCISING = 7
+
+# Statuses that count as bad posture (alerts, analytics, clips)
+BAD_STATUSES = frozenset((STATUS_FORWARD_HEAD, STATUS_LEANING, STATUS_HEAD_TILT, STATUS_HUNCHING))
+
+# Text used by detect.py
+STATUS_LABELS = {
+    STATUS_NO_PERSON: "No Person Detected",
+    STATUS_CORRECT: "Correct Posture",
+    STATUS_FORWARD_HEAD: "Incorrect Posture: Forward Head/Slouching",
+    STATUS_LEANING: "Incorrect Posture: Leaning Shoulder",
+    STATUS_CANNOT_ANALYZE: "Cannot Analyze Posture (Missing Data/Error)",
+    STATUS_HEAD_TILT: "Incorrect Posture: Head Tilted",
+    STATUS_HUNCHING: "Incorrect Posture: Hunching",
+    STATUS_EXERCISING: "Guided Exercise (Posture Not Scored)",
+}
+
+# Shorter text used by the ui.py Detect tab
+STATUS_LABELS_SHORT = {
+    STATUS_NO_PERSON: "No Person Detected",
+    STATUS_CORRECT: "Correct Posture",
+    STATUS_FORWARD_HEAD: "Incorrect: Forward Head",
+    STATUS_LEANING: "Incorrect: Leaning",
+    STATUS_CANNOT_ANALYZE: "Cannot Analyze",
+    STATUS_HEAD_TILT: "Incorrect: Head Tilt",
+    STATUS_HUNCHING: "Incorrect: Hunching",
+    STATUS_EXERCISING: "Exercising",
+}
+
+# BGR colors for the status text and bounding box
+STATUS_COLORS = {
+    STATUS_NO_PERSON: (0, 165, 255),      # Orange
+    STATUS_CORRECT: (0, 255, 0),          # Green
+    STATUS_FORWARD_HEAD: (0, 0, 255),     # Red
+    STATUS_LEANING: (0, 0, 255),          # Red
+    STATUS_CANNOT_ANALYZE: (0, 165, 255), # Orange
+    STATUS_HEAD_TILT: (0, 0, 255),        # Red
+    STATUS_HUNCHING: (0, 0, 255),         # Red
+    STATUS_EXERCISING: (255, 191, 0),     # Light blue
+}
+
+
+# --- 3. Converting MediaPipe results ---
+def landmarks_to_array(landmarks, out=None):
+    """Copy a MediaPipe landmark list into a (33, 4) float32 array.
+
+    Pass `out` to reuse an existing buffer. `None` or an empty list gives an all-NaN frame.
+    """
+    if out is None:
+        out = np.empty((LANDMARK_COUNT, LANDMARK_FIELDS), dtype=np.float32)
+    if not landmarks:
+        out.fill(np.nan)
+        return out
+    out[:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks]
+    return out
+
+
+# --- 4. Vectorized helpers ---
+def calculate_angle(a, b, c):
+    """Angle in degrees at vertex `b`, vectorized over any leading dimensions.
+
+    `a`, `b` and `c` are (..., 2) arrays (or plain [x, y] lists for a single angle).
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+    ba = a - b
+    bc = c - b
+    # cos(theta) = (A . B) / (|A| * |B|)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine_angle = np.sum(ba * bc, axis=-1) / (np.hypot(ba[..., 0], ba[..., 1]) * np.hypot(bc[..., 0], bc[..., 1]))
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def measure_batch(frames, image_width, image_height):
+    """Neck angles, shoulder height difference and presence for (N_frames, 33, 4) landmarks.
+
+    Only reads the keypoints (and the x/y columns for presence), so it is cheap enough to run
+    once over a long recording and then classify_batch() it with many threshold pairs.
+    Returns a dict of per-frame arrays: angle_left_neck, angle_right_neck, shoulder_y_diff, no_person.
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 2:
+        frames = frames[np.newaxis]
+    scale = np.array([image_width, image_height], dtype=np.float64)
+
+    # Pixel coordinates of the keypoints, shape (N, 5, 2)
+    pts = frames[:, KEYPOINTS, :2].astype(np.float64) * scale
+    shoulders, ears, nose = pts[:, 0:2], pts[:, 2:4], pts[:, 4:5]
+
+    # Neck angles for both sides at once: shoulder-ear-nose, shape (N, 2)
+    neck = calculate_angle(shoulders, ears, nose)
+    return {
+        "angle_left_neck": neck[:, 0],
+        "angle_right_neck": neck[:, 1],
+        "shoulder_y_diff": np.abs(shoulders[:, 0, 1] - shoulders[:, 1, 1]),
+        "no_person": np.isnan(frames[:, :, :2]).all(axis=(1, 2)),
+    }
+
+
+def classify_batch(measurements, neck_threshold=THRESHOLD_NECK_FORWARD,
+                   shoulder_threshold=THRESHOLD_SHOULDER_ASYMMETRY):
+    """int8 status codes (STATUS_*) for the output of measure_batch()."""
+    left, right = measurements["angle_left_neck"], measurements["angle_right_neck"]
+    shoulder_y_diff = measurements["shoulder_y_diff"]
+
+    # Same rule priority as before: forward head wins over leaning
+    forward = (left < neck_threshold) | (right < neck_threshold)
+    leaning = ~forward & (shoulder_y_diff > shoulder_threshold)
+    broken = ~np.isfinite(left) | ~np.isfinite(right) | ~np.isfinite(shoulder_y_diff)
+
+    status = np.full(len(left), STATUS_CORRECT, dtype=np.int8)
+    status[leaning] = STATUS_LEANING
+    status[forward] = STATUS_FORWARD_HEAD
+    status[broken & ~forward & ~leaning] = STATUS_CANNOT_ANALYZE
+    status[measurements["no_person"]] = STATUS_NO_PERSON
+    return status
+
+
+def analyze_batch(frames, image_width, image_height,
+                  neck_threshold=THRESHOLD_NECK_FORWARD,
+                  shoulder_threshold=THRESHOLD_SHOULDER_ASYMMETRY, rules=None):
+    """Score a whole (N_frames, 33, 4) landmark array at once.
+
+    `rules` is an optional posture_rules.RuleSet; when given it decides the status
+    instead of the two built-in thresholds (the measurements below are still returned).
+
+    Returns a dict of per-frame arrays:
+      - status: int8 status codes (STATUS_*)
+      - angle_left_neck / angle_right_neck: degrees (NaN where not available)
+      - shoulder_y_diff: pixels
+      - bbox: int32 (N, 4) as min_x, min_y, max_x, max_y with BBOX_PADDING applied
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    if frames.ndim == 2:
+        frames = frames[np.newaxis]
+    scale = np.array([image_width, image_height], dtype=np.float64)
+    measurements = measure_batch(frames, image_width, image_height)
+    if rules is not None:
+        status = rules.evaluate_batch(frames, image_width, image_height)["status"]
+    else:
+        status = classify_batch(measurements, neck_threshold, shoulder_threshold)
+
+    # Bounding box over all 33 landmarks, ignoring NaNs
+    xy = frames[:, :, :2].astype(np.float64) * scale
+    missing = np.isnan(xy)
+    mins = np.where(missing, np.inf, xy).min(axis=1)
+    maxs = np.where(missing, -np.inf, xy).max(axis=1)
+    bbox = np.zeros((len(frames), 4), dtype=np.int32)
+    found = ~measurements["no_person"]
+    bbox[found, 0:2] = np.trunc(mins[found]) - BBOX_PADDING
+    bbox[found, 2:4] = np.trunc(maxs[found]) + BBOX_PADDING
+
+    return {
+        "status": status,
+        "angle_left_neck": measurements["angle_left_neck"],
+        "angle_right_neck": measurements["angle_right_neck"],
+        "shoulder_y_diff": measurements["shoulder_y_diff"],
+        "bbox": bbox,
+    }
+
+
+# --- 5. Single-frame fast path ---
+# For a single frame the per-call overhead of NumPy ufuncs on 5 points costs more than
+# the math itself, so this path reads scalars out of a reused buffer and uses `math`.
+class PostureEngine:
+    """Scores one frame at a time using buffers allocated once in __init__.
+
+    After `analyze()` the results are available as attributes:
+    status, angle_left_neck, angle_right_neck, shoulder_y_diff and bbox.
+    `bbox` is a reused int32 buffer (min_x, min_y, max_x, max_y) - copy it if you need to keep it.
+    With `rules` (a posture_rules.RuleSet) the status comes from those rules; the
+    measurements above are still filled in for the overlays.
+    """
+    def __init__(self, neck_threshold=THRESHOLD_NECK_FORWARD, shoulder_threshold=THRESHOLD_SHOULDER_ASYMMETRY,
+                 rules=None):
+        self.neck_threshold = neck_threshold
+        self.shoulder_threshold = shoulder_threshold
+        self.rules = rules
+
+        self.frame = np.full((LANDMARK_COUNT, LANDMARK_FIELDS), np.nan, dtype=np.float32)
+        self._mins = np.empty(LANDMARK_FIELDS, dtype=np.float32)
+        self._maxs = np.empty(LANDMARK_FIELDS, dtype=np.float32)
+        self.bbox = np.zeros(4, dtype=np.int32)
+
+        self.status = STATUS_NO_PERSON
+        self.angle_left_neck = NAN
+        self.angle_right_neck = NAN
+        self.shoulder_y_diff = NAN
+
+    def analyze_landmarks(self, landmarks, image_width, image_height):
+        """Copy a MediaPipe landmark list into the internal buffer and score it."""
+        if not landmarks:
+            self.frame.fill(np.nan)
+            return self._set_no_person()
+        landmarks_to_array(landmarks, out=self.frame)
+        return self.analyze(self.frame, image_width, image_height)
+
+    def analyze(self, frame, image_width, image_height):
+        """Score a (33, 4) float32 landmark array. Returns the status code."""
+        # Bounding box first: fmin/fmax skip NaNs, so an all-NaN result means no person
+        np.fmin.reduce(frame, axis=0, out=self._mins)
+        np.fmax.reduce(frame, axis=0, out=self._maxs)
+        min_x = self._mins.item(0)
+        if min_x != min_x:
+            return self._set_no_person()
+        self.bbox[0] = int(min_x * image_width) - BBOX_PADDING
+        self.bbox[1] = int(self._mins.item(1) * image_height) - BBOX_PADDING
+        self.bbox[2] = int(self._maxs.item(0) * image_width) + BBOX_PADDING
+        self.bbox[3] = int(self._maxs.item(1) * image_height) + BBOX_PADDING
+
+        # Keypoints in pixel coordinates
+        item = frame.item
+        nose_x, nose_y = item(NOSE, 0) * image_width, item(NOSE, 1) * image_height
+        lsh_y = item(LEFT_SHOULDER, 1) * image_height
+        rsh_y = item(RIGHT_SHOULDER, 1) * image_height
+        left = self.angle_left_neck = _neck_angle(
+            item(LEFT_SHOULDER, 0) * image_width, lsh_y,
+            item(LEFT_EAR, 0) * image_width, item(LEFT_EAR, 1) * image_height,
+            nose_x, nose_y)
+        right = self.angle_right_neck = _neck_angle(
+            item(RIGHT_SHOULDER, 0) * image_width, rsh_y,
+            item(RIGHT_EAR, 0) * image_width, item(RIGHT_EAR, 1) * image_height,
+            nose_x, nose_y)
+        diff = self.shoulder_y_diff = abs(lsh_y - rsh_y)
+
+        if self.rules is not None:
+            self.status = self.rules.evaluate(frame, image_width, image_height)
+            return self.status
+        # Rules, in the same priority order as the original analyze_posture
+        if left < self.neck_threshold or right < self.neck_threshold:
+            self.status = STATUS_FORWARD_HEAD
+        elif diff > self.shoulder_threshold:
+            self.status = STATUS_LEANING
+        elif left != left or right != right or diff != diff:
+            self.status = STATUS_CANNOT_ANALYZE
+        else:
+            self.status = STATUS_CORRECT
+        return self.status
+
+    def _set_no_person(self):
+        self.status = STATUS_NO_PERSON
+        self.angle_left_neck = self.angle_right_neck = self.shoulder_y_diff = NAN
+        self.bbox.fill(0)
+        return self.status
+
+
+def _neck_angle(shoulder_x, shoulder_y, ear_x, ear_y, nose_x, nose_y):
+    """Scalar shoulder-ear-nose angle in degrees (NaN if a vector has zero length)."""
+    ba_x, ba_y = shoulder_x - ear_x, shoulder_y - ear_y
+    bc_x, bc_y = nose_x - ear_x, nose_y - ear_y
+    norm = math.sqrt(ba_x * ba_x + ba_y * ba_y) * math.sqrt(bc_x * bc_x + bc_y * bc_y)
+    if not norm > 0:
+        return NAN
+    cosine_angle = (ba_x * bc_x + ba_y * bc_y) / norm
+    return math.degrees(math.acos(min(1.0, max(-1.0, cosine_angle))))
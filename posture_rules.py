@@ -0,0 +1,510 @@
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+import posture_engine
+
+# --- Declarative posture rules ---
+# Rules are plain dicts (posture_rules.json, or DEFAULT_RULES below):
+#
+#   {"name": "forward_head", "status": "forward_head", "priority": 10,
+#    "measure": {"type": "angle", "points": [["left_shoulder", "left_ear", "nose"],
+#                                            ["right_shoulder", "right_ear", "nose"]], "reduce": "min"},
+#    "below": 165}
+#
+# A rule fires when its measure is below / above the threshold. When several rules fire,
+# the lowest priority number wins; when none fires the frame is correct, or "cannot
+# analyze" if a rule had no value (missing landmarks or a failed visibility gate).
+#
+# Measures (points are PoseLandmark names in lower case, or mid_shoulder / mid_ear / mid_hip):
+#   angle     [a, b, c] triplets: angle at b in degrees, in pixel space
+#   distance  [a, b] pairs: |b - a| along "axis" x, y or xy (default)
+#   tilt      [a, b] pairs: angle of the line a-b from horizontal, 0-90 degrees
+#   depth     [a, b] pairs: z(a) - z(b) (MediaPipe z: smaller = closer to the camera)
+# with optional
+#   reduce      min / max / mean over several points entries (NaN entries are ignored)
+#   scale       distance / depth unit: "px" (pixels; changes with resolution), "image"
+#               (fraction of the image height, or image width for depth), "shoulder_width"
+#   visibility  minimum landmark visibility of every point used, else no value
+#
+# compile_rules() turns a rule list into a RuleSet. Measures of the same type from all
+# rules are stacked into one index table, so evaluating N frames is one gather and a
+# handful of NumPy operations per measure type, whatever the number of rules, and shared
+# measures (e.g. the shoulders) are computed once. For one frame at a time (the camera
+# loop) NumPy's per-call overhead would dominate, so the same tables are also turned into
+# the source of a plain Python function (scalars and `math`, like PostureEngine.analyze)
+# that is compiled once with exec(). python posture_rules.py profile reports what each
+# rule costs on both paths. evaluate_batch() is measure_batch() + classify_batch(); calling
+# them separately lets a threshold sweep measure a recording once.
+
+RULES_PATH = "posture_rules.json"
+
+LANDMARK_NAMES = (
+    "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner", "right_eye", "right_eye_outer",
+    "left_ear", "right_ear", "mouth_left", "mouth_right", "left_shoulder", "right_shoulder", "left_elbow",
+    "right_elbow", "left_wrist", "right_wrist", "left_pinky", "right_pinky", "left_index", "right_index",
+    "left_thumb", "right_thumb", "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle",
+    "left_heel", "right_heel", "left_foot_index", "right_foot_index",
+)
+# Midpoints, appended after the 33 landmarks
+VIRTUAL_POINTS = {
+    "mid_shoulder": (posture_engine.LEFT_SHOULDER, posture_engine.RIGHT_SHOULDER),
+    "mid_ear": (posture_engine.LEFT_EAR, posture_engine.RIGHT_EAR),
+    "mid_hip": (23, 24),
+}
+POINT_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+POINT_INDEX.update({name: len(LANDMARK_NAMES) + i for i, name in enumerate(VIRTUAL_POINTS)})
+
+STATUS_BY_NAME = {
+    "forward_head": posture_engine.STATUS_FORWARD_HEAD,
+    "leaning": posture_engine.STATUS_LEANING,
+    "head_tilt": posture_engine.STATUS_HEAD_TILT,
+    "hunching": posture_engine.STATUS_HUNCHING,
+}
+MEASURE_POINTS = {"angle": 3, "distance": 2, "tilt": 2, "depth": 2}
+REFERENCE_HEIGHT = 480  # the pixel thresholds in posture_engine were tuned on 640x480
+
+# The built-in rules: the two original ones (same thresholds as posture_engine, the
+# shoulder difference expressed as a fraction of the image height so it no longer
+# depends on the camera resolution) plus two that are off until tuned for a setup.
+DEFAULT_RULES = [
+    {"name": "forward_head", "status": "forward_head", "priority": 10,
+     "measure": {"type": "angle", "reduce": "min",
+                 "points": [["left_shoulder", "left_ear", "nose"], ["right_shoulder", "right_ear", "nose"]]},
+     "below": posture_engine.THRESHOLD_NECK_FORWARD},
+    {"name": "leaning", "status": "leaning", "priority": 20,
+     "measure": {"type": "distance", "axis": "y", "scale": "image", "points": [["left_shoulder", "right_shoulder"]]},
+     "above": round(posture_engine.THRESHOLD_SHOULDER_ASYMMETRY / REFERENCE_HEIGHT, 4)},
+    {"name": "head_tilt", "status": "head_tilt", "priority": 30, "enabled": False,
+     "measure": {"type": "tilt", "points": [["right_ear", "left_ear"]]},
+     "above": 15.0, "visibility": 0.5},
+    {"name": "hunching", "status": "hunching", "priority": 15, "enabled": False,
+     "measure": {"type": "depth", "scale": "shoulder_width", "points": [["nose", "mid_shoulder"]]},
+     "below": -0.9, "visibility": 0.5},
+]
+
+
+class RuleError(ValueError):
+    pass
+
+
+class _Table:
+    """Deduplicated point tuples of one measure type (with their options) -> column numbers."""
+    def __init__(self):
+        self.columns = {}
+
+    def add(self, key):
+        return self.columns.setdefault(key, len(self.columns))
+
+    def array(self, position):
+        return np.array([key[position] for key in self.columns], dtype=np.intp)
+
+
+class RuleSet:
+    """Compiled rules. evaluate_batch() for (N, 33, 4) arrays, evaluate() for one (33, 4) frame."""
+    def __init__(self, rules):
+        self.rules = [rule for rule in rules if rule.get("enabled", True)]
+        self.rules.sort(key=lambda rule: rule.get("priority", 100))
+        tables = {kind: _Table() for kind in MEASURE_POINTS}
+        self._compiled = []
+        for rule in self.rules:
+            measure = rule["measure"]
+            kind = measure["type"]
+            scale = measure.get("scale", "px")
+            axis = {"x": 0, "y": 1, "xy": 2}[measure.get("axis", "xy")]
+            columns = []
+            points = set()
+            for names in measure["points"]:
+                indices = tuple(POINT_INDEX[name] for name in names)
+                for name in names:
+                    points.update(VIRTUAL_POINTS.get(name, (POINT_INDEX[name],)))
+                key = indices + ((axis, scale) if kind == "distance" else (scale,) if kind == "depth" else ())
+                columns.append(tables[kind].add(key))
+            if "below" in rule:
+                threshold, below = float(rule["below"]), True
+            else:
+                threshold, below = float(rule["above"]), False
+            self._compiled.append({
+                "name": rule["name"], "status": STATUS_BY_NAME[rule["status"]], "kind": kind,
+                "columns": np.array(columns, dtype=np.intp), "reduce": measure.get("reduce", "min"),
+                "threshold": threshold, "below": below, "visibility": None if rule.get("visibility") is None else float(rule["visibility"]),
+                "points": np.array(sorted(points), dtype=np.intp),  # real landmarks, for the visibility gate
+            })
+        self._angles = tables["angle"]
+        self._distances = tables["distance"]
+        self._tilts = tables["tilt"]
+        self._depths = tables["depth"]
+        self._distance_axis = self._distances.array(2)
+        self._distance_scale = [key[3] for key in self._distances.columns]
+        self._depth_scale = [key[2] for key in self._depths.columns]
+        self.source = self._generate_source()
+        namespace = {"_angle": posture_engine._neck_angle, "_fmin": _fmin, "_fmax": _fmax, "_mean": _mean,
+                     "_div": _div, "isfinite": math.isfinite, "hypot": math.hypot, "atan2": math.atan2,
+                     "degrees": math.degrees, "NAN": posture_engine.NAN}
+        exec(compile(self.source, "<posture rules>", "exec"), namespace)
+        self._evaluate_one = namespace["evaluate"]
+        self._last_values = ()
+
+    @property
+    def names(self):
+        return [rule["name"] for rule in self._compiled]
+
+    @property
+    def thresholds(self):
+        """Threshold of every enabled rule, by rule name."""
+        return {rule["name"]: rule["threshold"] for rule in self._compiled}
+
+    @property
+    def values(self):
+        """Values of the last evaluate() call, by rule name (for overlays / debugging)."""
+        return dict(zip(self.names, self._last_values))
+
+    def _generate_source(self):
+        """Python source of evaluate(item, w, h) -> (status, values) for one frame (`item` = frame.item)."""
+        body = []
+        points = set()
+        for key in self._angles.columns:
+            points.update(key)
+        for table in (self._distances, self._tilts, self._depths):
+            for key in table.columns:
+                points.update(key[:2])
+        uses_depth = bool(self._depths.columns)
+        virtual_base = len(LANDMARK_NAMES)
+        virtual = list(VIRTUAL_POINTS.values())
+        for i in list(points):
+            if i >= virtual_base:
+                points.update(virtual[i - virtual_base])
+        for i in sorted(points):
+            if i < virtual_base:
+                body.append(f"x{i} = item({i}, 0) * w; y{i} = item({i}, 1) * h")
+                if uses_depth:
+                    body.append(f"z{i} = item({i}, 2) * w")
+        for i in sorted(points):
+            if i >= virtual_base:
+                a, b = virtual[i - virtual_base]
+                body.append(f"x{i} = (x{a} + x{b}) * 0.5; y{i} = (y{a} + y{b}) * 0.5")
+                if uses_depth:
+                    body.append(f"z{i} = (z{a} + z{b}) * 0.5")
+        if "shoulder_width" in self._distance_scale + self._depth_scale:
+            ls, rs = posture_engine.LEFT_SHOULDER, posture_engine.RIGHT_SHOULDER
+            body.append(f"sw = hypot(x{ls} - x{rs}, y{ls} - y{rs})")
+        divide = {"px": "{}", "image": "{} / {size}", "shoulder_width": "_div({}, sw)"}
+
+        for column, (a, b, c) in enumerate(self._angles.columns):
+            body.append(f"angle_{column} = _angle(x{a}, y{a}, x{b}, y{b}, x{c}, y{c})")
+        for column, (a, b, axis, scale) in enumerate(self._distances.columns):
+            dx, dy = f"abs(x{b} - x{a})", f"abs(y{b} - y{a})"
+            value = (dx, dy, f"hypot(x{b} - x{a}, y{b} - y{a})")[axis]
+            body.append(f"distance_{column} = " + divide[scale].format(value, size="h"))
+        for column, (a, b) in enumerate(self._tilts.columns):
+            body.append(f"tilt_{column} = degrees(atan2(abs(y{b} - y{a}), abs(x{b} - x{a})))")
+        for column, (a, b, scale) in enumerate(self._depths.columns):
+            body.append(f"depth_{column} = " + divide[scale].format(f"(z{a} - z{b})", size="w"))
+
+        body.append("incomplete = False")
+        checks = []
+        for number, rule in enumerate(self._compiled):
+            columns = [f"{rule['kind']}_{column}" for column in rule["columns"]]
+            value = columns[0] if len(columns) == 1 else \
+                "{}({})".format({"min": "_fmin", "max": "_fmax", "mean": "_mean"}[rule["reduce"]], ", ".join(columns))
+            body.append(f"# {rule['name']!r}")
+            body.append(f"v{number} = {value}")
+            missing = " or ".join(f"not isfinite({column})" for column in columns)
+            if rule["visibility"] is not None:
+                gate = " and ".join(f"item({i}, 3) >= {rule['visibility']!r}" for i in rule["points"])
+                body.append(f"if not ({gate}): v{number} = NAN; incomplete = True")
+                body.append(f"elif {missing}: incomplete = True")
+            else:
+                body.append(f"if {missing}: incomplete = True")
+            compare = "<" if rule["below"] else ">"
+            checks.append(f"if v{number} {compare} {rule['threshold']!r}: return {rule['status']}, values")
+        body.append("values = (" + "".join(f"v{number}, " for number in range(len(self._compiled))) + ")")
+        body.extend(checks)
+        body.append(f"return ({posture_engine.STATUS_CANNOT_ANALYZE} if incomplete else {posture_engine.STATUS_CORRECT}), values")
+        return "def evaluate(item, w, h):\n" + "".join(f"    {line}\n" for line in body)
+
+    def evaluate_batch(self, frames, image_width, image_height):
+        """Returns {"status": int8 (N,), "values": {rule name: float64 (N,)}}."""
+        measured = self.measure_batch(frames, image_width, image_height)
+        return {"status": self.classify_batch(measured), "values": measured["values"]}
+
+    def measure_batch(self, frames, image_width, image_height):
+        """Per-rule values of (N, 33, 4) frames, before any threshold is applied (see classify_batch).
+
+        Returns {"values": {rule name: float64 (N,)}, "missing": {rule name: bool (N,)}, "no_person": bool (N,)}.
+        """
+        frames = np.asarray(frames)
+        if frames.ndim == 2:
+            frames = frames[np.newaxis]
+        n = len(frames)
+        xyz = np.empty((n, len(POINT_INDEX), 3), dtype=np.float64)
+        xyz[:, :len(LANDMARK_NAMES)] = frames[:, :, :3]
+        for i, (a, b) in enumerate(VIRTUAL_POINTS.values()):
+            xyz[:, len(LANDMARK_NAMES) + i] = (xyz[:, a] + xyz[:, b]) * 0.5
+        xyz[:, :, 0] *= image_width
+        xyz[:, :, 1] *= image_height
+        pixels = xyz[:, :, :2]
+        shoulder_width = None
+
+        def scales(names, image_size):
+            nonlocal shoulder_width
+            if shoulder_width is None and "shoulder_width" in names:
+                delta = pixels[:, posture_engine.LEFT_SHOULDER] - pixels[:, posture_engine.RIGHT_SHOULDER]
+                shoulder_width = np.hypot(delta[:, 0], delta[:, 1])[:, np.newaxis]
+                shoulder_width[shoulder_width == 0] = np.nan
+            columns = [shoulder_width if name == "shoulder_width" else np.full((n, 1), image_size if name == "image" else 1.0)
+                       for name in names]
+            return np.concatenate(columns, axis=1)
+
+        tables = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self._angles.columns:
+                a, b, c = (self._angles.array(i) for i in range(3))
+                tables["angle"] = posture_engine.calculate_angle(pixels[:, a], pixels[:, b], pixels[:, c])
+            if self._distances.columns:
+                delta = np.abs(pixels[:, self._distances.array(1)] - pixels[:, self._distances.array(0)])
+                axis = self._distance_axis
+                value = np.where(axis == 0, delta[..., 0], np.where(axis == 1, delta[..., 1], np.hypot(delta[..., 0], delta[..., 1])))
+                tables["distance"] = value / scales(self._distance_scale, image_height)
+            if self._tilts.columns:
+                delta = np.abs(pixels[:, self._tilts.array(1)] - pixels[:, self._tilts.array(0)])
+                tables["tilt"] = np.degrees(np.arctan2(delta[..., 1], delta[..., 0]))
+            if self._depths.columns:
+                # z is in the same units as x (normalized by the image width); xyz[..., 2] wasn't scaled
+                depth = (xyz[:, self._depths.array(0), 2] - xyz[:, self._depths.array(1), 2]) * image_width
+                tables["depth"] = depth / scales(self._depth_scale, image_width)
+
+            values = {}
+            missing_by_rule = {}
+            for rule in self._compiled:
+                columns = tables[rule["kind"]][:, rule["columns"]]
+                missing = ~np.isfinite(columns).all(axis=1)
+                if rule["visibility"] is not None:
+                    missing |= ~(frames[:, rule["points"], 3].min(axis=1) >= rule["visibility"])
+                    columns = np.where(missing[:, np.newaxis], np.nan, columns)
+                if columns.shape[1] == 1:
+                    value = columns[:, 0]
+                elif rule["reduce"] == "max":
+                    value = np.fmax.reduce(columns, axis=1)
+                elif rule["reduce"] == "mean":
+                    present = ~np.isnan(columns)
+                    value = np.where(present, columns, 0.0).sum(axis=1) / present.sum(axis=1)
+                else:
+                    value = np.fmin.reduce(columns, axis=1)
+                values[rule["name"]] = value
+                missing_by_rule[rule["name"]] = missing
+        return {"values": values, "missing": missing_by_rule,
+                "no_person": np.isnan(frames[:, :, :2]).all(axis=(1, 2))}
+
+    def classify_batch(self, measured, thresholds=None):
+        """int8 (N,) status codes from measure_batch() output.
+
+        `thresholds` ({rule name: threshold}) overrides rule thresholds, e.g. to sweep them
+        over a recording without measuring it again.
+        """
+        thresholds = thresholds or {}
+        n = len(measured["no_person"])
+        status = np.full(n, posture_engine.STATUS_CORRECT, dtype=np.int8)
+        fired = np.zeros(n, dtype=bool)
+        incomplete = np.zeros(n, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for rule in self._compiled:
+                value = measured["values"][rule["name"]]
+                threshold = thresholds.get(rule["name"], rule["threshold"])
+                fires = value < threshold if rule["below"] else value > threshold
+                # Rules are in priority order: the first one that fires keeps its status
+                status[fires & ~fired] = rule["status"]
+                fired |= fires
+                incomplete |= measured["missing"][rule["name"]]
+        status[incomplete & ~fired] = posture_engine.STATUS_CANNOT_ANALYZE
+        status[measured["no_person"]] = posture_engine.STATUS_NO_PERSON
+        return status
+
+    def evaluate(self, frame, image_width, image_height):
+        """Status code of one (33, 4) frame; per-rule values end up in self.values."""
+        status, self._last_values = self._evaluate_one(frame.item, image_width, image_height)
+        if status != posture_engine.STATUS_CORRECT and np.isnan(frame[:, :2]).all():
+            return posture_engine.STATUS_NO_PERSON
+        return status
+
+
+def _fmin(*values):
+    """min() ignoring NaN (NaN if all are NaN), like np.fmin."""
+    values = [value for value in values if value == value]
+    return min(values) if values else posture_engine.NAN
+
+
+def _fmax(*values):
+    values = [value for value in values if value == value]
+    return max(values) if values else posture_engine.NAN
+
+
+def _mean(*values):
+    values = [value for value in values if value == value]
+    return sum(values) / len(values) if values else posture_engine.NAN
+
+
+def _div(a, b):
+    return a / b if b else posture_engine.NAN
+
+
+# --- Loading and validating ---
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def validate(rules):
+    """Raise RuleError for the first invalid rule."""
+    names = set()
+    for rule in rules:
+        if not isinstance(rule, dict):
+            raise RuleError(f"a rule must be an object, got {rule!r}")
+        name = rule.get("name")
+        if not isinstance(name, str) or not name.isidentifier():
+            raise RuleError(f"rule name must be an identifier (letters, digits, _), got {name!r}")
+        if name in names:
+            raise RuleError(f"duplicate rule name {name!r}")
+        names.add(name)
+        if rule.get("status") not in STATUS_BY_NAME:
+            raise RuleError(f"{name}: status must be one of {sorted(STATUS_BY_NAME)}")
+        if ("below" in rule) == ("above" in rule):
+            raise RuleError(f"{name}: give exactly one of 'below' / 'above'")
+        threshold = rule["below"] if "below" in rule else rule["above"]
+        if not _is_number(threshold):
+            raise RuleError(f"{name}: threshold must be a number, got {threshold!r}")
+        if "priority" in rule and not _is_number(rule["priority"]):
+            raise RuleError(f"{name}: priority must be a number, got {rule['priority']!r}")
+        visibility = rule.get("visibility")
+        if visibility is not None and not (_is_number(visibility) and 0.0 <= visibility <= 1.0):
+            raise RuleError(f"{name}: visibility must be a number from 0 to 1, got {visibility!r}")
+        if not isinstance(rule.get("enabled", True), bool):
+            raise RuleError(f"{name}: enabled must be true or false")
+        measure = rule.get("measure") or {}
+        if not isinstance(measure, dict):
+            raise RuleError(f"{name}: measure must be an object")
+        kind = measure.get("type")
+        if kind not in MEASURE_POINTS:
+            raise RuleError(f"{name}: measure type must be one of {sorted(MEASURE_POINTS)}")
+        if not measure.get("points") or not isinstance(measure["points"], list):
+            raise RuleError(f"{name}: measure needs a list of points entries")
+        for points in measure["points"]:
+            if not isinstance(points, list) or not all(isinstance(point, str) for point in points):
+                raise RuleError(f"{name}: points entries must be lists of point names, got {points!r}")
+            if len(points) != MEASURE_POINTS[kind]:
+                raise RuleError(f"{name}: {kind} takes {MEASURE_POINTS[kind]} points per entry, got {points}")
+            unknown = [point for point in points if point not in POINT_INDEX]
+            if unknown:
+                raise RuleError(f"{name}: unknown point(s) {unknown}")
+        if measure.get("scale", "px") not in ("px", "image", "shoulder_width"):
+            raise RuleError(f"{name}: scale must be px, image or shoulder_width")
+        if measure.get("axis", "xy") not in ("x", "y", "xy"):
+            raise RuleError(f"{name}: axis must be x, y or xy")
+        if measure.get("reduce", "min") not in ("min", "max", "mean"):
+            raise RuleError(f"{name}: reduce must be min, max or mean")
+    return rules
+
+
+def compile_rules(rules=None):
+    return RuleSet(validate(DEFAULT_RULES if rules is None else rules))
+
+
+def load_rules(path=RULES_PATH):
+    """Rules from a JSON file ({"rules": [...]}), or the defaults if the file doesn't exist."""
+    if not os.path.exists(path):
+        return compile_rules()
+    with open(path, encoding="utf-8") as f:
+        return compile_rules(json.load(f)["rules"])
+
+
+def load_rules_or_defaults(path=RULES_PATH, message="Cannot read {path}: {error} (using the built-in rules)"):
+    """load_rules(), but a file that can't be read or has invalid rules only prints `message` and gives the defaults."""
+    try:
+        return load_rules(path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(message.format(path=path, error=e))
+        return compile_rules()
+
+
+def save_rules(rules=None, path=RULES_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"rules": DEFAULT_RULES if rules is None else rules}, f, indent=2)
+
+
+# --- Profiling ---
+def _time(function, repeat):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def profile(rules, frames, image_width, image_height, repeat=20):
+    """Cost of each rule: alone, and what it adds to the whole set. Microseconds, single frame and per batch frame."""
+    enabled = [rule for rule in rules if rule.get("enabled", True)]
+    frame = frames[0]
+
+    def cost(subset):
+        ruleset = RuleSet(subset)
+        single = _time(lambda: ruleset.evaluate(frame, image_width, image_height), repeat * 50)
+        batch = _time(lambda: ruleset.evaluate_batch(frames, image_width, image_height), repeat)
+        return single * 1e6, batch / len(frames) * 1e6
+
+    total = cost(enabled)
+    rows = []
+    for rule in enabled:
+        alone = cost([rule])
+        without = cost([other for other in enabled if other is not rule]) if len(enabled) > 1 else (0.0, 0.0)
+        rows.append((rule["name"], alone, (total[0] - without[0], total[1] - without[1])))
+    return total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Posture rules: write the defaults, check a file, profile the rules.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init = commands.add_parser("init", help=f"write the built-in rules to {RULES_PATH} for editing")
+    init.add_argument("--path", default=RULES_PATH)
+    check = commands.add_parser("check", help="validate a rules file")
+    check.add_argument("--path", default=RULES_PATH)
+    prof = commands.add_parser("profile", help="per-rule cost on synthetic landmarks")
+    prof.add_argument("--path", default=RULES_PATH)
+    prof.add_argument("--all", action="store_true", help="include disabled rules")
+    prof.add_argument("--frames", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == "init":
+        save_rules(path=args.path)
+        print(f"Wrote {len(DEFAULT_RULES)} rules to {args.path}")
+        return
+    if os.path.exists(args.path):
+        with open(args.path, encoding="utf-8") as f:
+            rules = validate(json.load(f)["rules"])
+    else:
+        rules = validate(DEFAULT_RULES)
+        print(f"{args.path} not found, using the built-in rules")
+    if args.command == "check":
+        print(f"{len(rules)} rules OK: " + ", ".join(rule["name"] + ("" if rule.get("enabled", True) else " (off)")
+                                                      for rule in rules))
+        return
+
+    import bench_posture
+    if args.all:
+        rules = [dict(rule, enabled=True) for rule in rules]
+    frames = bench_posture.make_frames(args.frames)
+    width, height = bench_posture.IMAGE_WIDTH, bench_posture.IMAGE_HEIGHT
+    total, rows = profile(rules, frames, width, height)
+    print(f"{'rule':<16}{'alone 1 frame':>15}{'alone batch':>13}{'added 1 frame':>15}{'added batch':>13}   (us)")
+    for name, alone, added in rows:
+        print(f"{name:<16}{alone[0]:>15.1f}{alone[1]:>13.3f}{added[0]:>15.1f}{added[1]:>13.3f}")
+    print(f"{'all rules':<16}{total[0]:>15.1f}{total[1]:>13.3f}")
+    engine = posture_engine.PostureEngine()
+    single = _time(lambda: engine.analyze(frames[0], width, height), 1000) * 1e6
+    print(f"(built-in PostureEngine.analyze: {single:.1f} us per frame)")
+
+
+if __name__ == "__main__":
+    main()
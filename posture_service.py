@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import collections
+import os
+import queue
+import signal
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import posture_engine
+import posture_rules
+
+# --- Headless posture analysis service ---
+# An asyncio server on a TCP port or a Unix socket, for thin clients that can't run Pose
+# themselves. A client sends either
+#   - landmarks: one (33, 4) float32 frame plus the image size, scored with the rules only
+#   - a JPEG:    decoded and run through one of `pose_workers` warm Pose instances first
+# and gets back the status code, neck angles, shoulder difference and bounding box.
+#
+# Landmark scoring requests from all connections are collected for up to batch_window_s
+# (or max_batch requests) and scored with one posture_engine.analyze_batch call per
+# image size. Requests are pipelined: a client may send many before reading replies,
+# which carry the request id and can arrive out of order.
+#
+# Landmark frames with coordinates beyond MAX_COORDINATE or an image side beyond
+# MAX_IMAGE_SIDE get RESULT_BAD_REQUEST; a batch that fails to score answers its requests
+# with RESULT_ERROR, and the batcher carries on with the next one.
+#
+# Backpressure: at most max_pending landmark requests and max_images JPEG requests are
+# in flight; anything beyond that is answered immediately with RESULT_OVERLOADED instead
+# of queueing up latency. A connection that doesn't read its replies stops being read
+# from (asyncio StreamWriter.drain).
+#
+# Wire format (little endian), see REQUEST / RESPONSE:
+#   request:  kind u8, request id u32, image width u32, image height u32, payload length u32, payload
+#   response: request id u32, result u8, status i8, angle left f32, angle right f32,
+#             shoulder difference f32, bbox 4 x i32
+#
+# Usage:
+#   python posture_service.py --port 8765 --pose-workers 2
+#   python posture_service.py --unix /tmp/posture.sock --pose-workers 0   (landmarks only)
+# Load test: python posture_client.py --help
+
+REQUEST = struct.Struct("<BIIII")
+RESPONSE = struct.Struct("<IBbfffiiii")
+
+KIND_LANDMARKS = 1
+KIND_JPEG = 2
+
+RESULT_OK = 0
+RESULT_OVERLOADED = 1
+RESULT_BAD_REQUEST = 2
+RESULT_ERROR = 3
+RESULT_LABELS = {RESULT_OK: "ok", RESULT_OVERLOADED: "overloaded", RESULT_BAD_REQUEST: "bad request",
+                 RESULT_ERROR: "error"}
+
+LANDMARK_BYTES = posture_engine.LANDMARK_COUNT * posture_engine.LANDMARK_FIELDS * 4
+MAX_PAYLOAD = 8 * 1024 * 1024
+# Landmark requests outside these are answered with RESULT_BAD_REQUEST. Pose's normalized
+# coordinates go a little past 0..1 for points outside the image; NaN (not seen) is fine.
+MAX_IMAGE_SIDE = 16384
+MAX_COORDINATE = 16.0
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+NAN = float("nan")
+
+
+def encode_response(request_id, result, status=posture_engine.STATUS_NO_PERSON, left=NAN, right=NAN, diff=NAN,
+                    bbox=(0, 0, 0, 0)):
+    return RESPONSE.pack(request_id, result, status, left, right, diff, *bbox)
+
+
+def _wire_floats(values):
+    """float64 array -> list for the f32 response fields; non-finite or out of f32 range -> NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.abs(values) <= FLOAT32_MAX, values, NAN).tolist()
+
+
+class PostureService:
+    """The server. Create it inside a running event loop, then await serve_tcp() or serve_unix().
+
+    Parameters:
+      - pose_workers: warm Pose instances (threads) for JPEG requests; 0 = landmarks only
+      - max_batch / batch_window_s: a landmark batch closes at this size or after this long
+      - max_pending: landmark requests in flight before answering RESULT_OVERLOADED
+      - max_images: JPEG requests in flight (default 4 per Pose worker)
+      - model_complexity: Pose model for the workers
+      - rules: posture_rules.RuleSet that decides the status (None = posture_engine's built-in thresholds)
+    """
+    def __init__(self, pose_workers=1, max_batch=256, batch_window_s=0.001, max_pending=4096, max_images=None,
+                 model_complexity=1, rules=None):
+        self.rules = rules
+        self.max_batch = max_batch
+        self.batch_window_s = batch_window_s
+        self.max_pending = max_pending
+        self.max_images = max_images if max_images is not None else 4 * pose_workers
+        self.pose_workers = pose_workers
+        self.requests = collections.Counter()   # result code -> count
+        self.batches = 0
+        self.batched_frames = 0
+        self.connections = 0
+        self._pending = 0
+        self._images = 0
+        self._batch = []
+        self._batch_ready = asyncio.Event()
+        self._batcher = asyncio.get_running_loop().create_task(self._run_batches())
+        self._poses = queue.Queue()
+        self._executor = None
+        if pose_workers:
+            self._executor = ThreadPoolExecutor(max_workers=pose_workers, thread_name_prefix="pose")
+            self._model_complexity = model_complexity
+
+    async def warm_up(self):
+        """Build the Pose instances (and import cv2 / mediapipe) before accepting connections."""
+        if not self.pose_workers:
+            return
+        loop = asyncio.get_running_loop()
+        poses = await asyncio.gather(*(loop.run_in_executor(self._executor, self._build_pose)
+                                       for _ in range(self.pose_workers)))
+        for pose in poses:
+            self._poses.put(pose)
+
+    def _build_pose(self):
+        import mediapipe as mp
+        return mp.solutions.pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                                      model_complexity=self._model_complexity)
+
+    async def serve_tcp(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self._handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_unix(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(self._handle, path)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self._batcher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        while not self._poses.empty():
+            self._poses.get().close()
+
+    def format_stats(self):
+        counts = ", ".join(f"{self.requests[code]} {label}" for code, label in RESULT_LABELS.items())
+        average = self.batched_frames / self.batches if self.batches else 0.0
+        return f"requests: {counts}; {self.batches} batches, {average:.1f} frames per batch"
+
+    # --- Connections ---
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        respond = writer.write
+        try:
+            while True:
+                header = await reader.readexactly(REQUEST.size)
+                kind, request_id, width, height, length = REQUEST.unpack(header)
+                if length > MAX_PAYLOAD:
+                    self._reply(respond, request_id, RESULT_BAD_REQUEST)
+                    break
+                payload = await reader.readexactly(length)
+                if kind == KIND_LANDMARKS and length == LANDMARK_BYTES and width and height:
+                    self._submit_landmarks(respond, request_id, payload, width, height)
+                elif kind == KIND_JPEG and self.pose_workers:
+                    self._submit_jpeg(respond, request_id, payload)
+                else:
+                    self._reply(respond, request_id, RESULT_BAD_REQUEST)
+                # Stop reading while the client isn't reading its replies
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _reply(self, respond, request_id, result, *values):
+        try:
+            response = encode_response(request_id, result, *values)
+        except (struct.error, OverflowError):
+            result, response = RESULT_ERROR, encode_response(request_id, RESULT_ERROR)
+        self.requests[result] += 1
+        try:
+            respond(response)
+        except (ConnectionError, RuntimeError):
+            pass  # the client went away; its replies have nowhere to go
+
+    # --- Landmark scoring (batched) ---
+    def _submit_landmarks(self, respond, request_id, payload, width, height):
+        if self._pending >= self.max_pending:
+            self._reply(respond, request_id, RESULT_OVERLOADED)
+            return
+        frame = np.frombuffer(payload, dtype="<f4").reshape(posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS)
+        if width > MAX_IMAGE_SIDE or height > MAX_IMAGE_SIDE or np.any(np.abs(frame[:, :3]) > MAX_COORDINATE):
+            self._reply(respond, request_id, RESULT_BAD_REQUEST)
+            return
+        self._enqueue(frame, width, height, lambda result: self._reply(respond, request_id, *result))
+
+    def _enqueue(self, frame, width, height, done):
+        self._pending += 1
+        self._batch.append((frame, width, height, done))
+        self._batch_ready.set()
+
+    async def _run_batches(self):
+        while True:
+            await self._batch_ready.wait()
+            # Give concurrent requests a moment to join, unless the batch is already full
+            if len(self._batch) < self.max_batch and self.batch_window_s:
+                await asyncio.sleep(self.batch_window_s)
+            batch, self._batch = self._batch[:self.max_batch], self._batch[self.max_batch:]
+            if not self._batch:
+                self._batch_ready.clear()
+            self._pending -= len(batch)
+            self.batches += 1
+            self.batched_frames += len(batch)
+            self._score(batch)
+
+    def _score(self, batch):
+        groups = collections.defaultdict(list)
+        for item in batch:
+            groups[(item[1], item[2])].append(item)
+        for (width, height), items in groups.items():
+            # A failure answers this group with RESULT_ERROR; the batcher has to keep running
+            try:
+                result = posture_engine.analyze_batch(np.stack([item[0] for item in items]), width, height,
+                                                      rules=self.rules)
+                status = result["status"].tolist()
+                left = _wire_floats(result["angle_left_neck"])
+                right = _wire_floats(result["angle_right_neck"])
+                diff = _wire_floats(result["shoulder_y_diff"])
+                bbox = result["bbox"].tolist()
+            except Exception:
+                for item in items:
+                    item[3]((RESULT_ERROR,))
+                continue
+            for i, item in enumerate(items):
+                item[3]((RESULT_OK, status[i], left[i], right[i], diff[i], bbox[i]))
+
+    # --- JPEG requests (Pose pool) ---
+    def _submit_jpeg(self, respond, request_id, payload):
+        if self._images >= self.max_images:
+            self._reply(respond, request_id, RESULT_OVERLOADED)
+            return
+        self._images += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._detect, payload)
+        future.add_done_callback(lambda f: self._on_detected(respond, request_id, f))
+
+    def _detect(self, payload):
+        """Pose thread: decode the JPEG and return ((33, 4) landmarks, width, height)."""
+        import cv2
+        image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        height, width = image.shape[:2]
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        rgb.flags.writeable = False
+        pose = self._poses.get()
+        try:
+            results = pose.process(rgb)
+        finally:
+            self._poses.put(pose)
+        landmarks = results.pose_landmarks.landmark if results.pose_landmarks else None
+        return posture_engine.landmarks_to_array(landmarks), width, height
+
+    def _on_detected(self, respond, request_id, future):
+        self._images -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self._reply(respond, request_id, RESULT_ERROR)
+            return
+        detected = future.result()
+        if detected is None:
+            self._reply(respond, request_id, RESULT_BAD_REQUEST)
+            return
+        frame, width, height = detected
+        self._enqueue(frame, width, height, lambda result: self._reply(respond, request_id, *result))
+
+
+async def run(args):
+    service = PostureService(pose_workers=args.pose_workers, max_batch=args.max_batch,
+                             batch_window_s=args.batch_window_ms / 1000.0, max_pending=args.max_pending,
+                             model_complexity=args.complexity, rules=posture_rules.load_rules_or_defaults(args.rules))
+    started = time.perf_counter()
+    await service.warm_up()
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Posture service on {where}, {args.pose_workers} Pose workers "
+          f"(warm-up {time.perf_counter() - started:.1f} s). Ctrl+C to stop.")
+    serving = asyncio.ensure_future(service.serve_unix(args.unix) if args.unix else service.serve_tcp(args.host, args.port))
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signum, serving.cancel)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still ends asyncio.run()
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    finally:
+        print(service.format_stats())
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless posture analysis service (landmarks or JPEG frames).")
+    parser.add_argument("--host", default="127.0.0.1", help="use 0.0.0.0 to accept clients on the LAN")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--pose-workers", type=int, default=1, help="warm Pose instances for JPEG requests (0 = off)")
+    parser.add_argument("--complexity", type=int, default=1, choices=(0, 1, 2), help="Pose model_complexity")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--batch-window-ms", type=float, default=1.0)
+    parser.add_argument("--max-pending", type=int, default=4096)
+    parser.add_argument("--rules", default=posture_rules.RULES_PATH, help="posture rules file (built-in rules if it does not exist)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
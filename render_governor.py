@@ -0,0 +1,163 @@
+import time
+
+# --- Visibility-aware frame rate / CPU governor for the Detect view ---
+# Drawing and displaying frames nobody can see is wasted CPU, and so is rendering at the
+# full camera rate in a window that is only in the background. RenderGovernor follows the
+# window through Tk events and picks a mode:
+#   visible     window mapped and focused      -> render at up to max_fps
+#   background  mapped but not focused         -> render at up to background_fps
+#   hidden      minimized / fully covered      -> no rendering, posture analysis at hidden_fps
+#                                                 (so alerts still work)
+# The frame rate is enforced by the pipeline (PosePipeline.max_fps paces delivered frames
+# against the monotonic clock). With cpu_limit set, the governor also measures the
+# process CPU time once per second and lowers the frame rate until usage fits under the
+# limit (and raises it again when there is room). CPU% is also accumulated per mode for
+# the report.
+
+
+class RenderGovernor:
+    """Frame rate ceiling for the render loop. Tk events arrive on the Tk thread, tick() on the render thread.
+
+    Parameters:
+      - max_fps: ceiling while the window is visible and focused (None = camera rate)
+      - background_fps: ceiling while visible but not focused
+      - hidden_fps: analysis rate while the window can't be seen
+      - cpu_limit: target process CPU usage in percent of one core (None = no limit)
+      - min_fps: the CPU limit never pushes the frame rate below this
+    """
+    MODES = ("visible", "background", "hidden")
+
+    def __init__(self, max_fps=30.0, background_fps=15.0, hidden_fps=2.0, cpu_limit=None, min_fps=2.0,
+                 window_s=1.0, clock=time.monotonic, cpu_clock=time.process_time):
+        self.max_fps = max_fps
+        self.background_fps = background_fps
+        self.hidden_fps = hidden_fps
+        self.cpu_limit = cpu_limit
+        self.min_fps = min_fps
+        self.window_s = window_s
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.mapped = True
+        self.obscured = False
+        self.focused = True
+        self.cpu_percent = 0.0      # last measured window
+        self.fps = 0.0              # frames per second in the last measured window
+        self.cpu_fps_cap = None     # ceiling from the CPU limit, None = not limiting
+        self.root = None
+        self._window_start = None
+        self._cpu_start = None
+        self._frames = 0
+        self._mode_totals = {mode: [0.0, 0.0, 0] for mode in self.MODES}  # mode -> [wall s, cpu s, frames]
+
+    # --- Tk events (Tk thread) ---
+    def bind(self, root):
+        """Follow map / visibility / focus changes of the toplevel window `root`."""
+        self.root = root
+        root.bind("<Map>", self._on_map, add="+")
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<Visibility>", self._on_visibility, add="+")
+        root.bind("<FocusIn>", self._on_focus, add="+")
+        root.bind("<FocusOut>", self._on_focus, add="+")
+
+    def _on_map(self, event):
+        if event.widget is self.root:
+            self.mapped = True
+            self.obscured = False
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self.mapped = False
+
+    def _on_visibility(self, event):
+        if event.widget is self.root:
+            self.obscured = event.state == "VisibilityFullyObscured"
+
+    def _on_focus(self, event):
+        # Focus moving between our own widgets also sends FocusOut/FocusIn; check once things settle
+        self.root.after_idle(self._update_focus)
+
+    def _update_focus(self):
+        try:
+            self.focused = self.root.focus_displayof() is not None
+        except KeyError:
+            # focus_displayof() can fail while a transient (e.g. combobox) window has focus
+            self.focused = True
+
+    # --- Render thread ---
+    @property
+    def mode(self):
+        if not self.mapped or self.obscured:
+            return "hidden"
+        return "visible" if self.focused else "background"
+
+    @property
+    def render(self):
+        """False while nobody can see the window: skip drawing and display."""
+        return self.mode != "hidden"
+
+    @property
+    def target_fps(self):
+        """Frame rate ceiling for the current mode (None = no ceiling)."""
+        mode = self.mode
+        fps = {"visible": self.max_fps, "background": self.background_fps, "hidden": self.hidden_fps}[mode]
+        if mode == "background" and self.max_fps:
+            fps = min(fps, self.max_fps) if fps else self.max_fps
+        if self.cpu_fps_cap is not None and mode != "hidden":
+            fps = self.cpu_fps_cap if fps is None else min(fps, self.cpu_fps_cap)
+        return fps
+
+    def tick(self, frame=False):
+        """Call from the render loop on every pass (frame=True when a frame was handled).
+
+        Once per window_s this measures CPU% and frame rate and, with cpu_limit, moves the ceiling.
+        """
+        if frame:
+            self._frames += 1
+        now = self.clock()
+        cpu = self.cpu_clock()
+        if self._window_start is None:
+            self._window_start, self._cpu_start = now, cpu
+            return
+        elapsed = now - self._window_start
+        if elapsed < self.window_s:
+            return
+        used = cpu - self._cpu_start
+        self.cpu_percent = 100.0 * used / elapsed
+        self.fps = self._frames / elapsed
+        totals = self._mode_totals[self.mode]
+        totals[0] += elapsed
+        totals[1] += used
+        totals[2] += self._frames
+        self._window_start, self._cpu_start, self._frames = now, cpu, 0
+        if self.cpu_limit and self.mode != "hidden":
+            self._adjust()
+
+    def _adjust(self):
+        current = self.cpu_fps_cap or self.fps or self.max_fps or 30.0
+        if self.cpu_percent > self.cpu_limit:
+            # CPU scales roughly with the frame rate; aim a little under the limit
+            self.cpu_fps_cap = max(self.min_fps, current * 0.9 * self.cpu_limit / self.cpu_percent)
+        elif self.cpu_fps_cap is not None and self.cpu_percent < 0.7 * self.cpu_limit:
+            raised = self.cpu_fps_cap * 1.2
+            self.cpu_fps_cap = None if self.max_fps and raised >= self.max_fps else raised
+
+    # --- Report ---
+    def report(self):
+        """Measured CPU% (of one core), average frame rate and time spent in each mode."""
+        return {mode: {"seconds": round(wall, 1),
+                       "cpu_percent": round(100.0 * cpu / wall, 1) if wall else None,
+                       "fps": round(frames / wall, 1) if wall else None}
+                for mode, (wall, cpu, frames) in self._mode_totals.items()}
+
+    def format_report(self):
+        parts = []
+        for mode, r in self.report().items():
+            if r["seconds"]:
+                parts.append(f"{mode} {r['cpu_percent']:.0f}% CPU {r['fps']:.1f} fps over {r['seconds']:.0f}s")
+        return "render: " + (", ".join(parts) if parts else "no data")
+
+    @property
+    def status_label(self):
+        fps = self.target_fps
+        cap = f"{fps:.0f}fps" if fps else "max"
+        return f"{self.mode} {self.fps:.0f}/{cap} cpu {self.cpu_percent:.0f}%"
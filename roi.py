@@ -0,0 +1,83 @@
+# --- ROI-cropped inference ---
+# A seated user usually fills only part of the camera frame. RoiTracker feeds pose.process
+# just the region around the last pose bounding box (expanded by a motion margin), then maps
+# the landmarks back to full-frame coordinates so the rest of the code doesn't notice.
+#
+# The crop is kept fixed while the person stays well inside it. Moving it every frame would
+# keep shifting the normalized coordinates MediaPipe's own tracker relies on. When nobody is
+# found, or the crop would cover most of the frame anyway, the full frame is used.
+
+
+class RoiTracker:
+    """Chooses the crop for the next inference from the previous frame's bounding box.
+
+    Parameters:
+      - margin: extra space on each side, as a fraction of the box width/height.
+      - min_size: smallest crop side in pixels (tiny crops hurt detection).
+      - full_frame_ratio: if the crop area is above this fraction of the frame, use the full frame.
+      - enabled: False always uses the full frame.
+    """
+    def __init__(self, margin=0.3, min_size=192, full_frame_ratio=0.8, enabled=True):
+        self.enabled = enabled
+        self.margin = margin
+        self.min_size = min_size
+        self.full_frame_ratio = full_frame_ratio
+        self.roi = None  # (x0, y0, x1, y1) in pixels, or None for the full frame
+        self.crops = 0
+        self.full_frames = 0
+        self.area_ratio = 1.0  # last crop area as a fraction of the frame
+
+    def crop(self, frame):
+        """Return (image, roi) for the next inference. roi is None when the full frame is used."""
+        if self.roi is None:
+            self.full_frames += 1
+            self.area_ratio = 1.0
+            return frame, None
+        x0, y0, x1, y1 = self.roi
+        self.crops += 1
+        self.area_ratio = (x1 - x0) * (y1 - y0) / (frame.shape[0] * frame.shape[1])
+        return frame[y0:y1, x0:x1], self.roi
+
+    def to_full_frame(self, landmarks, roi, image_width, image_height):
+        """Map MediaPipe landmarks found in the crop back to full-frame normalized coordinates (in place)."""
+        if roi is None or not landmarks:
+            return landmarks
+        x0, y0, x1, y1 = roi
+        scale_x = (x1 - x0) / image_width
+        scale_y = (y1 - y0) / image_height
+        offset_x = x0 / image_width
+        offset_y = y0 / image_height
+        for lm in landmarks:
+            lm.x = lm.x * scale_x + offset_x
+            lm.y = lm.y * scale_y + offset_y
+            lm.z = lm.z * scale_x  # z uses roughly the same scale as x
+        return landmarks
+
+    def update(self, bbox, image_width, image_height):
+        """Plan the next crop from this frame's pixel bbox (min_x, min_y, max_x, max_y), or None if tracking was lost."""
+        if bbox is None or not self.enabled:
+            self.roi = None
+            return
+        min_x, min_y, max_x, max_y = bbox
+        if self.roi is not None:
+            # Keep the current crop while the box stays inside it with half the margin to spare
+            x0, y0, x1, y1 = self.roi
+            keep_x = self.margin * 0.5 * (max_x - min_x)
+            keep_y = self.margin * 0.5 * (max_y - min_y)
+            if (min_x - keep_x >= x0 or x0 == 0) and (max_x + keep_x <= x1 or x1 == image_width) \
+                    and (min_y - keep_y >= y0 or y0 == 0) and (max_y + keep_y <= y1 or y1 == image_height):
+                return
+
+        pad_x = max(self.margin * (max_x - min_x), (self.min_size - (max_x - min_x)) / 2, 0)
+        pad_y = max(self.margin * (max_y - min_y), (self.min_size - (max_y - min_y)) / 2, 0)
+        x0 = max(int(min_x - pad_x), 0)
+        y0 = max(int(min_y - pad_y), 0)
+        x1 = min(int(max_x + pad_x), image_width)
+        y1 = min(int(max_y + pad_y), image_height)
+        if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) > self.full_frame_ratio * image_width * image_height:
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
+
+    def reset(self):
+        self.roi = None
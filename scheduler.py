@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import math
+import time
+
+# --- Shared timer scheduler ---
+# A thread per timer that loops on time.sleep(1) and counts ticks drifts (every tick is
+# 1 s plus however long the loop body and the OS took) and wakes every second even when
+# the next thing to do is hours away. Scheduler keeps every pending event in one heap
+# ordered by its monotonic deadline and asks the Tk event loop to wake it exactly when the
+# earliest one is due. Repeating events are rescheduled from their previous deadline, not
+# from when they actually ran, so lateness never accumulates.
+#
+# Everything runs on the Tk thread (callbacks included), so no locking is needed.
+# Without a Tk widget (root=None) nothing runs by itself: call run_due(), e.g. with a fake
+# clock as in bench_scheduler.py.
+
+
+class Event:
+    """A scheduled callback. interval is None for one-shot events."""
+    __slots__ = ("deadline", "interval", "callback", "args", "cancelled")
+
+    def __init__(self, deadline, interval, callback, args):
+        self.deadline = deadline
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """Monotonic-deadline heap driven by root.after().
+
+    Parameters:
+      - root: Tk widget whose after() wakes the scheduler, or None to drive it with run_due()
+      - clock: function() -> seconds; time.monotonic unless simulating
+    """
+    def __init__(self, root=None, clock=time.monotonic):
+        self.root = root
+        self.clock = clock
+        self.wakeups = 0
+        self._heap = []
+        self._order = itertools.count()  # tie-breaker so events with equal deadlines never get compared
+        self._after_id = None
+        self._armed_deadline = None
+
+    def call_at(self, deadline, callback, *args):
+        return self._push(Event(deadline, None, callback, args))
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def call_every(self, interval, callback, *args, start=None):
+        """Run callback every `interval` seconds, first at `start` (default: one interval from now).
+
+        If the loop falls behind by more than one interval the missed runs are skipped,
+        not replayed back to back; the schedule stays on the original grid.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        deadline = self.clock() + interval if start is None else start
+        return self._push(Event(deadline, interval, callback, args))
+
+    def cancel(self, event):
+        if event is not None:
+            event.cancel()
+
+    def next_deadline(self):
+        """Deadline of the earliest pending event, or None."""
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def run_due(self, now=None):
+        """Run every event whose deadline has passed. Returns the number of callbacks run."""
+        if now is None:
+            now = self.clock()
+        heap = self._heap
+        ran = 0
+        while heap and heap[0][0] <= now:
+            _, _, event = heapq.heappop(heap)
+            if event.cancelled:
+                continue
+            if event.interval is not None:
+                # Next run on the original grid: skip any whole intervals we were late by
+                missed = math.floor((now - event.deadline) / event.interval)
+                event.deadline += (missed + 1) * event.interval
+                heapq.heappush(heap, (event.deadline, next(self._order), event))
+            else:
+                event.cancelled = True
+            event.callback(*event.args)
+            ran += 1
+        return ran
+
+    def close(self):
+        for _, _, event in self._heap:
+            event.cancel()
+        self._heap.clear()
+        if self._after_id is not None and self.root is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = None
+        self._armed_deadline = None
+
+    # --- Tk wake-ups ---
+    def _push(self, event):
+        heapq.heappush(self._heap, (event.deadline, next(self._order), event))
+        self._arm()
+        return event
+
+    def _arm(self):
+        """Make sure root.after() wakes us for the earliest deadline (and only once)."""
+        if self.root is None:
+            return
+        deadline = self.next_deadline()
+        if deadline is None or deadline == self._armed_deadline:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        delay_ms = max(0, math.ceil((deadline - self.clock()) * 1000.0))
+        self._armed_deadline = deadline
+        self._after_id = self.root.after(delay_ms, self._wake)
+
+    def _wake(self):
+        self._after_id = None
+        self._armed_deadline = None
+        self.wakeups += 1
+        self.run_due()
+        self._arm()
+
+
+class Countdown:
+    """Counts down `seconds` on a Scheduler.
+
+    on_tick(remaining) is called right away and then at every whole second (remaining is
+    whole seconds left, rounded up); on_finish() is called once at the deadline. Both are
+    measured from one monotonic deadline, so a long countdown ends on time.
+    """
+    def __init__(self, scheduler, seconds, on_tick=None, on_finish=None):
+        self.scheduler = scheduler
+        self.started = scheduler.clock()
+        self.deadline = self.started + seconds
+        self.on_tick = on_tick
+        self.on_finish = on_finish
+        self._finish_event = scheduler.call_at(self.deadline, self._finish)
+        self._tick_event = None
+        if on_tick is not None:
+            on_tick(self.remaining())
+            self._tick_event = scheduler.call_every(1.0, self._tick, start=self.started + 1.0)
+
+    def remaining(self):
+        return max(0, math.ceil(self.deadline - self.scheduler.clock() - 1e-6))
+
+    @property
+    def active(self):
+        return not self._finish_event.cancelled
+
+    def cancel(self):
+        self.scheduler.cancel(self._finish_event)
+        self.scheduler.cancel(self._tick_event)
+
+    def _tick(self):
+        remaining = self.remaining()
+        if remaining > 0:
+            self.on_tick(remaining)
+
+    def _finish(self):
+        self.scheduler.cancel(self._tick_event)
+        if self.on_finish is not None:
+            self.on_finish()
+
+
+def format_hms(seconds):
+    mins, secs = divmod(int(seconds), 60)
+    hours, mins = divmod(mins, 60)
+    return f"{hours:02d}:{mins:02d}:{secs:02d}"
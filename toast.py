@@ -0,0 +1,77 @@
+import tkinter
+
+# --- In-app toast ---
+# A small borderless window in the bottom-right corner of the app that disappears by
+# itself. Unlike a modal popup with grab_set() it never blocks the rest of the UI, and a
+# new message replaces the one on screen instead of stacking another window on top.
+
+
+class Toast:
+    """Non-modal notification shown over `root`. Call show() on the Tk thread.
+
+    Parameters:
+      - duration_ms: how long a message stays up
+      - width: wrap width of the message in pixels
+    """
+    def __init__(self, root, duration_ms=8000, width=320, bg="#2b2b2b", fg="#ffffff", accent="#1f6aa5"):
+        self.root = root
+        self.duration_ms = duration_ms
+        self.width = width
+        self.colors = (bg, fg, accent)
+        self.window = None
+        self.shown = 0
+        self._hide_id = None
+
+    def show(self, title, message, bell=True):
+        if bell:
+            self.root.bell()
+        if self.window is None or not self.window.winfo_exists():
+            self._build()
+        self.title_label.configure(text=title)
+        self.message_label.configure(text=message)
+        self._place()
+        self.window.deiconify()
+        self.window.lift()
+        self.shown += 1
+        if self._hide_id is not None:
+            self.root.after_cancel(self._hide_id)
+        self._hide_id = self.root.after(self.duration_ms, self.hide)
+
+    def hide(self):
+        self._hide_id = None
+        if self.window is not None and self.window.winfo_exists():
+            self.window.withdraw()
+
+    def destroy(self):
+        if self._hide_id is not None:
+            self.root.after_cancel(self._hide_id)
+            self._hide_id = None
+        if self.window is not None and self.window.winfo_exists():
+            self.window.destroy()
+        self.window = None
+
+    def _build(self):
+        bg, fg, accent = self.colors
+        window = tkinter.Toplevel(self.root)
+        window.withdraw()
+        window.overrideredirect(True)
+        window.attributes("-topmost", True)
+        window.configure(bg=accent, padx=2, pady=2)
+        body = tkinter.Frame(window, bg=bg, padx=12, pady=10)
+        body.pack(fill="both", expand=True)
+        self.title_label = tkinter.Label(body, bg=bg, fg=fg, font=("TkDefaultFont", 12, "bold"),
+                                         anchor="w", justify="left", wraplength=self.width)
+        self.title_label.pack(fill="x")
+        self.message_label = tkinter.Label(body, bg=bg, fg=fg, anchor="w", justify="left", wraplength=self.width)
+        self.message_label.pack(fill="x", pady=(4, 0))
+        # Click anywhere on the toast to dismiss it
+        for widget in (window, body, self.title_label, self.message_label):
+            widget.bind("<Button-1>", lambda event: self.hide())
+        self.window = window
+
+    def _place(self):
+        self.window.update_idletasks()
+        width, height = self.window.winfo_reqwidth(), self.window.winfo_reqheight()
+        x = self.root.winfo_rootx() + self.root.winfo_width() - width - 16
+        y = self.root.winfo_rooty() + self.root.winfo_height() - height - 16
+        self.window.geometry(f"+{max(x, 0)}+{max(y, 0)}")
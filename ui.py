@@ -1,19 +1,93 @@
 import customtkinter
+import os
 import threading
 import time
-import cv2
-import mediapipe as mp
+import zipfile
 import numpy as np
-from PIL import Image, ImageTk
 
-# ลองนำเข้า plyer หากติดตั้งไว้ ถ้าไม่มีจะแสดงข้อความใน console แทน
-try:
-    from plyer import notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    PLYER_AVAILABLE = False
-    print("Plyer library not found. System notifications will be disabled.")
-    print("Install it using: pip install plyer")
+import analytics
+import cadence
+import camera_session
+import exercise
+import exercise_templates
+import instrumentation
+import landmark_recording
+import notifier
+import pipeline
+import posture_engine
+import posture_rules
+import render_governor
+import roi
+import scheduler
+import toast
+
+# cv2 / mediapipe (และโมดูลที่ใช้มัน) ใช้เวลา import หลายวินาที จึงโหลดใน warm-up thread
+# หลังจากหน้าต่างแสดงแล้ว (ดู load_detection_modules และ App.warm_up_model)
+cv2 = None
+mp = None
+capture_config = None
+latency_governor = None
+motion_gate = None
+video_view = None
+violation_clips = None
+
+
+# รันภาพว่าง 1 เฟรมตอน warm-up เพื่อให้การตรวจจับครั้งแรกไม่ช้า
+WARM_UP_WITH_DUMMY_FRAME = True
+
+# เมื่อออกจากหน้า Detect จะพักกล้องไว้ (ไม่ปิด) นานเท่านี้ กลับมาภายในเวลานี้จะเห็นภาพต่อได้ทันที
+CAMERA_GRACE_PERIOD_S = 60.0
+# True = ตรวจจับท่าทางต่อแม้ไม่ได้เปิดหน้า Detect (ใช้ CPU มากขึ้น)
+KEEP_INFERENCE_WHEN_HIDDEN = False
+
+# เพดานเฟรมเรตของหน้า Detect: หน้าต่างอยู่ด้านหน้า / เปิดอยู่แต่ไม่ได้โฟกัส / ย่อหรือถูกบังทั้งหมด
+# (ขณะมองไม่เห็นจะไม่วาดภาพเลย แต่ยังวิเคราะห์ท่าทางที่ HIDDEN_ANALYSIS_FPS เพื่อให้แจ้งเตือนได้)
+# ตั้ง MAX_RENDER_FPS ได้จากเมนู "Max FPS" ในหน้า Detect
+MAX_RENDER_FPS = 30.0
+BACKGROUND_RENDER_FPS = 15.0
+HIDDEN_ANALYSIS_FPS = 2.0
+RENDER_FPS_CHOICES = ("30", "15", "10", "5")
+# จำกัดการใช้ CPU ของโปรแกรม (% ของ 1 core) โดยลดเฟรมเรตอัตโนมัติ, None = ไม่จำกัด
+CPU_LIMIT_PERCENT = None
+
+# แจ้งเตือนเมื่อท่าทางไม่ถูกต้องต่อเนื่องนานเท่านี้ (ไม่เกิน 1 ครั้งต่อ notifier.DEFAULT_RATE_LIMITS["posture"] วินาที)
+POSTURE_ALERT_AFTER_S = 30.0
+
+# ไฟล์ที่บันทึกสถิติเวลาของแต่ละขั้น (ตอนปิดโปรแกรม) และผลของ sampling profiler
+PROFILE_STATS_PATH = "profile_stats.json"
+SAMPLING_PROFILE_PATH = "profile_samples.folded"
+# ประวัติท่าทาง (SQLite) ที่ใช้สรุปในหน้า Home
+ANALYTICS_DB_PATH = "posture_analytics.db"
+# บันทึก landmarks ดิบของทุก keyframe ลงไฟล์ใน RECORDINGS_DIR (ดูและวิเคราะห์ด้วย landmark_recording.py)
+RECORD_LANDMARKS = False
+RECORDINGS_DIR = "recordings"
+# เมื่อท่าทางไม่ถูกต้องต่อเนื่อง บันทึกคลิปสั้น (ก่อน 5 วินาที + หลัง 3 วินาที) ไว้ดูย้อนหลังใน CLIPS_DIR
+# ใช้พื้นที่ไม่เกิน CLIPS_MAX_MB คลิปที่ไม่ได้ดูนานที่สุดจะถูกลบก่อน
+# ค่าเริ่มต้นปิดไว้ (เครื่องอาจใช้ร่วมกันหลายคน) ผู้ใช้เปิดเองได้จากสวิตช์ "Save Clips" ในหน้า Detect
+SAVE_VIOLATION_CLIPS = False
+CLIPS_DIR = "clips"
+CLIPS_MAX_MB = 200
+# เกณฑ์ท่าทาง (มุมคอ, ไหล่เอียง, ศีรษะเอียง, หลังค่อม ฯลฯ) อ่านจากไฟล์นี้ถ้ามี ไม่มีจะใช้ค่าเริ่มต้นใน posture_rules.py
+# สร้างไฟล์เพื่อแก้ไขด้วย: python posture_rules.py init
+RULES_PATH = posture_rules.RULES_PATH
+
+# ท่าต้นแบบสำหรับให้คะแนนความใกล้เคียงของท่ายืดเหยียด (สร้างด้วย exercise_templates.py add) ไม่มีไฟล์ = ไม่ให้คะแนน
+EXERCISE_TEMPLATES_PATH = exercise_templates.LIBRARY_PATH
+
+# ข้อความสถานะที่นับว่าท่าทางไม่ถูกต้อง -> ชื่อที่ใช้ตั้งชื่อคลิป
+BAD_STATUS_REASONS = {posture_engine.STATUS_LABELS_SHORT[status]: name
+                      for name, status in posture_rules.STATUS_BY_NAME.items()}
+
+def load_detection_modules():
+    """Import cv2, mediapipe and the modules that need them. Safe to call more than once."""
+    global cv2, mp, capture_config, latency_governor, motion_gate, video_view, violation_clips
+    import cv2
+    import mediapipe as mp
+    import capture_config
+    import latency_governor
+    import motion_gate
+    import video_view
+    import violation_clips
 
 
 # --- ตั้งค่าธีมเริ่มต้นของโปรแกรม ---
@@ -32,9 +106,15 @@ class App(customtkinter.CTk):
         self.geometry("800x600")
 
         # --- ตัวแปรสำหรับระบบจับเวลาเพื่อสุขภาพ ---
-        self.posture_timer_thread = None
+        # ตัวจับเวลาและการแจ้งเตือนทั้งหมดทำงานบน event loop ของ Tk ผ่าน scheduler ตัวเดียว
+        self.scheduler = scheduler.Scheduler(self)
         self.posture_timer_running = False
+        self.posture_timer_started = 0.0
+        self.posture_timer_away_base = 0.0
+        self.posture_timer_reminders = 0
         self.posture_timer_seconds = 0
+        self.posture_timer_display_event = None
+        self.posture_timer_reminder_event = None
         self.notification_target_seconds = 5
         self.notification_cycle_index = 0
         self.health_notifications = [
@@ -46,14 +126,64 @@ class App(customtkinter.CTk):
             {"title": "อันตราย! พักทันที", "message": "อันตราย! คุณนั่งทำงานต่อเนื่องมานานแล้ว ควรหยุดพักทันที! การนั่งนานเกินไปเสี่ยงต่อสุขภาพอย่างมาก ลุกไปพักผ่อนอย่างน้อย 15-30 นาทีก่อนกลับมาทำงานต่อนะครับ"}
         ]
 
+        # --- การแจ้งเตือน ---
+        # ส่งผ่าน worker thread (ไม่บล็อก UI) รวมการแจ้งเตือนที่มาพร้อมกันเป็นอันเดียว และจำกัดความถี่ตามประเภท
+        # ในแอปแสดงเป็น toast มุมขวาล่างที่หายไปเอง แทน popup ที่ต้องกดปิด
+        self.toast = toast.Toast(self)
+        backends = [lambda title, message: self.after(0, self.toast.show, title, message)]
+        system_backend = notifier.plyer_backend()
+        if system_backend is not None:
+            backends.append(system_backend)
+        else:
+            print("Plyer library not found. System notifications will be disabled.")
+            print("Install it using: pip install plyer")
+        self.notifier = notifier.NotificationDispatcher(backends)
+        self.bad_posture_since = None
+        # เก็บสถานะท่าทางทุกเฟรมลงฐานข้อมูลผ่าน writer thread (ไม่บล็อก detection) และสรุปเป็นรายนาที/รายวัน
+        self.analytics = analytics.AnalyticsStore(ANALYTICS_DB_PATH)
+        self.analytics_summary_event = None
+        # ท่ายืดเหยียดที่กำลังทำในหน้า Exercise (นับครั้งบน inference thread จาก landmarks ของ pipeline เดียวกัน)
+        self.exercise_session = None
+        self.exercise_display_event = None
+        self.template_matcher = None
+
         # --- ตัวแปรสำหรับระบบตรวจจับท่าทาง ---
         self.detection_thread = None
         self.detection_running = False
-        self.cap = None
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5, model_complexity=1)
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        self.detection_pipeline = None
+        # กล้องและ pipeline เปิดค้างไว้ข้ามการสลับหน้า (ดู camera_session.py)
+        self.camera = camera_session.CameraSession(lambda: self.open_capture(), self.make_pipeline,
+                                                   grace_s=CAMERA_GRACE_PERIOD_S)
+        # โมเดล Pose สร้างใน warm-up thread หลังหน้าต่างแสดงแล้ว (ดู warm_up_model)
+        # governor ปรับ model_complexity (0/1/2) และขนาดภาพอัตโนมัติให้ใช้เวลาไม่เกิน 50 ms ต่อเฟรม
+        self.mp_pose = None
+        self.mp_drawing = None
+        self.mp_drawing_styles = None
+        self.governor = None
+        self.video_view = None
+        # ตรวจการเคลื่อนไหวก่อนรันโมเดล และนับเวลาที่ไม่มีคนอยู่หน้ากล้อง (สร้างหลังโหลดโมเดล)
+        self.motion_gate = None
+        self.last_result = None
+        self.last_status = posture_engine.STATUS_NO_PERSON
+        self.recorder = None
+        self.clip_recorder = None
+        self.save_clips = SAVE_VIOLATION_CLIPS
+        # ติดตามว่าหน้าต่างถูกย่อ/บัง/ไม่ได้โฟกัสหรือไม่ เพื่อลดเฟรมเรตหรือหยุดวาดภาพ
+        self.render_governor = render_governor.RenderGovernor(max_fps=MAX_RENDER_FPS, background_fps=BACKGROUND_RENDER_FPS,
+                                                              hidden_fps=HIDDEN_ANALYSIS_FPS, cpu_limit=CPU_LIMIT_PERCENT)
+        self.render_governor.bind(self)
+        self.model_ready = threading.Event()
+        self.model_error = None
+        self.closing = False
+        self.startup_times = {"created": time.perf_counter()}
+        self.posture_engine = posture_engine.PostureEngine(rules=self.load_posture_rules())
+        # รันโมเดลเฉพาะ keyframe: 2 Hz เมื่อท่านิ่ง สูงสุด 15 Hz เมื่อขยับเร็วหรือใกล้เกณฑ์ (max_rate_hz=None = ทุกเฟรม)
+        self.cadence = cadence.AdaptiveCadence(min_rate_hz=2.0, max_rate_hz=15.0)
+        self.roi_tracker = roi.RoiTracker(margin=0.3)
+        # จับเวลาแต่ละขั้นของการประมวลผล (ดูได้จากสวิตช์ Timings ในหน้า Detect)
+        self.profiler = instrumentation.StageProfiler()
+        self.sampler = instrumentation.SamplingProfiler()
+        self.predicted_landmarks = np.empty((posture_engine.LANDMARK_COUNT, posture_engine.LANDMARK_FIELDS), dtype=np.float32)
 
         # --- 2. กำหนด Layout หลักของหน้าต่าง ---
         self.grid_rowconfigure(1, weight=1)
@@ -89,6 +219,9 @@ class App(customtkinter.CTk):
         # --- 7. ตั้งค่าการปิดโปรแกรม ---
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+        # --- 8. โหลดโมเดลเบื้องหลัง หลังจากวาดหน้าต่างครั้งแรกเสร็จ ---
+        self.after_idle(self.start_model_warm_up)
+
     # =================================================================================
     # SETUP FRAMES
     # =================================================================================
@@ -114,30 +247,73 @@ class App(customtkinter.CTk):
         self.posture_timer_stop_button = customtkinter.CTkButton(button_frame, text="หยุด", command=self.posture_timer_stop, state="disabled")
         self.posture_timer_stop_button.grid(row=0, column=1, padx=5)
 
+        # สรุปท่าทางวันนี้และ 7 วันล่าสุด จากฐานข้อมูล analytics
+        summary_container = customtkinter.CTkFrame(self.home_frame)
+        summary_container.grid(row=1, column=0, padx=20, pady=(0, 20), sticky="ew")
+        customtkinter.CTkLabel(summary_container, text="สรุปท่าทาง", font=customtkinter.CTkFont(size=16, weight="bold")).pack(pady=(10, 5), padx=20, anchor="w")
+        self.analytics_today_label = customtkinter.CTkLabel(summary_container, text="", justify="left", anchor="w")
+        self.analytics_today_label.pack(padx=20, fill="x")
+        self.analytics_week_label = customtkinter.CTkLabel(summary_container, text="", justify="left", anchor="w",
+                                                           font=customtkinter.CTkFont(family="Courier", size=12))
+        self.analytics_week_label.pack(padx=20, pady=(5, 10), fill="x")
+
     def setup_detect_frame(self):
         self.detect_frame.grid_columnconfigure(0, weight=1)
         self.detect_frame.grid_rowconfigure(0, weight=1)
         
         # Label to display camera feed
-        self.video_label = customtkinter.CTkLabel(self.detect_frame, text="กด 'Start Detection' เพื่อเปิดกล้อง")
+        self.video_label = customtkinter.CTkLabel(self.detect_frame, text="กำลังโหลดโมเดล...")
         self.video_label.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
 
         # Frame for buttons
         detect_button_frame = customtkinter.CTkFrame(self.detect_frame)
         detect_button_frame.grid(row=1, column=0, pady=10)
         
-        self.start_detect_button = customtkinter.CTkButton(detect_button_frame, text="Start Detection", command=self.start_detection_thread)
+        self.start_detect_button = customtkinter.CTkButton(detect_button_frame, text="Start Detection", command=self.start_detection_thread, state="disabled")
         self.start_detect_button.pack(side="left", padx=10)
         
         self.stop_detect_button = customtkinter.CTkButton(detect_button_frame, text="Stop Detection", command=self.stop_detection, state="disabled")
         self.stop_detect_button.pack(side="left", padx=10)
 
+        # เครื่องมือวัดประสิทธิภาพ: แสดงเวลาของแต่ละขั้น และเปิด/ปิด sampling profiler
+        self.timings_switch = customtkinter.CTkSwitch(detect_button_frame, text="Timings", command=self.toggle_timings_panel)
+        self.timings_switch.pack(side="left", padx=10)
+        self.sampler_button = customtkinter.CTkButton(detect_button_frame, text="Start Profiler", command=self.toggle_sampler, width=110)
+        self.sampler_button.pack(side="left", padx=10)
+        # บันทึกคลิปเมื่อท่าทางไม่ถูกต้องต่อเนื่อง (ปิดไว้จนกว่าผู้ใช้จะเปิด)
+        self.clips_switch = customtkinter.CTkSwitch(detect_button_frame, text="Save Clips", command=self.toggle_clip_saving)
+        if SAVE_VIOLATION_CLIPS:
+            self.clips_switch.select()
+        self.clips_switch.pack(side="left", padx=10)
+        self.max_fps_menu = customtkinter.CTkOptionMenu(detect_button_frame, values=list(RENDER_FPS_CHOICES), width=70,
+                                                        command=self.set_max_render_fps)
+        self.max_fps_menu.set(f"{MAX_RENDER_FPS:.0f}")
+        customtkinter.CTkLabel(detect_button_frame, text="Max FPS").pack(side="left", padx=(10, 4))
+        self.max_fps_menu.pack(side="left", padx=(0, 10))
+        self.timings_label = customtkinter.CTkLabel(self.detect_frame, text="", justify="left", anchor="w",
+                                                    font=customtkinter.CTkFont(family="Courier", size=12))
+
     def setup_exercise_frame(self):
-        exercise_label = customtkinter.CTkLabel(self.exercise_frame, text="💪\n\nExercise Page\nส่วนสำหรับออกกำลังกาย", font=customtkinter.CTkFont(size=20, weight="bold"))
-        exercise_label.pack(expand=True, padx=20, pady=20)
-        exercise_progressbar = customtkinter.CTkProgressBar(self.exercise_frame)
-        exercise_progressbar.pack(pady=10, padx=20, fill="x")
-        exercise_progressbar.set(0.5)
+        exercise_container = customtkinter.CTkFrame(self.exercise_frame)
+        exercise_container.pack(expand=True, padx=20, pady=20)
+        customtkinter.CTkLabel(exercise_container, text="💪 ยืดเหยียดระหว่างวัน", font=customtkinter.CTkFont(size=20, weight="bold")).pack(pady=(20, 10), padx=40)
+        self.exercise_names = {spec["label"]: name for name, spec in exercise.EXERCISES.items()}
+        self.exercise_var = customtkinter.StringVar(value=next(iter(self.exercise_names)))
+        self.exercise_menu = customtkinter.CTkOptionMenu(exercise_container, values=list(self.exercise_names), variable=self.exercise_var)
+        self.exercise_menu.pack(pady=10, padx=20, fill="x")
+        self.exercise_count_label = customtkinter.CTkLabel(exercise_container, text="0 / 0", font=customtkinter.CTkFont(size=48, weight="bold"))
+        self.exercise_count_label.pack(pady=10, padx=40)
+        self.exercise_status_label = customtkinter.CTkLabel(exercise_container, text="เลือกท่าแล้วกด 'เริ่ม' (ใช้กล้องเดียวกับหน้า Detect)")
+        self.exercise_status_label.pack(pady=(0, 10), padx=20)
+        button_frame = customtkinter.CTkFrame(exercise_container, fg_color="transparent")
+        button_frame.pack(padx=20, pady=(10, 20))
+        self.exercise_start_button = customtkinter.CTkButton(button_frame, text="เริ่ม", command=self.exercise_start)
+        self.exercise_start_button.grid(row=0, column=0, padx=5)
+        self.exercise_stop_button = customtkinter.CTkButton(button_frame, text="หยุด", command=self.exercise_stop, state="disabled")
+        self.exercise_stop_button.grid(row=0, column=1, padx=5)
+        self.exercise_progressbar = customtkinter.CTkProgressBar(self.exercise_frame)
+        self.exercise_progressbar.pack(pady=10, padx=20, fill="x")
+        self.exercise_progressbar.set(0.0)
 
     # =================================================================================
     # POSTURE TIMER LOGIC (HOME FRAME)
@@ -148,35 +324,96 @@ class App(customtkinter.CTk):
         interval_map = {"5 วินาที": 5, "30 นาที": 30 * 60, "1 ชั่วโมง": 60 * 60, "1.5 ชั่วโมง": 90 * 60, "2 ชั่วโมง": 120 * 60}
         self.notification_target_seconds = interval_map.get(selected_interval_str, 5)
         self.posture_timer_running = True
+        self.posture_timer_started = self.scheduler.clock()
+        self.posture_timer_away_base = self.motion_gate.away_since(0.0) if self.motion_gate else 0.0
+        self.posture_timer_reminders = 0
         self.posture_timer_seconds = 0
         self.notification_cycle_index = 0
         self.posture_timer_start_button.configure(state="disabled")
         self.posture_timer_stop_button.configure(state="normal")
         self.interval_menu.configure(state="disabled")
-        self.posture_timer_thread = threading.Thread(target=self.posture_timer_run, daemon=True)
-        self.posture_timer_thread.start()
-
-    def posture_timer_run(self):
-        while self.posture_timer_running:
-            time.sleep(1)
-            if not self.posture_timer_running: break
-            self.posture_timer_seconds += 1
-            self.after(0, self.posture_timer_update_display)
-            if self.notification_target_seconds > 0 and self.posture_timer_seconds > 0 and self.posture_timer_seconds % self.notification_target_seconds == 0:
-                notification_data = self.health_notifications[self.notification_cycle_index]
-                self.after(0, self.trigger_notification, notification_data["title"], notification_data["message"])
-                if self.notification_cycle_index < len(self.health_notifications) - 1:
-                    self.notification_cycle_index += 1
+        self.posture_timer_schedule_reminder()
+        self.posture_timer_schedule_display()
+
+    def posture_timer_elapsed(self):
+        """เวลานั่งตั้งแต่กดเริ่ม: เวลาจริงลบช่วงที่กล้องเปิดอยู่แต่ไม่เห็นคน (ถ้ากล้องไม่เปิดจะนับเวลาจริงทั้งหมด)"""
+        elapsed = self.scheduler.clock() - self.posture_timer_started
+        if self.motion_gate:
+            elapsed -= self.motion_gate.away_since(self.posture_timer_away_base)
+        return max(elapsed, 0.0)
+
+    def posture_timer_schedule_reminder(self):
+        """ตั้งเวลาแจ้งเตือนครั้งถัดไปเมื่อเวลานั่งครบ notification_target_seconds อีกรอบ
+
+        เวลานั่งเดินช้ากว่าหรือเท่ากับเวลาจริง จึงตั้งไว้ที่เวลาเร็วที่สุดที่อาจครบ แล้วค่อยตรวจอีกครั้งตอนถึงเวลา
+        """
+        if not self.posture_timer_running or self.notification_target_seconds <= 0:
+            return
+        due = (self.posture_timer_reminders + 1) * self.notification_target_seconds
+        self.posture_timer_reminder_event = self.scheduler.call_later(
+            max(due - self.posture_timer_elapsed(), 0.0), self.posture_timer_check_reminder)
+
+    def posture_timer_schedule_display(self):
+        """อัปเดตตัวเลขทุกวินาทีเฉพาะตอนที่หน้า Home แสดงอยู่ หน้าอื่นไม่ต้องตื่นมาวาด"""
+        visible = self.posture_timer_running and self.home_frame.winfo_manager() != ""
+        if visible and self.posture_timer_display_event is None:
+            self.posture_timer_update_display()
+            elapsed = self.scheduler.clock() - self.posture_timer_started
+            self.posture_timer_display_event = self.scheduler.call_every(
+                1.0, self.posture_timer_update_display, start=self.posture_timer_started + int(elapsed) + 1)
+        elif not visible and self.posture_timer_display_event is not None:
+            self.scheduler.cancel(self.posture_timer_display_event)
+            self.posture_timer_display_event = None
+
+    # =================================================================================
+    # POSTURE SUMMARY (HOME FRAME)
+    # =================================================================================
+    def schedule_analytics_summary(self):
+        """อัปเดตสรุปทุกนาทีเฉพาะตอนที่หน้า Home แสดงอยู่ (อ่านจากตาราง rollup ใช้เวลาไม่กี่มิลลิวินาที)"""
+        visible = self.home_frame.winfo_manager() != ""
+        if visible and self.analytics_summary_event is None:
+            self.refresh_analytics_summary()
+            self.analytics_summary_event = self.scheduler.call_every(60.0, self.refresh_analytics_summary)
+        elif not visible and self.analytics_summary_event is not None:
+            self.scheduler.cancel(self.analytics_summary_event)
+            self.analytics_summary_event = None
+
+    def refresh_analytics_summary(self):
+        today = self.analytics.day_summary()
+        self.analytics_today_label.configure(text="วันนี้: " + "\n".join(analytics.format_summary(today)))
+        lines = []
+        for summary in self.analytics.daily(7):
+            seconds = summary["seconds"]
+            sitting = sum(seconds.values()) - seconds.get(posture_engine.STATUS_NO_PERSON, 0.0)
+            bad = sum(seconds.get(status, 0.0) for status in analytics.BAD_STATUSES)
+            lines.append(f"{summary['day']}  sit {sitting / 3600:4.1f} h  bad {bad / sitting if sitting else 0.0:4.0%}"
+                         f"  episodes {summary['slouch_episodes']:3d}  longest {summary['longest_sitting_s'] / 60:4.0f} min")
+        self.analytics_week_label.configure(text="\n".join(lines))
+
+    def posture_timer_check_reminder(self):
+        due = (self.posture_timer_reminders + 1) * self.notification_target_seconds
+        # ยอมให้คลาดได้เล็กน้อยจากการปัดเวลาของ Tk
+        if self.posture_timer_elapsed() >= due - 0.05:
+            self.posture_timer_reminders += 1
+            self.posture_timer_remind()
+        self.posture_timer_schedule_reminder()
+
+    def posture_timer_remind(self):
+        notification_data = self.health_notifications[self.notification_cycle_index]
+        self.trigger_notification(notification_data["title"], notification_data["message"])
+        if self.notification_cycle_index < len(self.health_notifications) - 1:
+            self.notification_cycle_index += 1
 
     def posture_timer_update_display(self):
-        mins, secs = divmod(self.posture_timer_seconds, 60)
-        hours, mins = divmod(mins, 60)
-        time_string = f"{hours:02d}:{mins:02d}:{secs:02d}"
-        self.posture_timer_label.configure(text=time_string)
+        self.posture_timer_seconds = int(self.posture_timer_elapsed())
+        self.posture_timer_label.configure(text=scheduler.format_hms(self.posture_timer_seconds))
 
     def posture_timer_stop(self):
         if self.posture_timer_running:
             self.posture_timer_running = False
+            self.scheduler.cancel(self.posture_timer_reminder_event)
+            self.scheduler.cancel(self.posture_timer_display_event)
+            self.posture_timer_reminder_event = self.posture_timer_display_event = None
             self.posture_timer_label.configure(text="00:00:00")
             self.posture_timer_start_button.configure(state="normal")
             self.posture_timer_stop_button.configure(state="disabled")
@@ -184,148 +421,459 @@ class App(customtkinter.CTk):
             self.posture_timer_seconds = 0
             self.notification_cycle_index = 0
 
+    # =================================================================================
+    # EXERCISE LOGIC (EXERCISE FRAME)
+    # =================================================================================
+    def exercise_start(self):
+        if not self.model_ready.is_set():
+            self.exercise_status_label.configure(text="กำลังโหลดโมเดล... ลองอีกครั้งในไม่กี่วินาที")
+            return
+        self.exercise_session = exercise.ExerciseSession(self.exercise_names[self.exercise_var.get()])
+        # เทียบการเคลื่อนไหวกับท่าต้นแบบทุกตัวใน library ทุก 0.5 วินาที (DTW บน inference thread)
+        library = self.load_exercise_templates()
+        self.template_matcher = exercise_templates.TemplateMatcher(library) if library is not None and len(library) else None
+        # ใช้กล้องและ pipeline ของหน้า Detect: เปิดใหม่ถ้ายังไม่เปิด หรือให้ทำงานต่อถ้าพักไว้
+        if self.detection_running:
+            self.camera.resume()
+        else:
+            self.start_detection_thread()
+        self.exercise_start_button.configure(state="disabled")
+        self.exercise_stop_button.configure(state="normal")
+        self.exercise_menu.configure(state="disabled")
+        self.schedule_exercise_display()
+
+    def exercise_stop(self):
+        self.exercise_session = None
+        self.template_matcher = None
+        if self.detection_running and self.detect_frame.winfo_manager() == "":
+            self.camera.pause(keep_inference=KEEP_INFERENCE_WHEN_HIDDEN)
+        self.schedule_exercise_display()
+        self.exercise_start_button.configure(state="normal")
+        self.exercise_stop_button.configure(state="disabled")
+        self.exercise_menu.configure(state="normal")
+
+    def load_exercise_templates(self):
+        """ท่าต้นแบบจาก EXERCISE_TEMPLATES_PATH หรือ None ถ้าไม่มีไฟล์ ถ้าไฟล์เสียจะแจ้งใน console แล้วไม่ให้คะแนน"""
+        if not os.path.exists(EXERCISE_TEMPLATES_PATH):
+            return None
+        try:
+            return exercise_templates.TemplateLibrary.load(EXERCISE_TEMPLATES_PATH)
+        except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile) as e:
+            print(f"ไม่สามารถอ่าน {EXERCISE_TEMPLATES_PATH}: {e} (ไม่ให้คะแนนความใกล้เคียงท่าต้นแบบ)")
+            return None
+
+    def schedule_exercise_display(self):
+        """อัปเดตจำนวนครั้ง/แถบความคืบหน้า 5 ครั้งต่อวินาที เฉพาะตอนที่กำลังทำท่าและหน้า Exercise แสดงอยู่"""
+        visible = self.exercise_session is not None and self.exercise_frame.winfo_manager() != ""
+        if visible and self.exercise_display_event is None:
+            self.refresh_exercise_display()
+            self.exercise_display_event = self.scheduler.call_every(0.2, self.refresh_exercise_display)
+        elif not visible and self.exercise_display_event is not None:
+            self.scheduler.cancel(self.exercise_display_event)
+            self.exercise_display_event = None
+
+    def refresh_exercise_display(self):
+        session = self.exercise_session
+        if session is None:
+            return
+        detector = session.detector
+        matcher = self.template_matcher
+        match = matcher.last if matcher is not None else None
+        score = f"   ใกล้เคียง {match.score:.0%}" if match is not None else ""
+        self.exercise_count_label.configure(text=f"{session.reps} / {session.target}{score}")
+        self.exercise_progressbar.set(session.progress)
+        if session.done:
+            self.exercise_status_label.configure(text=f"เสร็จแล้ว! {session.label} ครบ {session.target} ครั้ง")
+            self.trigger_notification("ยืดเหยียดเสร็จแล้ว", f"{session.label} ครบ {session.target} ครั้ง เยี่ยมมาก!")
+            self.exercise_stop()
+        elif not self.detection_running:
+            self.exercise_status_label.configure(text="กล้องไม่ได้เปิดอยู่ กด 'หยุด' แล้ว 'เริ่ม' ใหม่")
+        elif detector.phase == exercise.ACTIVE:
+            matched = f" (ใกล้เคียงท่า {match.name})" if match is not None else ""
+            self.exercise_status_label.configure(text=f"ค้างไว้... {detector.hold_elapsed:.1f} / {detector.hold_s:.0f} วินาที{matched}")
+        elif detector.value is None:
+            self.exercise_status_label.configure(text="รอให้กล้องเห็นศีรษะและไหล่...")
+        else:
+            self.exercise_status_label.configure(text=f"{session.label}: ทำท่าแล้วค้างไว้ {detector.hold_s:.0f} วินาที จากนั้นกลับสู่ท่าปกติ")
+
+    def update_exercise(self, frame_landmarks, now, image_width, image_height):
+        """ทำงานบน inference thread: ส่ง landmarks ของเฟรมนี้ให้ตัวนับครั้ง (None = ภาพไม่เปลี่ยน ใช้ค่าเดิม)"""
+        session = self.exercise_session
+        if session is None:
+            return
+        start = self.profiler.clock()
+        if frame_landmarks is None:
+            session.repeat(now)
+        else:
+            session.update(frame_landmarks, now, image_width, image_height)
+        self.profiler.record("exercise", self.profiler.clock() - start)
+        matcher = self.template_matcher
+        if matcher is not None:
+            start = self.profiler.clock()
+            if frame_landmarks is not None:
+                matcher.push(frame_landmarks, now, image_width, image_height)
+            if matcher.due(now):
+                matcher.match(now)
+            self.profiler.record("template match", self.profiler.clock() - start)
+
     # =================================================================================
     # POSTURE DETECTION LOGIC (DETECT FRAME)
     # =================================================================================
+    def start_model_warm_up(self):
+        self.startup_times["first_paint"] = time.perf_counter()
+        threading.Thread(target=self.warm_up_model, name="model-warm-up", daemon=True).start()
+
+    def warm_up_model(self):
+        """ทำงานบน warm-up thread: import cv2/mediapipe, สร้าง Pose และ (ถ้าเปิดไว้) รันภาพว่าง 1 เฟรม"""
+        try:
+            load_detection_modules()
+            self.mp_pose = mp.solutions.pose
+            self.mp_drawing = mp.solutions.drawing_utils
+            self.mp_drawing_styles = mp.solutions.drawing_styles
+            governor = latency_governor.LatencyGovernor(self.build_pose, budget_ms=50)
+            if WARM_UP_WITH_DUMMY_FRAME:
+                # เฟรมแรกของ graph ต้องจัดสรรหน่วยความจำ/โหลด delegate ทำตรงนี้แทนตอนเปิดกล้อง
+                governor.pose.process(np.zeros((480, 640, 3), dtype=np.uint8))
+                governor.pose.reset()
+        except Exception as e:
+            self.model_error = e
+            print(f"Error loading Pose model: {e}")
+            if not self.closing:
+                self.after(0, self.on_model_failed)
+            return
+        if self.closing:
+            governor.close()
+            return
+        self.after(0, self.on_model_ready, governor)
+
+    def on_model_ready(self, governor):
+        self.governor = governor
+        self.motion_gate = motion_gate.MotionGate()
+        # ภาพจากกล้องแสดงใน label อีกตัวที่วางทับช่องเดียวกัน (แสดงเฉพาะตอนตรวจจับ)
+        # ใช้ PhotoImage ตัวเดียวแล้ววาดทับ แทนการสร้างภาพใหม่ทุกเฟรม
+        self.video_view = video_view.VideoView(self.detect_frame, profiler=self.profiler, bg="black")
+        self.video_view.on_present = self.frame_presented
+        self.video_label.configure(text="กด 'Start Detection' เพื่อเปิดกล้อง")
+        self.start_detect_button.configure(state="normal")
+        self.startup_times["model_ready"] = time.perf_counter()
+        self.model_ready.set()
+
+    def on_model_failed(self):
+        self.video_label.configure(text=f"Error: โหลดโมเดลไม่สำเร็จ\n{self.model_error}")
+
     def start_detection_thread(self):
-        if self.detection_running: return
+        if not self.model_ready.is_set(): return
+        if self.detection_running:
+            # กลับมาที่หน้า Detect ระหว่างพักกล้อง: ส่งเฟรมต่อทันที ไม่ต้องเปิดกล้องใหม่
+            self.camera.resume()
+            return
         self.detection_running = True
         self.start_detect_button.configure(state="disabled")
         self.stop_detect_button.configure(state="normal")
+        self.video_view.label.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
         self.detection_thread = threading.Thread(target=self.detection_loop, daemon=True)
         self.detection_thread.start()
 
+    def open_capture(self):
+        """เปิดกล้อง (benchmark สามารถแทนที่ด้วยแหล่งภาพอื่น เช่น frame_sources.VideoFileSource)
+
+        ใช้ค่าจาก capture_config.json (กล้อง, ความละเอียด, FPS, MJPG, buffer) ถ้าไม่มีไฟล์จะใช้กล้อง 1
+        หาโหมดที่เร็วที่สุดได้ด้วย: python capture_config.py probe --save
+        """
+        return capture_config.open_capture(capture_config.load_config())
+
+    def make_pipeline(self, cap):
+        # แยกงานเป็น 3 ขั้น: อ่านกล้อง (thread), ประมวลผล Pose (thread) และวาดภาพ (detection_loop)
+        # คิวระหว่างขั้นเก็บแค่เฟรมล่าสุด เฟรมเก่าที่ยังไม่ถูกใช้จะถูกทิ้ง
+        # กล้องถูกปิดโดย capture thread เองเมื่อ pipeline หยุด
+        return pipeline.PosePipeline(cap, self.run_inference, transform=lambda f: cv2.flip(f, 1),
+                                     profiler=self.profiler, release=True)
+
     def detection_loop(self):
-        self.cap = cv2.VideoCapture(1) # ลองใช้ 0, ถ้าไม่ได้ลอง 1
-        if not self.cap.isOpened():
+        frame_pipeline = self.camera.start()
+        if frame_pipeline is None:
+            self.after(0, self.stop_detection)
             self.after(0, self.show_camera_error)
-            self.stop_detection()
             return
-            
-        while self.detection_running and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-
-            frame = cv2.flip(frame, 1)
-            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image_rgb.flags.writeable = False
-            results = self.pose.process(image_rgb)
-            image_rgb.flags.writeable = True
-            image_bgr = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
-
-            posture_status, text_color = "No Person Detected", (0, 165, 255)
-            if results.pose_landmarks:
-                self.mp_drawing.draw_landmarks(image_bgr, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
+        self.detection_pipeline = frame_pipeline
+
+        profiler = self.profiler
+        while self.detection_running and not frame_pipeline.finished:
+            item = frame_pipeline.get_result(timeout=0.1)
+            # pipeline ส่งเฟรมไม่เกินเพดานของ render_governor (ตามสถานะหน้าต่าง/CPU)
+            # และไม่มีคนอยู่หน้ากล้องนานพอ: ลดเหลือไม่กี่เฟรมต่อวินาที
+            governor = self.render_governor
+            governor.tick(frame=item is not None)
+            max_fps = governor.target_fps
+            if self.motion_gate.idle:
+                max_fps = min(max_fps, self.motion_gate.idle_fps) if max_fps else self.motion_gate.idle_fps
+            frame_pipeline.max_fps = max_fps
+            if item is None:
+                continue
+            captured_at, image_bgr, (pose_landmarks, posture_status, text_color) = item
+            bad = self.check_posture_alert(posture_status)
+            self.sync_clip_recorder()
+            if self.clip_recorder is not None:
+                # ย่อภาพลง ring buffer ที่จองไว้แล้ว การเข้ารหัสคลิปทำใน thread อื่น
+                start = profiler.clock()
+                self.clip_recorder.push(image_bgr, captured_at, bad, BAD_STATUS_REASONS.get(posture_status, "posture"))
+                profiler.record("clip buffer", profiler.clock() - start)
+            if self.camera.paused or not governor.render:
+                # ขณะพัก (ออกจากหน้า Detect) หรือหน้าต่างถูกย่อ/บัง ผลที่ได้จะไม่ถูกวาด (แต่ยังแจ้งเตือนได้)
+                continue
+
+            if pose_landmarks:
+                start = profiler.clock()
+                self.mp_drawing.draw_landmarks(image_bgr, pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
                                                landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style())
-                posture_status, text_color = self.analyze_posture(results.pose_landmarks.landmark, frame.shape[1], frame.shape[0])
-            
-            cv2.putText(image_bgr, f"Status: {posture_status}", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color, 2, cv2.LINE_AA)
-            
-            # Convert image for CTk
-            img = Image.fromarray(cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB))
-            ctk_img = customtkinter.CTkImage(light_image=img, dark_image=img, size=(640, 480))
-            
-            # Update label in main thread
-            self.after(0, self.update_video_label, ctk_img)
-            time.sleep(0.01) # Small delay
-
-        if self.cap:
-            self.cap.release()
+                profiler.record("draw_landmarks", profiler.clock() - start)
+
+            cv2.putText(image_bgr, f"Status: {posture_status} [{self.governor.mode_label}]", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.7, text_color, 2, cv2.LINE_AA)
+            cv2.putText(image_bgr, f"{frame_pipeline.format_stats()} | model {self.cadence.rate_hz:.1f} Hz | roi {self.roi_tracker.area_ratio:.0%} | {self.motion_gate.state_label} {self.motion_gate.pass_ratio:.0%} | {governor.status_label}", (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+
+            # แปลงภาพลง buffer ที่ใช้ซ้ำ แล้วให้ main thread วาดเฉพาะเฟรมล่าสุด
+            self.video_view.submit(image_bgr, captured_at)
+
+        self.motion_gate.stop()
+        self.last_result = None
+        # หยุดเพราะกล้องหมดเวลาพักหรือกล้องหลุด: คืนสถานะปุ่มบน main thread
+        if self.detection_running and not self.closing:
+            self.after(0, self.stop_detection)
+
+    def toggle_clip_saving(self):
+        self.save_clips = bool(self.clips_switch.get())
+
+    def sync_clip_recorder(self):
+        """ทำงานบน detection thread: สร้าง/ปิด ClipRecorder ตามสวิตช์ "Save Clips" (push กับ close อยู่ใน thread เดียวกัน)"""
+        if self.save_clips and self.clip_recorder is None:
+            self.clip_recorder = violation_clips.ClipRecorder(CLIPS_DIR, max_bytes=CLIPS_MAX_MB * 1024 * 1024)
+        elif not self.save_clips and self.clip_recorder is not None:
+            # คลิปที่กำลังเข้ารหัสอยู่จะบันทึกจนเสร็จ แต่ไม่เก็บเฟรมใหม่อีก
+            self.clip_recorder.close(wait=False)
+            self.clip_recorder = None
+
+    def build_pose(self, model_complexity=1):
+        return self.mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5, model_complexity=model_complexity)
+
+    def run_inference(self, frame):
+        """ทำงานบน inference thread ของ pipeline: ตรวจจับ Pose และวิเคราะห์ท่าทาง
+
+        ถ้าภาพแทบไม่เปลี่ยน (MotionGate) จะใช้ผลล่าสุดซ้ำโดยไม่รันโมเดล
+        นอกนั้นโมเดลจะรันเฉพาะ keyframe ที่ AdaptiveCadence เลือก ระหว่างนั้นใช้ landmarks ที่คาดการณ์ไว้
+        """
+        now = time.monotonic()
+        image_width, image_height = frame.shape[1], frame.shape[0]
+        profiler = self.profiler
+
+        start = profiler.clock()
+        passed = self.motion_gate.check(frame, now)
+        profiler.record("motion gate", profiler.clock() - start)
+        if not passed and self.last_result is not None:
+            self.motion_gate.report(self.last_result[0] is not None, now)
+            self.analytics.record(self.last_status)
+            if self.last_result[0] is not None:
+                self.update_exercise(None, now, image_width, image_height)
+            return self.last_result
+
+        if self.cadence.due(now):
+            # ประมวลผลเฉพาะบริเวณรอบตัวคนจาก keyframe ก่อนหน้า (ถ้าหาไม่เจอจะใช้ทั้งเฟรม)
+            crop, crop_roi = self.roi_tracker.crop(frame)
+            start = profiler.clock()
+            image_rgb = cv2.cvtColor(self.governor.prepare(crop), cv2.COLOR_BGR2RGB)
+            image_rgb.flags.writeable = False
+            profiler.record("color convert", profiler.clock() - start)
+            start = profiler.clock()
+            pose_landmarks = self.governor.process(image_rgb).pose_landmarks
+            profiler.record("pose.process", profiler.clock() - start)
+            if pose_landmarks:
+                self.roi_tracker.to_full_frame(pose_landmarks.landmark, crop_roi, image_width, image_height)
+            start = profiler.clock()
+            posture_status, text_color = self.analyze_posture(pose_landmarks.landmark if pose_landmarks else None, image_width, image_height)
+            profiler.record("posture analysis", profiler.clock() - start)
+            engine = self.posture_engine
+            if RECORD_LANDMARKS:
+                self.record_landmarks(engine.frame, image_width, image_height)
+            self.cadence.add_keyframe(now, engine.frame, engine.angle_left_neck, engine.angle_right_neck, engine.shoulder_y_diff)
+            found = engine.status != posture_engine.STATUS_NO_PERSON
+            self.roi_tracker.update(engine.bbox.tolist() if found else None, image_width, image_height)
+            if found:
+                self.update_exercise(engine.frame, now, image_width, image_height)
+        elif self.cadence.predict(now, self.predicted_landmarks) is not None:
+            start = profiler.clock()
+            posture_status, text_color = self.analyze_posture_array(self.predicted_landmarks, image_width, image_height)
+            profiler.record("posture analysis", profiler.clock() - start)
+            pose_landmarks = cadence.to_landmark_list(self.predicted_landmarks)
+            self.update_exercise(self.predicted_landmarks, now, image_width, image_height)
+        else:
+            pose_landmarks, posture_status, text_color = None, "No Person Detected", (0, 165, 255)
+        self.motion_gate.report(pose_landmarks is not None, now)
+        self.last_status = self.posture_engine.status if pose_landmarks is not None else posture_engine.STATUS_NO_PERSON
+        if self.exercise_session is not None and self.last_status != posture_engine.STATUS_NO_PERSON:
+            # ระหว่างทำท่ายืดเหยียด ท่าก้มคอ/เอียงศีรษะเป็นท่าที่ตั้งใจทำ: บันทึกเป็นสถานะแยก ไม่นับเป็นท่าทางไม่ถูกต้อง
+            self.last_status = posture_engine.STATUS_EXERCISING
+            posture_status = posture_engine.STATUS_LABELS_SHORT[self.last_status]
+            text_color = posture_engine.STATUS_COLORS[self.last_status]
+        self.analytics.record(self.last_status)
+        self.last_result = (pose_landmarks, posture_status, text_color)
+        return self.last_result
+
+    def record_landmarks(self, frame, image_width, image_height):
+        """ทำงานบน inference thread: เขียน landmarks ของ keyframe ลงไฟล์ (เปิดไฟล์ใหม่ทุกครั้งที่เริ่มตรวจจับ)"""
+        if self.recorder is None:
+            path = os.path.join(RECORDINGS_DIR, time.strftime("landmarks-%Y%m%d-%H%M%S.plm"))
+            self.recorder = landmark_recording.LandmarkRecorder(path, image_width, image_height)
+        self.recorder.append(frame)
 
     def stop_detection(self):
+        """ปิดกล้องและคืนสถานะปุ่ม เรียกซ้ำได้"""
         self.detection_running = False
-        if self.cap:
-            self.cap.release()
+        self.camera.close()
+        self.analytics.pause()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.closing:
+            return
         self.start_detect_button.configure(state="normal")
         self.stop_detect_button.configure(state="disabled")
-        self.video_label.configure(image=None, text="กด 'Start Detection' เพื่อเปิดกล้อง")
+        self.video_view.clear()
+        self.video_view.label.grid_remove()
+        self.video_label.configure(text="กด 'Start Detection' เพื่อเปิดกล้อง")
 
     def show_camera_error(self):
         self.video_label.configure(text="Error: ไม่สามารถเปิดกล้องได้\nกรุณาตรวจสอบว่ากล้องเชื่อมต่ออยู่และไม่ถูกใช้งานโดยโปรแกรมอื่น")
 
-    def update_video_label(self, ctk_img):
-        self.video_label.configure(image=ctk_img, text="")
+    def frame_presented(self, captured_at):
+        if self.detection_pipeline:
+            self.detection_pipeline.frame_done(captured_at)
+
+    def toggle_timings_panel(self):
+        if self.timings_switch.get():
+            self.timings_label.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 10))
+            self.refresh_timings_panel()
+        else:
+            self.timings_label.grid_forget()
+
+    def refresh_timings_panel(self):
+        """อัปเดตตารางเวลาของแต่ละขั้นทุก 0.5 วินาที ขณะที่สวิตช์เปิดอยู่"""
+        if not self.timings_switch.get():
+            return
+        lines = self.profiler.overlay_lines()
+        if lines:
+            lines.append(self.render_governor.format_report())
+            matcher = self.template_matcher
+            if matcher is not None:
+                lines.append(matcher.format_stats())
+        self.timings_label.configure(text="\n".join(lines) if lines else "ยังไม่มีข้อมูล (กด Start Detection)")
+        self.after(500, self.refresh_timings_panel)
+
+    def set_max_render_fps(self, value):
+        self.render_governor.max_fps = float(value)
+        self.render_governor.cpu_fps_cap = None
+
+    def toggle_sampler(self):
+        if self.sampler.toggle(SAMPLING_PROFILE_PATH):
+            self.sampler_button.configure(text="Stop Profiler")
+        else:
+            self.sampler_button.configure(text="Start Profiler")
+            print(f"Sampling profile written to {SAMPLING_PROFILE_PATH}")
 
     def calculate_angle(self, a, b, c):
-        a, b, c = np.array(a), np.array(b), np.array(c)
-        ba, bc = a - b, c - b
-        cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-        cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-        return np.degrees(np.arccos(cosine_angle))
+        return posture_engine.calculate_angle(a, b, c)
 
     def analyze_posture(self, landmarks, image_width, image_height):
         try:
-            lm = self.mp_pose.PoseLandmark
-            left_shoulder = [landmarks[lm.LEFT_SHOULDER.value].x * image_width, landmarks[lm.LEFT_SHOULDER.value].y * image_height]
-            right_shoulder = [landmarks[lm.RIGHT_SHOULDER.value].x * image_width, landmarks[lm.RIGHT_SHOULDER.value].y * image_height]
-            left_ear = [landmarks[lm.LEFT_EAR.value].x * image_width, landmarks[lm.LEFT_EAR.value].y * image_height]
-            right_ear = [landmarks[lm.RIGHT_EAR.value].x * image_width, landmarks[lm.RIGHT_EAR.value].y * image_height]
-            nose = [landmarks[lm.NOSE.value].x * image_width, landmarks[lm.NOSE.value].y * image_height]
-
-            angle_left_neck = self.calculate_angle(left_shoulder, left_ear, nose)
-            angle_right_neck = self.calculate_angle(right_shoulder, right_ear, nose)
-            
-            if angle_left_neck < 165 or angle_right_neck < 165:
-                return "Incorrect: Forward Head", (0, 0, 255)
-
-            shoulder_y_diff = abs(left_shoulder[1] - right_shoulder[1])
-            if shoulder_y_diff > 25:
-                return "Incorrect: Leaning", (0, 0, 255)
-            
-            return "Correct Posture", (0, 255, 0)
+            status = self.posture_engine.analyze_landmarks(landmarks, image_width, image_height)
         except Exception:
-            return "Cannot Analyze", (0, 165, 255)
+            status = posture_engine.STATUS_CANNOT_ANALYZE
+        return posture_engine.STATUS_LABELS_SHORT[status], posture_engine.STATUS_COLORS[status]
+
+    def analyze_posture_array(self, frame_landmarks, image_width, image_height):
+        status = self.posture_engine.analyze(frame_landmarks, image_width, image_height)
+        return posture_engine.STATUS_LABELS_SHORT[status], posture_engine.STATUS_COLORS[status]
 
     # =================================================================================
     # GENERAL APP LOGIC
     # =================================================================================
     def select_frame_by_name(self, name):
-        # Stop detection if navigating away
+        # ออกจากหน้า Detect: พักกล้องไว้ (ปิดจริงเมื่อเกิน CAMERA_GRACE_PERIOD_S), กลับมา: ทำงานต่อ
+        # ระหว่างทำท่ายืดเหยียด หน้า Exercise ก็ใช้กล้องเช่นกัน
         if self.detection_running:
-            self.stop_detection()
-            
+            if name == "detect" or (name == "exercise" and self.exercise_session is not None):
+                self.camera.resume()
+            else:
+                self.camera.pause(keep_inference=KEEP_INFERENCE_WHEN_HIDDEN)
+
         self.home_frame.grid_forget()
         self.detect_frame.grid_forget()
         self.exercise_frame.grid_forget()
         if name == "home": self.home_frame.grid(row=1, column=0, sticky="nsew")
         elif name == "detect": self.detect_frame.grid(row=1, column=0, sticky="nsew")
         elif name == "exercise": self.exercise_frame.grid(row=1, column=0, sticky="nsew")
-
-    def trigger_notification(self, title, message):
-        self.bell()
-        self.show_popup(title, message, topmost=True)
-        self.show_system_notification(title, message)
-
-    def show_system_notification(self, title, message):
-        if not PLYER_AVAILABLE: return
-        try:
-            notification.notify(title=title, message=message, timeout=10)
-        except Exception as e:
-            print(f"Error showing notification: {e}")
-
-    def show_popup(self, title, message, topmost=False):
-        popup = customtkinter.CTkToplevel(self)
-        popup.title(title)
-        popup.geometry("380x180")
-        self.update_idletasks()
-        app_x, app_y, app_width, app_height = self.winfo_x(), self.winfo_y(), self.winfo_width(), self.winfo_height()
-        popup_x, popup_y = app_x + (app_width // 2) - (380 // 2), app_y + (app_height // 2) - (180 // 2)
-        popup.geometry(f"+{popup_x}+{popup_y}")
-        if topmost: popup.attributes('-topmost', True)
-        label = customtkinter.CTkLabel(popup, text=message, font=customtkinter.CTkFont(size=16), wraplength=350)
-        label.pack(pady=20, padx=20, expand=True, fill="both")
-        ok_button = customtkinter.CTkButton(popup, text="รับทราบ", command=popup.destroy, width=100)
-        ok_button.pack(pady=(0, 20))
-        popup.grab_set()
-        popup.focus_force()
+        self.posture_timer_schedule_display()
+        self.schedule_analytics_summary()
+        self.schedule_exercise_display()
+
+    def load_posture_rules(self):
+        """เกณฑ์ท่าทางจาก RULES_PATH (หรือค่าเริ่มต้น) ถ้าไฟล์ผิดรูปแบบจะแจ้งใน console แล้วใช้ค่าเริ่มต้นแทน"""
+        return posture_rules.load_rules_or_defaults(RULES_PATH, "ไม่สามารถอ่าน {path}: {error} (ใช้เกณฑ์เริ่มต้นแทน)")
+
+    def trigger_notification(self, title, message, category="reminder"):
+        """เรียกได้จากทุก thread: ส่งให้ notifier แล้วกลับทันที (เสียง, toast และแจ้งเตือนของระบบทำใน notifier)"""
+        self.notifier.notify(title, message, category)
+
+    def check_posture_alert(self, posture_status):
+        """ทำงานบน detection thread: แจ้งเตือนเมื่อท่าทางไม่ถูกต้องต่อเนื่องเกิน POSTURE_ALERT_AFTER_S คืนค่า True ถ้าท่าทางไม่ถูกต้อง
+
+        ระหว่างทำท่ายืดเหยียดไม่นับเป็นท่าทางไม่ถูกต้อง (ไม่แจ้งเตือนและไม่บันทึกคลิป)
+        """
+        bad = posture_status in BAD_STATUS_REASONS and self.exercise_session is None
+        now = time.monotonic()
+        if not bad:
+            self.bad_posture_since = None
+        elif self.bad_posture_since is None:
+            self.bad_posture_since = now
+        elif now - self.bad_posture_since >= POSTURE_ALERT_AFTER_S:
+            self.bad_posture_since = now
+            self.trigger_notification("ปรับท่านั่ง", f"ตรวจพบท่าทางไม่ถูกต้องต่อเนื่อง ({posture_status}) ลองนั่งหลังตรงและดึงศีรษะกลับนะครับ",
+                                      category="posture")
+        return bad
 
     def on_closing(self):
         """Called when the main window is closed."""
+        if self.closing:
+            return  # ถูกเรียกซ้ำระหว่างรอ detection thread (self.update() ด้านล่าง)
+        self.closing = True
         self.posture_timer_running = False
+        self.scheduler.close()
+        self.notifier.close()
+        print(self.notifier.format_stats())
+        print(self.render_governor.format_report())
+        self.toast.destroy()
         self.detection_running = False
-        if self.cap:
-            self.cap.release()
+        self.camera.close()
+        # detection_loop เป็นผู้ใช้ clip_recorder (push/sync_clip_recorder): รอให้ thread จบก่อนปิด
+        # (วนรอบละไม่เกิน 0.1 วินาที หลัง detection_running = False) ระหว่างรอต้องประมวลผล event ของ Tk
+        # ด้วย เพราะ video_view.submit เรียก after() จาก thread นั้น ซึ่งรอ main thread อยู่
+        thread = self.detection_thread
+        deadline = time.monotonic() + 2.0
+        while thread is not None and thread.is_alive() and time.monotonic() < deadline:
+            self.update()
+            thread.join(timeout=0.05)
+        self.analytics.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        clip_recorder = self.clip_recorder
+        if clip_recorder is not None:
+            clip_recorder.close()
+            print(clip_recorder.format_stats())
+        if self.governor:
+            self.governor.close()
+        # บันทึกสถิติเวลาของแต่ละขั้นลงไฟล์ก่อนปิดโปรแกรม
+        if self.sampler.running:
+            self.sampler.stop(SAMPLING_PROFILE_PATH)
+        if self.profiler.stages:
+            self.profiler.dump(PROFILE_STATS_PATH)
         self.destroy()
 
 if __name__ == "__main__":
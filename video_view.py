@@ -0,0 +1,124 @@
+import threading
+import tkinter
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+# --- Render path for the Detect view ---
+# Building a new PIL Image + CTkImage per frame and posting one after() call per frame
+# allocates a full frame several times over and, when Tk is slower than the camera, lets
+# callbacks (each holding its own image) pile up. VideoView instead:
+#   - scales and converts each frame into a preallocated RGB buffer (a small pool:
+#     one being written by the render thread, one waiting, one being shown by Tk)
+#   - keeps one PhotoImage and paste()s into it in place
+#   - has at most one after() call in flight; a frame finished while one is pending
+#     replaces the waiting frame instead of queuing behind it
+#   - sizes the buffers to fit the label, reallocating only when the label is resized
+
+
+class VideoView:
+    """Tk label that shows BGR frames submitted from a worker thread.
+
+    submit() may be called from any thread; everything that touches Tk runs on the Tk
+    thread via after(). on_present(captured_at), if set, is called on the Tk thread once
+    a frame is on screen.
+    """
+    def __init__(self, master, profiler=None, **label_options):
+        self.label = tkinter.Label(master, bd=0, highlightthickness=0, padx=0, pady=0, **label_options)
+        self.label.bind("<Configure>", self._on_resize)
+        self.profiler = profiler
+        self.on_present = None
+        self.photo = None
+        self.presented = 0
+        self.coalesced = 0  # frames replaced by a newer one before Tk got to them
+        self._lock = threading.Lock()
+        self._label_size = (0, 0)
+        self._pool = []          # free RGB buffers of the current display size
+        self._shape = None       # (height, width) of the current display size
+        self._ready = None       # (buffer, captured_at) waiting for the Tk thread
+        self._scheduled = False
+        self._scaled = None      # BGR scratch buffer for resizing, render thread only
+
+    def submit(self, image_bgr, captured_at=None):
+        """Queue a BGR frame for display. The frame is copied, so the caller may reuse it."""
+        profiler = self.profiler
+        start = profiler.clock() if profiler else 0.0
+        height, width = image_bgr.shape[:2]
+        size = self._display_size(width, height)
+        buffer = self._take_buffer(size)
+        if size == (width, height):
+            cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB, dst=buffer)
+        else:
+            if self._scaled is None or self._scaled.shape[:2] != buffer.shape[:2]:
+                self._scaled = np.empty_like(buffer)
+            interpolation = cv2.INTER_AREA if size[0] < width else cv2.INTER_LINEAR
+            cv2.resize(image_bgr, size, dst=self._scaled, interpolation=interpolation)
+            cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGB, dst=buffer)
+        if profiler:
+            profiler.record("image convert", profiler.clock() - start)
+
+        with self._lock:
+            if self._ready is not None:
+                if self._ready[0].shape[:2] == self._shape:
+                    self._pool.append(self._ready[0])
+                self.coalesced += 1
+            self._ready = (buffer, captured_at)
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            self.label.after(0, self._present)
+
+    def clear(self):
+        """Drop any waiting frame and blank the label. Call on the Tk thread."""
+        with self._lock:
+            self._ready = None
+        self.photo = None
+        self.label.configure(image="")
+
+    # --- Tk thread ---
+    def _present(self):
+        with self._lock:
+            ready, self._ready = self._ready, None
+            self._scheduled = False
+        if ready is None:
+            return
+        buffer, captured_at = ready
+        profiler = self.profiler
+        start = profiler.clock() if profiler else 0.0
+        height, width = buffer.shape[:2]
+        if self.photo is None or (self.photo.width(), self.photo.height()) != (width, height):
+            self.photo = ImageTk.PhotoImage("RGB", (width, height), master=self.label)
+            self.label.configure(image=self.photo)
+        self.photo.paste(Image.frombuffer("RGB", (width, height), buffer, "raw", "RGB", 0, 1))
+        if profiler:
+            profiler.record("tk update", profiler.clock() - start)
+        self.presented += 1
+        with self._lock:
+            if buffer.shape[:2] == self._shape:
+                self._pool.append(buffer)
+        if self.on_present is not None and captured_at is not None:
+            self.on_present(captured_at)
+
+    def _on_resize(self, event):
+        with self._lock:
+            self._label_size = (event.width, event.height)
+
+    # --- Buffers ---
+    def _display_size(self, width, height):
+        """Largest size with the frame's aspect ratio that fits in the label."""
+        label_width, label_height = self._label_size
+        if label_width <= 1 or label_height <= 1:
+            return width, height
+        scale = min(label_width / width, label_height / height)
+        return max(int(width * scale), 1), max(int(height * scale), 1)
+
+    def _take_buffer(self, size):
+        shape = (size[1], size[0])
+        with self._lock:
+            if shape != self._shape:
+                self._shape = shape
+                self._pool.clear()
+            if self._pool:
+                return self._pool.pop()
+        return np.empty(shape + (3,), dtype=np.uint8)
@@ -0,0 +1,215 @@
+import collections
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# --- Evidence clips of sustained bad posture ---
+# Every frame the detection loop shows is offered to ClipRecorder.push(). At most `fps`
+# frames per second are shrunk into a preallocated ring buffer (cv2.resize straight into
+# the ring slot, so nothing is allocated per frame). When bad posture has lasted
+# sustain_s, the recorder keeps filling the ring for post_s more seconds and then hands
+# the whole ring to an encoder thread pool, swapping in a spare buffer - the detection
+# thread never copies or encodes frames. The encoder writes an .mp4 (or a folder of
+# JPEGs) into `directory`, then deletes the least recently used clips until the folder
+# is under max_bytes. open_clip() marks a clip as used.
+#
+# Memory: (pre_s + post_s) * fps frames of size[0] x size[1] x 3 bytes per buffer;
+# the defaults (8 s at 8 fps, 320x240) are ~15 MB per buffer, `buffers` of them.
+# See bench_clips.py for the per-frame cost on the detection thread.
+
+CLIP_EXTENSIONS = (".mp4", ".avi")
+
+
+class _RingBuffer:
+    """Preallocated frames + timestamps; `next` is the slot written next."""
+    def __init__(self, capacity, size):
+        self.frames = np.zeros((capacity, size[1], size[0], 3), dtype=np.uint8)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.next = 0
+        self.count = 0
+
+    def reset(self):
+        self.next = 0
+        self.count = 0
+
+    def ordered(self):
+        """Slot indices from oldest to newest."""
+        capacity = len(self.frames)
+        start = (self.next - self.count) % capacity
+        return [(start + i) % capacity for i in range(self.count)]
+
+
+class ClipRecorder:
+    """Keeps the last few seconds of downscaled frames and saves a clip when bad posture persists.
+
+    push() is called from the detection thread only; encoding runs on a thread pool.
+
+    Parameters:
+      - directory: where clips are written
+      - pre_s / post_s: seconds kept before the trigger / recorded after it
+      - fps: frames per second kept in the ring (the rest are skipped)
+      - size: (width, height) of the stored frames
+      - sustain_s: bad posture must last this long before a clip is saved
+      - cooldown_s: minimum seconds between two clips
+      - max_bytes: disk budget for `directory`; least recently used clips are deleted
+      - video: True writes .mp4, False writes a folder of JPEGs per clip
+      - buffers: ring buffers in the pool (a trigger while all are being encoded is skipped)
+      - workers: encoder threads
+    """
+    def __init__(self, directory="clips", pre_s=5.0, post_s=3.0, fps=8.0, size=(320, 240), sustain_s=5.0,
+                 cooldown_s=300.0, max_bytes=200 * 1024 * 1024, video=True, buffers=2, workers=1, jpeg_quality=80):
+        self.directory = directory
+        self.post_s = post_s
+        self.fps = fps
+        self.size = size
+        self.sustain_s = sustain_s
+        self.cooldown_s = cooldown_s
+        self.max_bytes = max_bytes
+        self.video = video
+        self.jpeg_quality = jpeg_quality
+        capacity = max(1, int(round((pre_s + post_s) * fps)))
+        self._spare = queue.Queue()
+        for _ in range(buffers - 1):
+            self._spare.put(_RingBuffer(capacity, size))
+        self._ring = _RingBuffer(capacity, size)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clip-encoder")
+        self._evict_lock = threading.Lock()
+        self._last_push = None
+        self._bad_since = None
+        self._trigger_at = None      # when the current clip was triggered (None = not recording)
+        self._trigger_reason = None
+        self._last_clip = None
+        self.saved = 0
+        self.skipped = 0             # triggers dropped because every buffer was busy
+        self.evicted = 0
+        self.errors = 0
+        self.encode_times = collections.deque(maxlen=100)
+        self.last_path = None
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Detection thread ---
+    def push(self, frame_bgr, timestamp, violation=False, reason="posture"):
+        """Offer one frame. timestamp is monotonic seconds; violation = bad posture in this frame."""
+        # Sustained violation -> trigger (at most once per cooldown)
+        if violation:
+            if self._bad_since is None:
+                self._bad_since = timestamp
+            elif (self._trigger_at is None and timestamp - self._bad_since >= self.sustain_s
+                  and (self._last_clip is None or timestamp - self._last_clip >= self.cooldown_s)):
+                self._trigger_at, self._trigger_reason = timestamp, reason
+                self._last_clip = timestamp
+        else:
+            self._bad_since = None
+
+        if self._last_push is not None and timestamp - self._last_push < 1.0 / self.fps:
+            return
+        self._last_push = timestamp
+        ring = self._ring
+        cv2.resize(frame_bgr, self.size, dst=ring.frames[ring.next], interpolation=cv2.INTER_AREA)
+        ring.timestamps[ring.next] = timestamp
+        ring.next = (ring.next + 1) % len(ring.frames)
+        ring.count = min(ring.count + 1, len(ring.frames))
+
+        if self._trigger_at is not None and timestamp - self._trigger_at >= self.post_s:
+            self._hand_off()
+
+    @property
+    def recording(self):
+        return self._trigger_at is not None
+
+    def _hand_off(self):
+        reason, wall_time = self._trigger_reason, time.time() - (time.monotonic() - self._trigger_at)
+        self._trigger_at = self._trigger_reason = None
+        try:
+            spare = self._spare.get_nowait()
+        except queue.Empty:
+            self.skipped += 1
+            return
+        ring, self._ring = self._ring, spare
+        self._executor.submit(self._encode, ring, reason, wall_time)
+
+    # --- Encoder threads ---
+    def _encode(self, ring, reason, wall_time):
+        start = time.perf_counter()
+        try:
+            name = time.strftime("%Y%m%d-%H%M%S", time.localtime(wall_time)) + f"-{reason}"
+            path = os.path.join(self.directory, name)
+            slots = ring.ordered()
+            if self.video:
+                path += ".mp4"
+                temp = path + ".part.mp4"
+                writer = cv2.VideoWriter(temp, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, self.size)
+                if not writer.isOpened():
+                    raise RuntimeError(f"cannot open a video writer for {temp}")
+                for slot in slots:
+                    writer.write(ring.frames[slot])
+                writer.release()
+                os.replace(temp, path)
+            else:
+                os.makedirs(path, exist_ok=True)
+                params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+                for i, slot in enumerate(slots):
+                    cv2.imwrite(os.path.join(path, f"{i:04d}.jpg"), ring.frames[slot], params)
+            self.saved += 1
+            self.last_path = path
+            self.encode_times.append(time.perf_counter() - start)
+            self.evict()
+        except Exception as e:
+            self.errors += 1
+            print(f"Error saving clip: {e}")
+        finally:
+            ring.reset()
+            self._spare.put(ring)
+
+    # --- Clips on disk ---
+    def clips(self):
+        """[(path, bytes, last used)] of saved clips, most recently used first."""
+        result = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part.mp4"):
+                continue
+            if os.path.isdir(path):
+                files = [os.path.join(path, f) for f in os.listdir(path)]
+                size = sum(os.path.getsize(f) for f in files)
+            elif name.endswith(CLIP_EXTENSIONS):
+                size = os.path.getsize(path)
+            else:
+                continue
+            result.append((path, size, os.path.getmtime(path)))
+        result.sort(key=lambda clip: clip[2], reverse=True)
+        return result
+
+    def open_clip(self, path):
+        """Mark a clip as used (moves it to the back of the eviction order) and return its path."""
+        os.utime(path)
+        return path
+
+    def evict(self):
+        """Delete least recently used clips until the directory fits in max_bytes."""
+        with self._evict_lock:
+            clips = self.clips()
+            total = sum(size for _, size, _ in clips)
+            while clips and total > self.max_bytes:
+                path, size, _ = clips.pop()
+                if os.path.isdir(path):
+                    for name in os.listdir(path):
+                        os.remove(os.path.join(path, name))
+                    os.rmdir(path)
+                else:
+                    os.remove(path)
+                total -= size
+                self.evicted += 1
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def format_stats(self):
+        encode_ms = np.mean(self.encode_times) * 1000.0 if self.encode_times else 0.0
+        return (f"clips: {self.saved} saved, {self.skipped} skipped, {self.evicted} evicted, {self.errors} errors, "
+                f"encode {encode_ms:.0f} ms")